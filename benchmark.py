@@ -0,0 +1,363 @@
+# benchmark.py
+"""
+Offline performance benchmark for ingestion, retrieval and the full RAG path.
+
+OpenAI is replaced by local stand-ins: a deterministic hashing embedder and a
+chat model that only simulates latency, both served through the shared
+client registry so the real batching, caching, search and logging code runs.
+Everything is written to a temporary directory, never to the app's data.
+
+    python benchmark.py --tenants 4 --docs 50 --queries 200 --concurrency 8 --output bench.json
+
+Results (ingest chunks/s, retrieval and end-to-end p50/p95/p99, peak memory)
+are printed and optionally written as JSON for comparing runs.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+WORDS = (
+    "account access billing invoice payment refund policy warranty shipping delivery order "
+    "return exchange product service support contract renewal plan pricing discount tax "
+    "report dashboard export import user role permission admin security password login "
+    "device install update version release feature limit quota storage backup restore "
+    "region country currency language schedule meeting deadline project team manager "
+    "customer partner vendor supplier inventory stock warehouse label barcode package"
+).split()
+
+
+# ------------------------------------------------------------
+# ✔ Offline stand-ins for the OpenAI clients
+# ------------------------------------------------------------
+def hash_embedding(text: str, dimension: int) -> list:
+    """Feature-hashed bag of words: same text -> same vector, shared words -> similar vectors."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in re.findall(r"[a-z0-9-]+", text.lower()):
+        digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+        vector[digest % dimension] += 1.0 if (digest >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+class FakeEmbeddings:
+    def __init__(self, dimension: int, request_ms: float, per_input_ms: float):
+        self.dimension = dimension
+        self.request_ms = request_ms
+        self.per_input_ms = per_input_ms
+        self.requests = 0
+
+    def _response(self, texts):
+        self.requests += 1
+        return SimpleNamespace(data=[SimpleNamespace(embedding=hash_embedding(t, self.dimension)) for t in texts])
+
+    def _delay(self, texts) -> float:
+        return (self.request_ms + self.per_input_ms * len(texts)) / 1000
+
+    def create(self, input, model=None, **kwargs):
+        time.sleep(self._delay(input))
+        return self._response(input)
+
+
+class FakeAsyncEmbeddings(FakeEmbeddings):
+    async def create(self, input, model=None, **kwargs):
+        await asyncio.sleep(self._delay(input))
+        return self._response(input)
+
+
+class FakeChatModel:
+    """invoke/ainvoke/stream with a simulated time-to-first-token and token rate."""
+
+    def __init__(self, first_token_ms: float, tokens_per_second: float, answer_tokens: int):
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+
+    def _answer_tokens(self, messages):
+        words = re.findall(r"\w+", messages[-1].content) or ["answer"]
+        return [words[i % len(words)] + " " for i in range(self.answer_tokens)]
+
+    def _duration(self) -> float:
+        return self.first_token_ms / 1000 + self.answer_tokens / self.tokens_per_second
+
+    def invoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+        time.sleep(self._duration())
+        return AIMessage(content="".join(self._answer_tokens(messages)))
+
+    async def ainvoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+        await asyncio.sleep(self._duration())
+        return AIMessage(content="".join(self._answer_tokens(messages)))
+
+    def stream(self, messages, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+        time.sleep(self.first_token_ms / 1000)
+        for token in self._answer_tokens(messages):
+            time.sleep(1 / self.tokens_per_second)
+            yield AIMessageChunk(content=token)
+
+
+# ------------------------------------------------------------
+# ✔ Synthetic multi-tenant corpus
+# ------------------------------------------------------------
+def build_corpus(tenant_ids, docs_per_tenant: int, chunks_per_doc: int, words_per_chunk: int, seed: int):
+    """
+    {tenant: [(file_name, [chunk texts])]} plus queries [(tenant, text, (file, page))].
+    Every chunk carries a unique code and tenant-specific terms, so each
+    query has one known source chunk.
+    """
+    rng = random.Random(seed)
+    corpus, queries = {}, []
+    for t, tenant_id in enumerate(tenant_ids):
+        topic = [f"{tenant_id.lower()}-{w}" for w in rng.sample(WORDS, 12)]
+        files = []
+        for d in range(docs_per_tenant):
+            file_name = f"doc_{d:04d}.txt"
+            chunks = []
+            for page in range(chunks_per_doc):
+                code = f"sku-{t:02d}{d:04d}{page:03d}"
+                words = rng.choices(WORDS, k=words_per_chunk - 4) + rng.sample(topic, 3) + [code]
+                rng.shuffle(words)
+                chunks.append(" ".join(words))
+                queries.append((tenant_id, f"what about {code} " + " ".join(rng.sample(words, 6)), (file_name, page)))
+            files.append((file_name, chunks))
+        corpus[tenant_id] = files
+    rng.shuffle(queries)
+    return corpus, queries
+
+
+# ------------------------------------------------------------
+# ✔ Measurements
+# ------------------------------------------------------------
+def percentiles(latencies_ms) -> dict:
+    if not latencies_ms:
+        return {}
+    values = np.asarray(latencies_ms)
+    return {
+        "count": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+class Phase:
+    """Times a phase and records peak memory (Python heap when tracemalloc is on)."""
+
+    def __init__(self, results: dict, name: str):
+        self.results, self.name = results, name
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        entry = self.results.setdefault(self.name, {})
+        entry["seconds"] = round(time.perf_counter() - self.started, 3)
+        entry["peak_rss_mb"] = peak_rss_mb()
+        if tracemalloc.is_tracing():
+            entry["python_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+
+
+def run_ingest(corpus, results):
+    from langchain_core.documents import Document
+    from src.ingestion.storage import index_chunks
+
+    total = 0
+    with Phase(results, "ingest") as phase:
+        for tenant_id, files in corpus.items():
+            for file_name, texts in files:
+                chunks = [
+                    Document(page_content=text, metadata={"tenant_id": tenant_id, "source": file_name, "page": page})
+                    for page, text in enumerate(texts)
+                ]
+                message = index_chunks(tenant_id, file_name, chunks)
+                if message.startswith("FAILED"):
+                    raise RuntimeError(message)
+                total += len(chunks)
+    results["ingest"]["chunks"] = total
+    results["ingest"]["chunks_per_s"] = round(total / results["ingest"]["seconds"], 1)
+
+
+def run_retrieval(queries, results, k: int):
+    from src.rag.retrieval import get_tenant_docs
+
+    latencies, hits = [], 0
+    with Phase(results, "retrieval"):
+        for tenant_id, text, (file_name, page) in queries:
+            started = time.perf_counter()
+            docs = get_tenant_docs(text, tenant_id, k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += any(d.metadata.get("source") == file_name and d.metadata.get("page") == page for d in docs)
+    results["retrieval"].update(percentiles(latencies))
+    results["retrieval"][f"hit_rate_at_{k}"] = round(hits / len(queries), 3)
+
+
+def run_end_to_end_sync(queries, results, concurrency: int):
+    from src.rag.chat_service import get_rag_response
+
+    def ask(query):
+        tenant_id, text, _ = query
+        started = time.perf_counter()
+        get_rag_response(text, tenant_id)
+        return (time.perf_counter() - started) * 1000
+
+    with Phase(results, "end_to_end_sync"):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(ask, queries))
+    entry = results["end_to_end_sync"]
+    entry.update(percentiles(latencies))
+    entry["concurrency"] = concurrency
+    entry["requests_per_s"] = round(len(queries) / entry["seconds"], 2)
+
+
+def run_end_to_end_async(queries, results, concurrency: int):
+    from src.rag.chat_service import aget_rag_response
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def ask(query):
+            tenant_id, text, _ = query
+            async with semaphore:
+                started = time.perf_counter()
+                await aget_rag_response(text, tenant_id)
+                return (time.perf_counter() - started) * 1000
+
+        return await asyncio.gather(*(ask(q) for q in queries))
+
+    with Phase(results, "end_to_end_async"):
+        latencies = asyncio.run(main())
+    entry = results["end_to_end_async"]
+    entry.update(percentiles(latencies))
+    entry["concurrency"] = concurrency
+    entry["requests_per_s"] = round(len(queries) / entry["seconds"], 2)
+
+
+# ------------------------------------------------------------
+# ✔ Entry point
+# ------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    corpus = parser.add_argument_group("corpus")
+    corpus.add_argument("--tenants", type=int, default=3)
+    corpus.add_argument("--docs", type=int, default=20, help="documents per tenant")
+    corpus.add_argument("--chunks-per-doc", type=int, default=25)
+    corpus.add_argument("--words-per-chunk", type=int, default=150)
+    corpus.add_argument("--seed", type=int, default=7)
+    load = parser.add_argument_group("load")
+    load.add_argument("--queries", type=int, default=100, help="queries per phase")
+    load.add_argument("--concurrency", type=int, default=8, help="simultaneous conversations end-to-end")
+    load.add_argument("--k", type=int, default=6, help="retrieved chunks per query")
+    load.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    fakes = parser.add_argument_group("simulated OpenAI latency")
+    fakes.add_argument("--embed-request-ms", type=float, default=40.0)
+    fakes.add_argument("--embed-per-input-ms", type=float, default=0.05)
+    fakes.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    fakes.add_argument("--llm-tokens-per-s", type=float, default=80.0)
+    fakes.add_argument("--llm-answer-tokens", type=int, default=60)
+    parser.add_argument("--with-caches", action="store_true", help="keep the embedding and semantic answer caches on")
+    parser.add_argument("--tracemalloc", action="store_true", help="also record Python heap peaks (slower)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary data directory")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Point every store at a scratch directory before src.config is imported
+    work_dir = tempfile.mkdtemp(prefix="rag_benchmark_")
+    os.environ["VECTOR_STORE_DIR"] = os.path.join(work_dir, "vector_store")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(work_dir, "embedding_cache.sqlite")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'app.db')}"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+    if not args.with_caches:
+        os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+        os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+
+    import src.config as config
+    from src.clients import override_clients
+    from src.database import init_db, log_writer, log_writer_stats
+    from src.embedding_providers import OPENAI_DIMENSIONS, get_embedding_provider
+
+    # Only the OpenAI provider is faked; EMBEDDING_PROVIDER=local benchmarks the real local model
+    dimension = config.EMBEDDING_DIMENSIONS or OPENAI_DIMENSIONS.get(config.EMBEDDING_MODEL, 1536)
+    override_clients(
+        openai=SimpleNamespace(embeddings=FakeEmbeddings(dimension, args.embed_request_ms, args.embed_per_input_ms)),
+        async_openai=SimpleNamespace(embeddings=FakeAsyncEmbeddings(dimension, args.embed_request_ms, args.embed_per_input_ms)),
+        chat_model=FakeChatModel(args.llm_first_token_ms, args.llm_tokens_per_s, args.llm_answer_tokens),
+    )
+    init_db()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    tenant_ids = [f"bench{t:03d}" for t in range(args.tenants)]
+    corpus, queries = build_corpus(tenant_ids, args.docs, args.chunks_per_doc, args.words_per_chunk, args.seed)
+    queries = queries[:args.queries]
+
+    results = {}
+    try:
+        run_ingest(corpus, results)
+        run_retrieval(queries, results, args.k)
+        if args.mode in ("sync", "both"):
+            run_end_to_end_sync(queries, results, args.concurrency)
+        if args.mode in ("async", "both"):
+            run_end_to_end_async(queries, results, args.concurrency)
+        log_writer.flush()
+        results["log_writer"] = log_writer_stats()
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "args": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "vector_store_mode": config.VECTOR_STORE_MODE,
+            "vector_quantization": config.VECTOR_QUANTIZATION,
+            "hybrid_search": config.HYBRID_SEARCH_ENABLED,
+            "embedding": get_embedding_provider().describe(),
+        },
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    output = json.dumps(report, indent=2, default=str)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
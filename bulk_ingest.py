@@ -0,0 +1,76 @@
+# bulk_ingest.py
+"""
+Ingest source files from disk instead of through the Streamlit uploader.
+
+    python bulk_ingest.py tenantA                 # data/source_docs/tenantA
+    python bulk_ingest.py                         # every tenant folder under data/source_docs
+    python bulk_ingest.py tenantC --root /mnt/export --parse-workers 8
+
+Each subdirectory of --root is a tenant; files are ingested recursively and
+named by their path inside the tenant folder. Progress is checkpointed per
+file in the app database, so re-running after an interruption (or after
+adding files) only ingests what is new or changed. Throughput (files/s,
+chunks/s) is printed while running and as JSON at the end.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from src.config import INGEST_PARSE_WORKERS, INGEST_INDEX_WORKERS
+from src.database import init_db
+from src.ingestion.bulk import BulkIngestor
+
+SOURCE_ROOT = os.path.join("data", "source_docs")
+
+
+def tenant_directories(root: str, tenant_ids) -> dict:
+    if not tenant_ids:
+        tenant_ids = sorted(
+            name for name in os.listdir(root)
+            if not name.startswith(".") and os.path.isdir(os.path.join(root, name))
+        )
+    dirs = {tenant_id: os.path.join(root, tenant_id) for tenant_id in tenant_ids}
+    missing = [d for d in dirs.values() if not os.path.isdir(d)]
+    if missing:
+        sys.exit(f"Not a directory: {', '.join(missing)}")
+    return dirs
+
+
+def print_progress(stats: dict):
+    print(
+        f"{stats['files_ingested'] + stats['files_failed']} ingested/failed, {stats['files_skipped']} unchanged "
+        f"of {stats['files_found']} found | {stats['files_per_s']} files/s, {stats['chunks_per_s']} chunks/s",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tenants", nargs="*", help="tenant folders to ingest (default: all)")
+    parser.add_argument("--root", default=SOURCE_ROOT, help="folder holding one subfolder per tenant")
+    parser.add_argument("--parse-workers", type=int, default=INGEST_PARSE_WORKERS, help="parser processes")
+    parser.add_argument("--index-workers", type=int, default=INGEST_INDEX_WORKERS, help="embedding/upsert threads")
+    parser.add_argument("--force", action="store_true", help="ignore checkpoints and re-ingest every file")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--verbose", action="store_true", help="log every file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(message)s")
+    init_db()
+
+    ingestor = BulkIngestor(
+        parse_workers=args.parse_workers,
+        index_workers=args.index_workers,
+        force=args.force,
+        progress_fn=print_progress,
+        progress_interval=args.progress_interval,
+    )
+    stats = ingestor.run(tenant_directories(args.root, args.tenants))
+    print(json.dumps(stats, indent=2))
+    sys.exit(1 if stats["files_failed"] or stats["interrupted"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,64 @@
 # check_db.py
-from src.qdrant_client import get_standalone_qdrant_client
-from src.config import QDRANT_COLLECTION_NAME
+import os
+
+from src.qdrant_client import collection_stats, collection_manager, use_disk_store
+from src.config import TENANT_IDS, VECTOR_STORE_DIR
+from src.embedding_providers import embedding_model_id
+
+
+def known_tenants():
+    """Configured tenants plus any tenant directory found in the disk store."""
+    tenants = list(TENANT_IDS)
+    if use_disk_store() and os.path.isdir(VECTOR_STORE_DIR):
+        tenants += sorted(
+            name for name in os.listdir(VECTOR_STORE_DIR)
+            if name not in tenants and os.path.isdir(os.path.join(VECTOR_STORE_DIR, name))
+        )
+    return tenants
+
 
 def check_database():
-    client = get_standalone_qdrant_client()
-    
-    # 1. Check Collection Info
-    try:
-        info = client.get_collection(QDRANT_COLLECTION_NAME)
-        print(f"--- COLLECTION STATUS ---")
-        print(f"Status: {info.status}")
-        print(f"Total Vectors: {info.points_count}")
-        
-        if info.points_count == 0:
-            print("⚠️ WARNING: Database is EMPTY. Please run the 'Index Document' step in Streamlit.")
-            return
-
-        # 2. Scroll through points to check Metadata
-        print(f"\n--- CHECKING LATEST ENTRY ---")
-        points = client.scroll(
-            collection_name=QDRANT_COLLECTION_NAME,
-            limit=1,
-            with_payload=True
-        )[0]
-        
-        if points:
-            print("Found Payload (Metadata):", points[0].payload)
-            if "tenant_id" in points[0].payload:
-                print(f"✅ SUCCESS: 'tenant_id' found: {points[0].payload['tenant_id']}")
+    if not use_disk_store():
+        print("⚠️ VECTOR_STORE_MODE=memory: collections live inside the app process and cannot be inspected from here.")
+        return
+
+    # 1. Per-tenant collection status (read from meta.json, nothing is loaded)
+    print(f"--- COLLECTION STATUS ({VECTOR_STORE_DIR}) ---")
+    print(f"{'tenant':<16}{'vectors':>10}{'quant':>8}{'search MB':>11}{'disk MB':>9}  embedding model")
+    stats = collection_stats(known_tenants())
+    for row in stats:
+        model = f"{row['embedding_model']} ({row['dimension']} dims)" if row["embedding_model"] else "-"
+        print(
+            f"{row['tenant_id']:<16}{row['vectors']:>10}{row['quantization']:>8}"
+            f"{row['search_bytes'] / 2**20:>11.1f}{row['disk_bytes'] / 2**20:>9.1f}  {model}"
+        )
+
+    configured = embedding_model_id()
+    stale = [row["tenant_id"] for row in stats if row["vectors"] and row["embedding_model"] != configured]
+    if stale:
+        print(f"⚠️ Built with another model than the configured {configured}: {', '.join(stale)}")
+        print("   Re-index them: python reset_db.py " + " ".join(stale))
+
+    if not any(row["vectors"] for row in stats):
+        print("⚠️ WARNING: Database is EMPTY. Please run the 'Index Document' step in Streamlit.")
+        return
+
+    # 2. Check one stored point per tenant carries the right tenant_id
+    print(f"\n--- CHECKING TENANT ISOLATION ---")
+    for row in stats:
+        if not row["vectors"]:
+            continue
+        tenant_id = row["tenant_id"]
+        try:
+            point_id, payload = collection_manager.store(tenant_id).points()[0]
+            stored_tenant = payload.get("metadata", {}).get("tenant_id")
+            if stored_tenant == tenant_id:
+                print(f"✅ {tenant_id}: point {point_id} tagged with tenant_id={stored_tenant}")
             else:
-                print("❌ ERROR: 'tenant_id' is MISSING from metadata!")
-        else:
-            print("Database has count > 0 but returned no points. Strange.")
-            
-    except Exception as e:
-        print(f"Error checking DB: {e}")
+                print(f"❌ {tenant_id}: point {point_id} has tenant_id={stored_tenant!r}")
+        except Exception as e:
+            print(f"Error checking {tenant_id}: {e}")
+
 
 if __name__ == "__main__":
-    check_database()
\ No newline at end of file
+    check_database()
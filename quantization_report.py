@@ -0,0 +1,107 @@
+# quantization_report.py
+"""
+Recall / latency / size of the disk vector store per quantization mode.
+
+    python quantization_report.py                      # synthetic 50k x 1536 corpus
+    python quantization_report.py --tenant tenantA     # a tenant's stored vectors
+
+Recall@k is measured against exact float search over the same vectors.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.embedding_providers import get_embedding_provider
+from src.vector_store import TenantVectorStore, QUANTIZATION_MODES, get_tenant_store
+
+
+def synthetic_vectors(count, dimension, clusters=200, seed=0):
+    """Clustered vectors: embeddings of a real corpus are far from uniform."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+def tenant_vectors(tenant_id):
+    store = get_tenant_store(tenant_id)
+    store._ensure_loaded()
+    matrix = store._matrix()
+    if matrix is None:
+        raise SystemExit(f"No vectors stored for {tenant_id}")
+    live = sorted(store._row_by_id.values())
+    return np.asarray(matrix[live])
+
+
+def build_store(root, mode, vectors, batch=4096):
+    store = TenantVectorStore(f"report_{mode}", root_dir=root, dimension=vectors.shape[1], quantization=mode)
+    for start in range(0, len(vectors), batch):
+        ids = [str(i) for i in range(start, min(start + batch, len(vectors)))]
+        store.upsert(ids, vectors[start:start + batch], [{} for _ in ids])
+    return store
+
+
+def file_bytes(store):
+    return sum(
+        os.path.getsize(os.path.join(store.path, name))
+        for name in os.listdir(store.path) if not name.endswith(".jsonl") and name != "meta.json"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant", help="use this tenant's stored vectors instead of synthetic ones")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=None, help="override the per-mode default")
+    args = parser.parse_args()
+
+    vectors = tenant_vectors(args.tenant) if args.tenant else synthetic_vectors(args.count, get_embedding_provider().dimension)
+    rng = np.random.default_rng(1)
+    # Queries close to stored vectors, like a question about an indexed passage
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = vectors[picks] + 0.5 * rng.standard_normal((args.queries, vectors.shape[1])).astype(np.float32)
+
+    root = tempfile.mkdtemp(prefix="quant_report_")
+    try:
+        results, truth = {}, None
+        for mode in QUANTIZATION_MODES:
+            store = build_store(root, mode, vectors)
+            store.oversampling = args.oversampling
+            store.search(queries[0], args.k)  # warm the page cache / mappings
+
+            latencies, found = [], []
+            for query in queries:
+                started = time.perf_counter()
+                hits = store.search(query, args.k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found.append({hit.id for hit in hits})
+            if mode == "none":
+                truth = found
+
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+            code_bytes = file_bytes(store) - len(vectors) * vectors.shape[1] * 4
+            results[mode] = {
+                "recall": recall,
+                "p50": np.percentile(latencies, 50),
+                "p95": np.percentile(latencies, 95),
+                # What must stay resident for fast search (floats are read per candidate only)
+                "hot_mb": (code_bytes if mode != "none" else len(vectors) * vectors.shape[1] * 4) / 2**20,
+            }
+            store.unload()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'mode':<8}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'hot MB':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['recall']:>8.3f}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['hot_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,54 @@
-from src.qdrant_client import get_standalone_qdrant_client
-from src.config import QDRANT_COLLECTION_NAME
-from qdrant_client import models
-from src.config import VECTOR_SIZE
-
-def reset_collection():
-    print(f"CONNECTING TO QDRANT...")
-    client = get_standalone_qdrant_client()
-    
-    print(f"DELETING COLLECTION: {QDRANT_COLLECTION_NAME}")
-    client.delete_collection(collection_name=QDRANT_COLLECTION_NAME)
-    
-    print(f"RE-CREATING COLLECTION: {QDRANT_COLLECTION_NAME}")
-    client.recreate_collection(
-        collection_name=QDRANT_COLLECTION_NAME,
-        vectors_config=models.VectorParams(
-            size=VECTOR_SIZE, 
-            distance=models.Distance.COSINE
-        )
-    )
-    print("SUCCESS: Database has been wiped and reset.")
+# reset_db.py
+"""
+Wipe tenant collections so their documents can be indexed again, e.g. after
+switching EMBEDDING_PROVIDER / EMBEDDING_MODEL.
+
+    python reset_db.py tenantA tenantB   # just these tenants
+    python reset_db.py                   # every tenant found in the store
+
+Removes the tenants' vectors and keyword index, their document records and
+bulk ingestion checkpoints (so re-uploads are not skipped as unchanged). Conversation logs are kept.
+"""
+import os
+import shutil
+import sys
+
+from src.config import TENANT_IDS, VECTOR_STORE_DIR
+from src.database import SessionLocal, Document, IngestCheckpoint
+from src.qdrant_client import collection_manager, get_qdrant_client, use_disk_store
+from src.sparse_index import unload_sparse_index
+from src.vector_store import unload_tenant_store
+
+
+def reset_tenant(tenant_id):
+    if use_disk_store():
+        unload_tenant_store(tenant_id)
+        shutil.rmtree(os.path.join(VECTOR_STORE_DIR, tenant_id), ignore_errors=True)
+    else:
+        get_qdrant_client().delete_collection(collection_name=f"{tenant_id}_docs")
+    # The in-memory keyword index would otherwise keep matching deleted chunks
+    unload_sparse_index(tenant_id)
+    collection_manager.forget(tenant_id)
+
+    db = SessionLocal()
+    try:
+        removed = db.query(Document).filter(Document.tenant_id == tenant_id).delete()
+        db.query(IngestCheckpoint).filter(IngestCheckpoint.tenant_id == tenant_id).delete()
+        db.commit()
+    finally:
+        db.close()
+    print(f"RESET {tenant_id}: collection deleted, {removed} document records removed")
+
+
+def reset_collections(tenant_ids=None):
+    if not tenant_ids:
+        tenant_ids = list(TENANT_IDS)
+        if use_disk_store() and os.path.isdir(VECTOR_STORE_DIR):
+            tenant_ids += sorted(t for t in os.listdir(VECTOR_STORE_DIR) if t not in tenant_ids)
+    for tenant_id in tenant_ids:
+        reset_tenant(tenant_id)
+    print("SUCCESS: Collections have been wiped; re-index the documents.")
+
 
 if __name__ == "__main__":
-    reset_collection()
\ No newline at end of file
+    reset_collections(sys.argv[1:])
@@ -0,0 +1,210 @@
+# src/clients.py
+
+import logging
+import threading
+import weakref
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from langchain_openai import ChatOpenAI
+
+import src.config as config
+
+logger = logging.getLogger(__name__)
+
+# Retired clients may still be serving in-flight requests on other threads
+RETIRED_CLIENT_GRACE_SECONDS = 60
+
+
+# ------------------------------------------------------------
+# ✔ Connection reuse counters (fed by httpx response hooks)
+# ------------------------------------------------------------
+class ConnectionStats:
+    """
+    Counts requests and the distinct network connections that served them.
+    A request on a connection already seen is a reuse, i.e. no TCP/TLS
+    handshake was paid for it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = weakref.WeakSet()
+        self.requests = 0
+        self.new_connections = 0
+
+    def on_response(self, response):
+        self._record(response)
+
+    async def on_async_response(self, response):
+        self._record(response)
+
+    def _record(self, response):
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            if stream is None:
+                return
+            try:
+                if stream not in self._seen:
+                    self._seen.add(stream)
+                    self.new_connections += 1
+            except TypeError:
+                # Stream type that can't be weak-referenced; count as new
+                self.new_connections += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = self.requests - self.new_connections
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+            }
+
+
+# ------------------------------------------------------------
+# ✔ Pooled, keep-alive clients shared across requests/threads
+# ------------------------------------------------------------
+class ClientRegistry:
+    """
+    Builds the OpenAI / ChatOpenAI clients once and hands the same instances
+    to every caller. All of them share one keep-alive httpx pool (one sync,
+    one async), so the hot path does not pay connection setup per question.
+
+    The async pool belongs to the event loop that first uses it; serve the
+    async path from a single loop per process.
+
+    Settings are read from src.config on every call; if they change, a new
+    set of clients is built and the old ones are closed after a grace period.
+    """
+
+    def __init__(self):
+        # Re-entrant: the OpenAI/chat factories fetch the shared http client
+        self._lock = threading.RLock()
+        self._settings = None
+        self._clients = {}
+        self._overrides = {}
+        self.stats = ConnectionStats()
+
+    def _current_settings(self) -> tuple:
+        return (
+            config.OPENAI_API_KEY,
+            config.LLM_MODEL,
+            config.HTTP_POOL_SIZE,
+            config.HTTP_KEEPALIVE_SECONDS,
+            config.HTTP_TIMEOUT_SECONDS,
+            config.HTTP_CONNECT_TIMEOUT_SECONDS,
+        )
+
+    def override(self, name: str, client):
+        """Serve `client` for `name` instead of building one (None removes it)."""
+        with self._lock:
+            if client is None:
+                self._overrides.pop(name, None)
+            else:
+                self._overrides[name] = client
+
+    def _get(self, name: str, factory):
+        override = self._overrides.get(name)
+        if override is not None:
+            return override
+        settings = self._current_settings()
+        with self._lock:
+            if settings != self._settings:
+                if self._settings is not None:
+                    logger.info("Client settings changed; rebuilding HTTP clients")
+                    self._retire(self._clients)
+                self._settings = settings
+                self._clients = {}
+            client = self._clients.get(name)
+            if client is None:
+                client = factory()
+                self._clients[name] = client
+            return client
+
+    def _retire(self, clients: dict):
+        # Async clients need an awaited aclose() on their own loop; they are
+        # left to garbage collection once the last in-flight request drops them
+        closable = [c for c in clients.values() if isinstance(c, (httpx.Client, OpenAI))]
+        if not closable:
+            return
+        timer = threading.Timer(RETIRED_CLIENT_GRACE_SECONDS, lambda: [c.close() for c in closable])
+        timer.daemon = True
+        timer.start()
+
+    def _pool_options(self) -> dict:
+        return {
+            "limits": httpx.Limits(
+                max_connections=config.HTTP_POOL_SIZE,
+                max_keepalive_connections=config.HTTP_POOL_SIZE,
+                keepalive_expiry=config.HTTP_KEEPALIVE_SECONDS,
+            ),
+            "timeout": httpx.Timeout(config.HTTP_TIMEOUT_SECONDS, connect=config.HTTP_CONNECT_TIMEOUT_SECONDS),
+        }
+
+    def http_client(self) -> httpx.Client:
+        return self._get("http", lambda: httpx.Client(
+            event_hooks={"response": [self.stats.on_response]},
+            **self._pool_options(),
+        ))
+
+    def http_async_client(self) -> httpx.AsyncClient:
+        return self._get("http_async", lambda: httpx.AsyncClient(
+            event_hooks={"response": [self.stats.on_async_response]},
+            **self._pool_options(),
+        ))
+
+    def openai(self) -> OpenAI:
+        return self._get("openai", lambda: OpenAI(
+            api_key=config.OPENAI_API_KEY,
+            http_client=self.http_client(),
+        ))
+
+    def async_openai(self) -> AsyncOpenAI:
+        return self._get("async_openai", lambda: AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            http_client=self.http_async_client(),
+        ))
+
+    def chat_model(self) -> ChatOpenAI:
+        return self._get("chat", lambda: ChatOpenAI(
+            model=config.LLM_MODEL,
+            api_key=config.OPENAI_API_KEY,
+            temperature=0,
+            http_client=self.http_client(),
+            http_async_client=self.http_async_client(),
+        ))
+
+
+_registry = ClientRegistry()
+
+
+def get_openai_client() -> OpenAI:
+    """Shared OpenAI SDK client (embeddings)."""
+    return _registry.openai()
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Shared async OpenAI SDK client (embeddings on the async path)."""
+    return _registry.async_openai()
+
+
+def get_chat_model() -> ChatOpenAI:
+    """Shared chat model; use .invoke()/.stream() or .ainvoke()/.astream()."""
+    return _registry.chat_model()
+
+
+def override_clients(openai=None, async_openai=None, chat_model=None):
+    """
+    Swap in stand-in clients (e.g. offline fakes for benchmarks). Each
+    argument replaces the matching shared client; None restores the default.
+    """
+    _registry.override("openai", openai)
+    _registry.override("async_openai", async_openai)
+    _registry.override("chat", chat_model)
+
+
+def connection_stats() -> dict:
+    """How many requests reused an existing connection vs opened a new one."""
+    return _registry.stats.snapshot()
@@ -0,0 +1,190 @@
+# src/collection_manager.py
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from src.config import COLLECTION_IDLE_TTL_SECONDS
+from src.vector_store import get_tenant_store, quantization_for
+from src.sparse_index import get_sparse_index
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CollectionState:
+    tenant_id: str
+    name: str
+    quantization: str
+    last_used: float
+    # The Qdrant collection was checked/created (store() and sparse_index() only register the tenant)
+    ensured: bool = False
+
+
+# ------------------------------------------------------------
+# ✔ Tenant -> collection registry, created/opened lazily
+# ------------------------------------------------------------
+class CollectionManager:
+    """
+    Keeps an in-process registry of every tenant collection seen so far, so
+    requests never list collections to find their own: the first request
+    for a tenant checks (or creates) its collection once, later ones are a
+    dict lookup.
+
+    Disk-backed tenants that have not been used for `idle_ttl` seconds have
+    their vectors, payloads and keyword index dropped from memory by a
+    background thread; they are re-opened lazily on the next request.
+
+    `client_fn()` returns the Qdrant client and `create_fn(client, name,
+    vector_size, quantization)` creates a collection (memory mode only;
+    vector_size None means the embedding provider's size).
+    """
+
+    def __init__(self, client_fn, create_fn, disk_mode_fn, idle_ttl: float = COLLECTION_IDLE_TTL_SECONDS):
+        self.client_fn = client_fn
+        self.create_fn = create_fn
+        self.disk_mode_fn = disk_mode_fn
+        self.idle_ttl = idle_ttl
+        self._states = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.unloads = 0
+
+    # --------------------------------------------------------
+    # Lookup
+    # --------------------------------------------------------
+    def _touch(self, tenant_id: str, name: str = None, quantization: str = None) -> CollectionState:
+        now = time.monotonic()
+        state = self._states.get(tenant_id)
+        if state is None:
+            with self._lock:
+                state = self._states.setdefault(tenant_id, CollectionState(
+                    tenant_id=tenant_id,
+                    name=name or f"{tenant_id}_docs",
+                    quantization=quantization or quantization_for(tenant_id),
+                    last_used=now,
+                ))
+            self._ensure_reaper()
+        state.last_used = now
+        return state
+
+    def collection(self, tenant_id: str, vector_size: int = None, quantization: str = None) -> str:
+        """Name of the tenant's Qdrant collection, created on first use."""
+        state = self._states.get(tenant_id)
+        if state is not None and state.ensured:
+            state.last_used = time.monotonic()
+            return state.name
+
+        state = self._touch(tenant_id, quantization=quantization)
+        with self._lock:
+            if not state.ensured:
+                client = self.client_fn()
+                if not client.collection_exists(state.name):
+                    self.create_fn(client, state.name, vector_size, state.quantization)
+                state.ensured = True
+        return state.name
+
+    def quantization(self, tenant_id: str) -> str:
+        """Quantization the tenant's collection is registered (and was created) with."""
+        return self._touch(tenant_id).quantization
+
+    def store(self, tenant_id: str):
+        """The tenant's disk vector store (its files are read on first use)."""
+        self._touch(tenant_id)
+        return get_tenant_store(tenant_id)
+
+    def sparse_index(self, tenant_id: str, persist: bool = True):
+        self._touch(tenant_id)
+        return get_sparse_index(tenant_id, persist=persist)
+
+    def forget(self, tenant_id: str):
+        """Drop the registry entry (e.g. after the collection was deleted)."""
+        with self._lock:
+            self._states.pop(tenant_id, None)
+
+    # --------------------------------------------------------
+    # Idle unloading
+    # --------------------------------------------------------
+    def _ensure_reaper(self):
+        if self.idle_ttl <= 0 or self._reaper is not None:
+            return
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_forever, name="collection-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap_forever(self):
+        interval = max(1.0, min(60.0, self.idle_ttl / 4))
+        while True:
+            time.sleep(interval)
+            try:
+                self.unload_idle()
+            except Exception:
+                logger.exception("Unloading idle collections failed")
+
+    def unload_idle(self, now: float = None) -> list:
+        """Unload disk-backed tenants idle for longer than idle_ttl. Returns their ids."""
+        if not self.disk_mode_fn():
+            # In-memory Qdrant collections cannot be re-opened once dropped
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [s.tenant_id for s in self._states.values() if now - s.last_used > self.idle_ttl]
+
+        unloaded = []
+        for tenant_id in idle:
+            store = get_tenant_store(tenant_id)
+            if store.loaded:
+                store.unload()
+                get_sparse_index(tenant_id).unload()
+                unloaded.append(tenant_id)
+        if unloaded:
+            self.unloads += len(unloaded)
+            logger.info(f"Unloaded {len(unloaded)} idle tenant collections: {', '.join(unloaded)}")
+        return unloaded
+
+    # --------------------------------------------------------
+    # Inspection
+    # --------------------------------------------------------
+    def stats(self, tenant_ids=None) -> list:
+        """
+        Per-tenant vector counts and memory footprint. `tenant_ids` adds
+        tenants not used yet in this process (e.g. from config or disk).
+        """
+        now = time.monotonic()
+        with self._lock:
+            states = dict(self._states)
+        tenants = list(states) + [t for t in (tenant_ids or []) if t not in states]
+
+        rows = []
+        for tenant_id in tenants:
+            state = states.get(tenant_id)
+            row = {
+                "tenant_id": tenant_id,
+                "collection": state.name if state else f"{tenant_id}_docs",
+                "idle_seconds": round(now - state.last_used) if state else None,
+            }
+            if self.disk_mode_fn():
+                row.update(get_tenant_store(tenant_id).memory_stats())
+                row["keyword_index"] = get_sparse_index(tenant_id).stats()
+            else:
+                row.update(self._qdrant_stats(row["collection"], state))
+            rows.append(row)
+        return rows
+
+    def _qdrant_stats(self, name: str, state) -> dict:
+        client = self.client_fn()
+        if not client.collection_exists(name):
+            return {"loaded": False, "vectors": 0, "quantization": None, "embedding_model": None, "dimension": None}
+        info = client.get_collection(name)
+        vectors = info.points_count or 0
+        size = info.config.params.vectors.size
+        return {
+            "loaded": True,
+            "vectors": vectors,
+            "quantization": state.quantization if state else None,
+            "embedding_model": (info.config.metadata or {}).get("embedding_model"),
+            "dimension": size,
+            "search_bytes": vectors * size * 4,
+        }
@@ -4,15 +4,130 @@ from dotenv import load_dotenv
 load_dotenv()
 
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
-EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Embedding provider (see src/embedding_providers.py): "openai" calls the API with
+# EMBEDDING_MODEL; "local" runs LOCAL_EMBEDDING_MODEL on the CPU (ONNX via fastembed,
+# no network). The vector size comes from the model; each tenant collection records
+# the model that built it.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))  # shortened text-embedding-3 vectors (0 = full size)
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))  # ONNX Runtime threads (0 = all cores)
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_EMBEDDING_CACHE_DIR = os.getenv("LOCAL_EMBEDDING_CACHE_DIR", os.path.join("data", "models"))
+
+# Shared keep-alive HTTP pool for the OpenAI clients (see src/clients.py)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "multi_tenant_knowledge")
-VECTOR_SIZE = 1536
+
+# On-disk embedding cache keyed by (model, sha256(text)), LRU-bounded
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("data", "embedding_cache.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+# In-process LRU of question embeddings (0 = off): a repeated question is not embedded again
+QUERY_EMBEDDING_LRU_SIZE = int(os.getenv("QUERY_EMBEDDING_LRU_SIZE", "2048"))
+
+# Identical questions (same tenant, same normalised text) asked while one is being
+# answered wait for that answer instead of running the pipeline again
+REQUEST_COALESCING_ENABLED = os.getenv("REQUEST_COALESCING_ENABLED", "true").lower() == "true"
+
+# Embedding requests: packed by token count, sent concurrently, retried on rate limits
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "512"))
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+EMBEDDING_RETRY_BASE_DELAY = float(os.getenv("EMBEDDING_RETRY_BASE_DELAY", "1.0"))
+
+# "disk": per-tenant memory-mapped vector files that survive restarts
+# "memory": ephemeral in-process Qdrant (everything is lost on restart)
+VECTOR_STORE_MODE = os.getenv("VECTOR_STORE_MODE", "disk")
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join("data", "vector_store"))
+
+# Quantized vector codes for new tenant collections: "none", "int8" or "binary".
+# Search scans the compact codes, then rescores the best candidates with the
+# float vectors. Per-tenant overrides: VECTOR_QUANTIZATION_TENANTS="tenantA:int8,tenantB:binary"
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+VECTOR_QUANTIZATION_TENANTS = dict(
+    item.split(":", 1) for item in os.getenv("VECTOR_QUANTIZATION_TENANTS", "").split(",") if ":" in item
+)
+
+# Disk-backed tenants unused for this long are dropped from memory (0 = never)
+COLLECTION_IDLE_TTL_SECONDS = float(os.getenv("COLLECTION_IDLE_TTL_SECONDS", "1800"))
+
+# Retrieval: dense + BM25 candidates fused with reciprocal rank fusion
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))  # per retriever, before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Reranking: over-fetch RERANK_CANDIDATES chunks, rescore them on the CPU and keep the
+# best RERANK_TOP_N for the prompt. RERANKER: "cross-encoder" (local ONNX model via
+# fastembed, "lexical" when not installed), "lexical" (BM25 over the candidates blended
+# with the retrieval rank), "embedding" (cosine to the question) or "none".
+RERANKER = os.getenv("RERANKER", "lexical")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "Xenova/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "4"))
+
+# Time (ms) retrieval + reranking may take per question; reranking is skipped when its
+# expected cost no longer fits (0 = never rerank). Per-tenant: RERANK_BUDGET_MS_TENANTS="tenantA:500"
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "250"))
+RERANK_BUDGET_MS_TENANTS = {
+    tenant: float(ms) for tenant, ms in (
+        item.split(":", 1) for item in os.getenv("RERANK_BUDGET_MS_TENANTS", "").split(",") if ":" in item
+    )
+}
+
+# Max tokens of retrieved context put into the system prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+# Multi-turn chat: follow-up questions are rewritten into standalone ones for retrieval;
+# the newest turns (up to HISTORY_TOKEN_BUDGET tokens) go into the prompt and older ones
+# are folded, in the background, into a running summary of at most HISTORY_SUMMARY_MAX_TOKENS
+QUERY_REWRITE_ENABLED = os.getenv("QUERY_REWRITE_ENABLED", "true").lower() == "true"
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+
+# Semantic answer cache: reuse an answer when a new question is this close (cosine)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))  # per tenant
+
+# Admin-validated answers are served directly (no retrieval / LLM) when the
+# question matches exactly or its embedding is at least this similar (cosine)
+VALIDATED_ANSWERS_ENABLED = os.getenv("VALIDATED_ANSWERS_ENABLED", "true").lower() == "true"
+VALIDATED_ANSWER_THRESHOLD = float(os.getenv("VALIDATED_ANSWER_THRESHOLD", "0.93"))
 
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 
+# Background ingestion: parsing in processes, embedding/upsert in threads
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(os.cpu_count() or 2)))
+INGEST_INDEX_WORKERS = int(os.getenv("INGEST_INDEX_WORKERS", "4"))
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "1024"))
+# Every file is parsed page by page and embedded in micro-batches of
+# INGEST_STREAM_BATCH_SIZE chunks, so memory does not grow with file size
+INGEST_STREAM_BATCH_SIZE = int(os.getenv("INGEST_STREAM_BATCH_SIZE", "256"))
+
+# CSV / XLSX rows are packed into chunks of about this many characters with the
+# column header repeated in each, reading TABLE_READ_ROWS rows at a time
+TABLE_CHUNK_CHARS = int(os.getenv("TABLE_CHUNK_CHARS", str(CHUNK_SIZE)))
+TABLE_READ_ROWS = int(os.getenv("TABLE_READ_ROWS", "10000"))
+
+# Conversation logs are queued and written by a background thread in batches
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", "0.5"))
+
 TENANT_IDS = ["tenantA", "tenantB", "tenantC"]
 ADMIN_ID = "admin"
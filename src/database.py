@@ -77,11 +77,19 @@
 
 # src/database.py
 
+import asyncio
+import atexit
 import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, create_engine, event, func, insert, inspect, or_, text, tuple_
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
-from src.models import Base, Tenant, Document, ConversationLog
+from src.models import Base, Tenant, Document, IngestCheckpoint, ConversationLog
+from src.config import LOG_QUEUE_MAX_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -89,7 +97,7 @@ logger = logging.getLogger(__name__)
 # 100% STREAMLIT-SAFE DATABASE LOCATION
 # -------------------------------------------------------------
 # /tmp is ALWAYS writable on Streamlit Cloud
-DATABASE_URL = "sqlite:////tmp/app.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:////tmp/app.db")
 
 
 engine = create_engine(
@@ -98,6 +106,25 @@ engine = create_engine(
     echo=False
 )
 
+# WAL lets the admin panel read while the log writer commits, and with WAL
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+    "cache_size": -20000,  # KiB
+}
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
 # Create a Session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -106,6 +133,112 @@ SessionLocal = sessionmaker(
 )
 
 
+# -------------------------------------------------------------
+# LIGHTWEIGHT SCHEMA MIGRATIONS
+# -------------------------------------------------------------
+# create_all() only creates missing tables, so columns added to
+# existing tables after the first deploy are listed here.
+ADDED_COLUMNS = {
+    "documents": {"chunk_manifest": "TEXT"},
+    "conversation_logs": {"standalone_question": "TEXT"},
+}
+
+
+def _migrate_schema():
+    """
+    Add any missing columns from ADDED_COLUMNS to existing tables, and any
+    indexes declared on the models after the table was first created.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    logger.info(f"Added column {table}.{name}")
+
+        for table in Base.metadata.sorted_tables:
+            existing = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    logger.info(f"Created index {index.name}")
+
+
+# -------------------------------------------------------------
+# FULL-TEXT INDEX OVER CONVERSATION LOGS (SQLite FTS5)
+# -------------------------------------------------------------
+# External-content table: the text lives only in conversation_logs, FTS5
+# keeps the inverted index. Triggers keep it in step with every write.
+LOGS_FTS_TABLE = "conversation_logs_fts"
+LOGS_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {LOGS_FTS_TABLE} USING fts5(
+        question, answer,
+        content='conversation_logs', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_logs_fts_ai AFTER INSERT ON conversation_logs BEGIN
+        INSERT INTO {LOGS_FTS_TABLE}(rowid, question, answer) VALUES (new.id, new.question, new.answer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_logs_fts_ad AFTER DELETE ON conversation_logs BEGIN
+        INSERT INTO {LOGS_FTS_TABLE}({LOGS_FTS_TABLE}, rowid, question, answer)
+        VALUES ('delete', old.id, old.question, old.answer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_logs_fts_au AFTER UPDATE OF question, answer ON conversation_logs BEGIN
+        INSERT INTO {LOGS_FTS_TABLE}({LOGS_FTS_TABLE}, rowid, question, answer)
+        VALUES ('delete', old.id, old.question, old.answer);
+        INSERT INTO {LOGS_FTS_TABLE}(rowid, question, answer) VALUES (new.id, new.question, new.answer);
+    END""",
+]
+
+_logs_fts_enabled = None
+
+
+def _create_logs_fts():
+    """Create the FTS table + triggers; index existing logs the first time."""
+    global _logs_fts_enabled
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": LOGS_FTS_TABLE},
+            ).first()
+            for statement in LOGS_FTS_DDL:
+                conn.execute(text(statement))
+            if not existed:
+                conn.execute(text(f"INSERT INTO {LOGS_FTS_TABLE}({LOGS_FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info("Built full-text index over conversation logs")
+        _logs_fts_enabled = True
+    except OperationalError as e:
+        # SQLite builds without FTS5: log search falls back to LIKE scans
+        logger.warning(f"Full-text log search unavailable: {e}")
+        _logs_fts_enabled = False
+
+
+def logs_fts_enabled() -> bool:
+    global _logs_fts_enabled
+    if _logs_fts_enabled is None:
+        with engine.connect() as conn:
+            _logs_fts_enabled = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": LOGS_FTS_TABLE},
+            ).first() is not None
+    return _logs_fts_enabled
+
+
+def fts_query(user_text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match, the last
+    one as a prefix (search-as-you-type). Quoting disables FTS operators.
+    """
+    words = [w.replace('"', '""') for w in user_text.split()]
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
 # -------------------------------------------------------------
 # INITIALIZE DATABASE & SEED TENANTS
 # -------------------------------------------------------------
@@ -113,6 +246,8 @@ def init_db():
     """Create tables and seed initial tenant data."""
     try:
         Base.metadata.create_all(bind=engine)
+        _migrate_schema()
+        _create_logs_fts()
         logger.info("DB tables created successfully.")
     except Exception as e:
         logger.exception(f"DB table creation failed: {e}")
@@ -139,24 +274,257 @@ def init_db():
 
 
 # -------------------------------------------------------------
-# LOG CONVERSATIONS
+# LOG CONVERSATIONS (write-behind)
 # -------------------------------------------------------------
-def log_conversation(tenant_id: str, question: str, answer: str, citations: str):
-    """Insert a chat log entry."""
+class ConversationLogWriter:
+    """
+    Queues conversation logs and inserts them from one background thread,
+    many rows per transaction, so answering never waits on a commit.
+
+    The queue is bounded; when it is full the caller waits up to
+    `enqueue_timeout` and then writes the row itself rather than dropping it.
+    Anything still queued at interpreter exit is flushed by stop().
+    """
+
+    def __init__(self, max_size: int = LOG_QUEUE_MAX_SIZE, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL_SECONDS, enqueue_timeout: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self._stats_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.overflow_writes = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, row: dict, block: bool = True) -> bool:
+        """Queue a row. Returns False if the queue stayed full (row not queued)."""
+        if self._stopping:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(row, block=block, timeout=self.enqueue_timeout if block else None)
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping:
+                    return
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, rows: list):
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(ConversationLog), rows)
+            ok = True
+        except Exception as e:
+            ok = False
+            logger.exception(f"Conversation log batch of {len(rows)} failed: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._stats_lock:
+            if ok:
+                self.written += len(rows)
+            else:
+                self.failed += len(rows)
+            self.batches += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def write_now(self, row: dict):
+        """Synchronous single-row insert (queue overflow / after shutdown)."""
+        with self._stats_lock:
+            self.overflow_writes += 1
+        self._write([row])
+
+    def flush(self, timeout: float = None):
+        """Block until every row queued so far has been written."""
+        if self._thread is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what is queued and stop the writer thread."""
+        self._stopping = True
+        if self._thread is not None:
+            self.flush(timeout)
+            self._thread.join(timeout=self.flush_interval * 2)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "written": self.written,
+                "failed": self.failed,
+                "overflow_writes": self.overflow_writes,
+                "batches": self.batches,
+                "avg_rows_per_batch": (self.written + self.failed) / self.batches if self.batches else 0.0,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else 0.0,
+                "max_flush_ms": round(self.max_flush_ms, 2),
+            }
+
+
+log_writer = ConversationLogWriter()
+atexit.register(log_writer.stop)
+
+
+def _log_row(tenant_id: str, question: str, answer: str, citations: str, standalone_question: str = None) -> dict:
+    return {
+        "tenant_id": tenant_id,
+        "question": question,
+        "standalone_question": standalone_question,
+        "answer": answer,
+        "citations": citations,
+        "timestamp": datetime.utcnow(),
+        "is_validated": 0,
+    }
+
+
+def log_conversation(tenant_id: str, question: str, answer: str, citations: str, standalone_question: str = None):
+    """
+    Queue a chat log entry; the background writer inserts it.
+    `standalone_question` is the follow-up as rewritten for the search.
+    """
+    row = _log_row(tenant_id, question, answer, citations, standalone_question)
+    if not log_writer.submit(row):
+        log_writer.write_now(row)
+
+
+# Strong references so pending writes are not garbage-collected mid-flight
+_pending_log_writes = set()
+
+
+def log_conversation_nowait(tenant_id: str, question: str, answer: str, citations: str,
+                            standalone_question: str = None):
+    """
+    log_conversation for code running on an event loop: never blocks the
+    loop, even when the writer queue is full (the overflow write then runs
+    in the loop's default executor).
+    """
+    row = _log_row(tenant_id, question, answer, citations, standalone_question)
+    if log_writer.submit(row, block=False):
+        return
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, log_writer.write_now, row)
+    _pending_log_writes.add(future)
+    future.add_done_callback(_pending_log_writes.discard)
+
+
+def log_writer_stats() -> dict:
+    """Queue depth and flush latency of the background log writer."""
+    return log_writer.stats()
+
+
+# -------------------------------------------------------------
+# ADMIN VALIDATION / CORRECTION OF ANSWERS
+# -------------------------------------------------------------
+def _validated_entry(conv: ConversationLog) -> dict:
+    return {
+        "id": conv.id,
+        "tenant_id": conv.tenant_id,
+        "question": conv.question,
+        # What the answer was looked up by: a validated follow-up matches
+        # its rewritten, self-contained form, not the raw "and for X?"
+        "lookup_question": conv.standalone_question or conv.question,
+        "answer": conv.answer,
+        "citations": conv.citations,
+        "timestamp": conv.timestamp,
+    }
+
+
+def validate_answer(log_id: int, corrected_answer: str = None):
+    """
+    Mark a logged answer as validated, optionally replacing it with the
+    admin's correction. Returns the validated entry, or None if not found.
+    """
     db = SessionLocal()
     try:
-        entry = ConversationLog(
-            tenant_id=tenant_id,
-            question=question,
-            answer=answer,
-            citations=citations,
-            timestamp=datetime.utcnow()
-        )
-        db.add(entry)
+        conv = db.get(ConversationLog, log_id)
+        if conv is None:
+            return None
+        if corrected_answer:
+            conv.answer = corrected_answer
+        conv.is_validated = 1
+        db.commit()
+        return _validated_entry(conv)
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Validating log {log_id} failed: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def unvalidate_answer(log_id: int):
+    """Clear the validated flag. Returns the entry (for its tenant), or None."""
+    db = SessionLocal()
+    try:
+        conv = db.get(ConversationLog, log_id)
+        if conv is None:
+            return None
+        conv.is_validated = 0
         db.commit()
+        return _validated_entry(conv)
     except Exception as e:
         db.rollback()
-        logger.exception(f"Conversation log failed: {e}")
+        logger.exception(f"Unvalidating log {log_id} failed: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def get_validated_answers(tenant_id: str) -> list:
+    """Every validated Q&A pair for the tenant, oldest first."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ConversationLog)
+            .filter(ConversationLog.is_validated == 1, ConversationLog.tenant_id == tenant_id)
+            .order_by(ConversationLog.timestamp, ConversationLog.id)
+            .all()
+        )
+        return [_validated_entry(conv) for conv in rows]
+    except Exception as e:
+        logger.exception(f"Failed to fetch validated answers: {e}")
+        return []
     finally:
         db.close()
 
@@ -191,3 +559,178 @@ def get_all_logs():
         return []
     finally:
         db.close()
+
+
+# -------------------------------------------------------------
+# PAGINATED / FILTERED LOG QUERIES FOR ADMIN PANEL
+# -------------------------------------------------------------
+def _log_filters(tenant_id=None, start=None, end=None, validated=None, text_query=None) -> list:
+    """SQL conditions for the admin log filters (None = not filtered)."""
+    conditions = []
+    if tenant_id:
+        conditions.append(ConversationLog.tenant_id == tenant_id)
+    if start is not None:
+        conditions.append(ConversationLog.timestamp >= start)
+    if end is not None:
+        conditions.append(ConversationLog.timestamp < end)
+    if validated is not None:
+        conditions.append(ConversationLog.is_validated == int(validated))
+    if text_query:
+        match = fts_query(text_query) if logs_fts_enabled() else ""
+        if match:
+            conditions.append(ConversationLog.id.in_(
+                text(f"SELECT rowid FROM {LOGS_FTS_TABLE} WHERE {LOGS_FTS_TABLE} MATCH :match")
+                .bindparams(match=match)
+            ))
+        else:
+            pattern = f"%{text_query}%"
+            conditions.append(or_(ConversationLog.question.like(pattern), ConversationLog.answer.like(pattern)))
+    return conditions
+
+
+def get_logs_page(page_size: int = 50, cursor=None, **filters):
+    """
+    One page of logs, newest first, matching `filters` (see _log_filters).
+
+    Keyset pagination: `cursor` is the (timestamp, id) returned for the
+    previous page, so each page is an index range scan no matter how deep.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(ConversationLog, Tenant.name)
+            .join(Tenant, Tenant.id == ConversationLog.tenant_id)
+            .filter(*_log_filters(**filters))
+        )
+        if cursor is not None:
+            query = query.filter(tuple_(ConversationLog.timestamp, ConversationLog.id) < tuple_(*cursor))
+
+        rows = (
+            query.order_by(ConversationLog.timestamp.desc(), ConversationLog.id.desc())
+            .limit(page_size + 1)
+            .all()
+        )
+
+        page = [
+            {
+                "id": conv.id,
+                "tenant_name": tenant_name,
+                "question": conv.question,
+                "standalone_question": conv.standalone_question,
+                "answer": conv.answer,
+                "citations": conv.citations,
+                "is_validated": bool(conv.is_validated),
+                "timestamp": conv.timestamp,
+            }
+            for conv, tenant_name in rows[:page_size]
+        ]
+        next_cursor = None
+        if len(rows) > page_size:
+            next_cursor = (page[-1]["timestamp"], page[-1]["id"])
+        return page, next_cursor
+    except Exception as e:
+        logger.exception(f"Failed to fetch logs page: {e}")
+        return [], None
+    finally:
+        db.close()
+
+
+def get_log_stats(**filters) -> dict:
+    """Totals, per-tenant and per-day counts for the filtered logs, computed in SQL."""
+    conditions = _log_filters(**filters)
+    db = SessionLocal()
+    try:
+        total, validated = (
+            db.query(func.count(ConversationLog.id), func.coalesce(func.sum(ConversationLog.is_validated), 0))
+            .filter(*conditions)
+            .one()
+        )
+        per_tenant = (
+            db.query(ConversationLog.tenant_id, func.count(ConversationLog.id))
+            .filter(*conditions)
+            .group_by(ConversationLog.tenant_id)
+            .all()
+        )
+        day = func.date(ConversationLog.timestamp)
+        per_day = (
+            db.query(day, func.count(ConversationLog.id))
+            .filter(*conditions)
+            .group_by(day)
+            .order_by(day)
+            .all()
+        )
+        return {
+            "total": total,
+            "validated": validated,
+            "per_tenant": dict(per_tenant),
+            "per_day": [{"day": d, "count": c} for d, c in per_day],
+        }
+    except Exception as e:
+        logger.exception(f"Failed to compute log stats: {e}")
+        return {"total": 0, "validated": 0, "per_tenant": {}, "per_day": []}
+    finally:
+        db.close()
+
+
+# -------------------------------------------------------------
+# RANKED FULL-TEXT SEARCH FOR ADMIN PANEL
+# -------------------------------------------------------------
+# Question matches count double when ranking (bm25 column weights)
+FTS_QUESTION_WEIGHT = 2.0
+FTS_ANSWER_WEIGHT = 1.0
+
+
+def search_logs(query: str, tenant_id: str = None, limit: int = 20, highlight=("**", "**")) -> list:
+    """
+    Best matching logs for `query`, with snippets of the question and the
+    answer where matched words are wrapped in `highlight` (markdown bold).
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    if not logs_fts_enabled():
+        return _search_logs_like(query, tenant_id, limit)
+
+    opening, closing = highlight
+    sql = f"""
+        SELECT l.id, t.name, l.tenant_id, l.timestamp, l.is_validated,
+               snippet({LOGS_FTS_TABLE}, 0, :open, :close, '…', 16) AS question_snippet,
+               snippet({LOGS_FTS_TABLE}, 1, :open, :close, '…', 24) AS answer_snippet,
+               bm25({LOGS_FTS_TABLE}, {FTS_QUESTION_WEIGHT}, {FTS_ANSWER_WEIGHT}) AS rank
+        FROM {LOGS_FTS_TABLE}
+        JOIN conversation_logs l ON l.id = {LOGS_FTS_TABLE}.rowid
+        JOIN tenants t ON t.id = l.tenant_id
+        WHERE {LOGS_FTS_TABLE} MATCH :match
+          AND (:tenant_id IS NULL OR l.tenant_id = :tenant_id)
+        ORDER BY rank
+        LIMIT :limit
+    """
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(sql).columns(timestamp=DateTime), {
+                "open": opening, "close": closing, "match": match,
+                "tenant_id": tenant_id, "limit": limit,
+            }).all()
+    except Exception as e:
+        logger.exception(f"Log search failed: {e}")
+        return []
+
+    return [
+        {
+            "id": row.id,
+            "tenant_name": row.name,
+            "timestamp": row.timestamp,
+            "is_validated": bool(row.is_validated),
+            "question": row.question_snippet,
+            "answer": row.answer_snippet,
+            # bm25() is lower-is-better; flip it so higher means more relevant
+            "score": -row.rank,
+        }
+        for row in rows
+    ]
+
+
+def _search_logs_like(query: str, tenant_id: str, limit: int) -> list:
+    page, _ = get_logs_page(page_size=limit, tenant_id=tenant_id, text_query=query)
+    return [dict(log, score=0.0) for log in page]
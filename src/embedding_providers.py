@@ -0,0 +1,178 @@
+# src/embedding_providers.py
+
+import asyncio
+import logging
+import threading
+
+import src.config as config
+from src.clients import get_openai_client, get_async_openai_client
+from src.ingestion.embedding_scheduler import EmbeddingScheduler
+
+logger = logging.getLogger(__name__)
+
+# Full output size of the OpenAI embedding models
+OPENAI_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+# ------------------------------------------------------------
+# ✔ Provider interface
+# ------------------------------------------------------------
+class EmbeddingProvider:
+    """
+    Turns texts into vectors.
+
+    `model_id` names the model (and output size). The embedding cache is
+    keyed by it and every tenant collection records it, so vectors from
+    different models are never mixed. `dimension` is the vector size.
+    """
+
+    model_id = None
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def embed(self, texts: list[str]) -> list:
+        raise NotImplementedError
+
+    async def aembed(self, texts: list[str]) -> list:
+        return await asyncio.to_thread(self.embed, texts)
+
+    def describe(self) -> dict:
+        return {"provider": type(self).__name__, "model": self.model_id, "dimension": self.dimension}
+
+
+# ------------------------------------------------------------
+# ✔ OpenAI API (token-packed, concurrent, retried requests)
+# ------------------------------------------------------------
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: str = config.EMBEDDING_MODEL, dimensions: int = config.EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.dimensions = dimensions or None
+        # Full-size vectors keep the plain model name (and existing cache entries)
+        self.model_id = f"{model}@{dimensions}" if dimensions else model
+        self._dimension = self.dimensions or OPENAI_DIMENSIONS.get(model)
+        self.scheduler = EmbeddingScheduler(self._embed_batch, aembed_batch_fn=self._aembed_batch, model=model)
+
+    def _request_options(self) -> dict:
+        options = {"model": self.model}
+        if self.dimensions:
+            options["dimensions"] = self.dimensions
+        return options
+
+    def _embed_batch(self, texts):
+        """One embeddings request; the scheduler keeps each call under the API limits."""
+        resp = get_openai_client().embeddings.create(input=texts, **self._request_options())
+        return [d.embedding for d in resp.data]
+
+    async def _aembed_batch(self, texts):
+        resp = await get_async_openai_client().embeddings.create(input=texts, **self._request_options())
+        return [d.embedding for d in resp.data]
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            # Unknown model: ask it once
+            self._dimension = len(self._embed_batch(["dimension probe"])[0])
+        return self._dimension
+
+    def embed(self, texts: list[str]) -> list:
+        return self.scheduler.embed(texts)
+
+    async def aembed(self, texts: list[str]) -> list:
+        return await self.scheduler.aembed(texts)
+
+
+# ------------------------------------------------------------
+# ✔ Local CPU model (ONNX Runtime via fastembed, no network)
+# ------------------------------------------------------------
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Runs a small embedding model in-process. The model is loaded (and
+    downloaded into `cache_dir` the first time) on first use. Each call is
+    split into batches of `batch_size` and every batch is spread over
+    `threads` cores by ONNX Runtime, so calls are serialised rather than
+    competing for the same cores.
+    """
+
+    def __init__(self, model: str = config.LOCAL_EMBEDDING_MODEL, threads: int = config.LOCAL_EMBEDDING_THREADS,
+                 batch_size: int = config.LOCAL_EMBEDDING_BATCH_SIZE, cache_dir: str = config.LOCAL_EMBEDDING_CACHE_DIR):
+        self.model = model
+        self.model_id = f"local:{model}"
+        self.threads = threads or None
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self._dimension = None
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _text_embedding_class():
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError("EMBEDDING_PROVIDER=local needs the fastembed package: pip install fastembed") from e
+        return TextEmbedding
+
+    def _model(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    logger.info(f"Loading local embedding model {self.model} ({self.threads or 'all'} threads)")
+                    self._engine = self._text_embedding_class()(
+                        model_name=self.model, cache_dir=self.cache_dir, threads=self.threads
+                    )
+        return self._engine
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            # Read from the model registry so the model itself need not be loaded
+            for info in self._text_embedding_class().list_supported_models():
+                if info.get("model", "").lower() == self.model.lower():
+                    self._dimension = int(info["dim"])
+                    break
+            else:
+                self._dimension = len(self.embed(["dimension probe"])[0])
+        return self._dimension
+
+    def embed(self, texts: list[str]) -> list:
+        if not texts:
+            return []
+        engine = self._model()
+        with self._lock:
+            return [vector.tolist() for vector in engine.embed(list(texts), batch_size=self.batch_size)]
+
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalEmbeddingProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """The provider selected by EMBEDDING_PROVIDER (created on first use)."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            try:
+                provider_class = PROVIDERS[config.EMBEDDING_PROVIDER]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown EMBEDDING_PROVIDER {config.EMBEDDING_PROVIDER!r}; expected one of {sorted(PROVIDERS)}"
+                ) from None
+            _provider = provider_class()
+            logger.info(f"Embedding provider: {_provider.model_id}")
+        return _provider
+
+
+def embedding_model_id() -> str:
+    """Model id recorded on new tenant collections (no model is loaded)."""
+    return get_embedding_provider().model_id
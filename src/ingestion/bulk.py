@@ -0,0 +1,229 @@
+# src/ingestion/bulk.py
+
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from src.config import INGEST_PARSE_WORKERS, INGEST_INDEX_WORKERS
+from src.database import SessionLocal, Tenant, IngestCheckpoint
+from src.ingestion.doc_loader import SUPPORTED_EXTENSIONS
+from src.ingestion.job_queue import IngestionQueue, FAILED
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DONE, CHECKPOINT_FAILED = "done", "failed"
+# Files are hashed in blocks of this size
+HASH_BLOCK_BYTES = 1024 * 1024
+# Files submitted ahead of the finished ones, per worker: keeps the pools busy
+# without holding thousands of parsed-but-unindexed files in memory
+IN_FLIGHT_PER_WORKER = 2
+POLL_SECONDS = 0.05
+
+
+@dataclass
+class SourceFile:
+    tenant_id: str
+    path: str
+    name: str  # relative to the tenant directory, "/"-separated
+    mtime: float
+    size: int
+    content_hash: str = None
+
+
+def iter_source_files(tenant_id: str, directory: str):
+    """Supported files under `directory`, in a stable order (hidden files and folders skipped)."""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logger.warning(f"Skipping {path}: {e}")
+                continue
+            relative = Path(os.path.relpath(path, directory)).as_posix()
+            yield SourceFile(tenant_id, path, relative, stat.st_mtime, stat.st_size)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------
+# ✔ Per-file checkpoints (SQLite)
+# ------------------------------------------------------------
+def load_checkpoints(tenant_id: str) -> dict:
+    """{relative path: (mtime, size, content_hash, status)} for the tenant."""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            IngestCheckpoint.path, IngestCheckpoint.mtime, IngestCheckpoint.size,
+            IngestCheckpoint.content_hash, IngestCheckpoint.status,
+        ).filter(IngestCheckpoint.tenant_id == tenant_id)
+        return {path: (mtime, size, content_hash, status) for path, mtime, size, content_hash, status in rows}
+    finally:
+        db.close()
+
+
+def save_checkpoint(source: SourceFile, status: str, chunks: int = None, message: str = None):
+    """Upsert the file's checkpoint; `chunks` / `message` left as they were when None."""
+    db = SessionLocal()
+    try:
+        checkpoint = (
+            db.query(IngestCheckpoint)
+            .filter(IngestCheckpoint.tenant_id == source.tenant_id, IngestCheckpoint.path == source.name)
+            .first()
+        ) or IngestCheckpoint(tenant_id=source.tenant_id, path=source.name)
+        checkpoint.mtime = source.mtime
+        checkpoint.size = source.size
+        checkpoint.content_hash = source.content_hash
+        checkpoint.status = status
+        if chunks is not None:
+            checkpoint.chunks = chunks
+        if message is not None:
+            checkpoint.message = message
+        checkpoint.updated_at = datetime.utcnow()
+        db.add(checkpoint)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def ensure_tenant(tenant_id: str):
+    """Create the tenant row for a directory that has none yet."""
+    db = SessionLocal()
+    try:
+        if db.get(Tenant, tenant_id) is None:
+            db.add(Tenant(id=tenant_id, name=tenant_id))
+            db.commit()
+            logger.info(f"Created tenant {tenant_id}")
+    finally:
+        db.close()
+
+
+# ------------------------------------------------------------
+# ✔ Resumable bulk ingestion of source directories
+# ------------------------------------------------------------
+class BulkIngestor:
+    """
+    Ingests every supported file under one directory per tenant through an
+    IngestionQueue (parsing in processes, embedding in threads).
+
+    Each finished file gets a checkpoint (path, mtime, size, hash, status),
+    so an interrupted run picks up where it stopped. A file whose mtime and
+    size match a successful checkpoint is skipped without being read; one
+    whose mtime changed is hashed, and skipped too if its content did not.
+    Failed files are retried on the next run. `progress_fn(stats)` is called
+    every `progress_interval` seconds.
+    """
+
+    def __init__(self, parse_workers: int = INGEST_PARSE_WORKERS, index_workers: int = INGEST_INDEX_WORKERS,
+                 force: bool = False, progress_fn=None, progress_interval: float = 5.0):
+        self.parse_workers = parse_workers
+        self.index_workers = index_workers
+        self.force = force
+        self.progress_fn = progress_fn
+        self.progress_interval = progress_interval
+        self.found = self.skipped = self.ingested = self.failed = self.chunks = 0
+        self.interrupted = False
+        self._started = None
+        self._last_report = 0.0
+
+    def _unchanged(self, source: SourceFile, checkpoint) -> bool:
+        if checkpoint is None:
+            source.content_hash = file_hash(source.path)
+            return False
+        mtime, size, content_hash, status = checkpoint
+        if not self.force and status == CHECKPOINT_DONE and mtime == source.mtime and size == source.size:
+            return True
+        source.content_hash = file_hash(source.path)
+        if self.force or status != CHECKPOINT_DONE or content_hash != source.content_hash:
+            return False
+        # Touched but identical: remember the new mtime so the next run need not hash it
+        save_checkpoint(source, CHECKPOINT_DONE)
+        return True
+
+    def run(self, tenant_dirs: dict) -> dict:
+        """Ingest {tenant_id: directory}; returns the final stats()."""
+        self._started = time.perf_counter()
+        queue = IngestionQueue(parse_workers=self.parse_workers, index_workers=self.index_workers)
+        max_in_flight = IN_FLIGHT_PER_WORKER * (self.parse_workers + self.index_workers)
+        pending = {}
+        try:
+            try:
+                for tenant_id, directory in tenant_dirs.items():
+                    ensure_tenant(tenant_id)
+                    checkpoints = load_checkpoints(tenant_id)
+                    for source in iter_source_files(tenant_id, directory):
+                        self.found += 1
+                        try:
+                            unchanged = self._unchanged(source, checkpoints.get(source.name))
+                        except OSError as e:
+                            # Removed or unreadable since the directory was listed
+                            self.failed += 1
+                            logger.warning(f"{tenant_id}/{source.name}: {e}")
+                            continue
+                        if unchanged:
+                            self.skipped += 1
+                            continue
+                        while len(pending) >= max_in_flight:
+                            self._collect(queue, pending, wait=True)
+                        pending[queue.submit(tenant_id, source.path, source.name)] = source
+                        self._collect(queue, pending)
+            except KeyboardInterrupt:
+                # Files already submitted still finish and get their checkpoint
+                self.interrupted = True
+                logger.warning(f"Interrupted: finishing {len(pending)} files in flight (Ctrl-C again to abort)")
+            while pending:
+                self._collect(queue, pending, wait=True)
+        finally:
+            queue.shutdown(wait=not pending)
+        return self.stats()
+
+    def _collect(self, queue: IngestionQueue, pending: dict, wait: bool = False):
+        finished = [job for job in queue.get_jobs(list(pending)) if job.finished]
+        if not finished and wait:
+            time.sleep(POLL_SECONDS)
+        for job in finished:
+            source = pending.pop(job.id)
+            if job.status == FAILED:
+                self.failed += 1
+                logger.warning(f"{job.tenant_id}/{source.name}: {job.message}")
+                save_checkpoint(source, CHECKPOINT_FAILED, job.chunks, job.message)
+            else:
+                self.ingested += 1
+                self.chunks += job.chunks
+                save_checkpoint(source, CHECKPOINT_DONE, job.chunks, job.message)
+        queue.discard_jobs([job.id for job in finished])
+
+        if self.progress_fn and time.perf_counter() - self._last_report >= self.progress_interval:
+            self._last_report = time.perf_counter()
+            self.progress_fn(self.stats())
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        processed = self.ingested + self.failed
+        return {
+            "files_found": self.found,
+            "files_ingested": self.ingested,
+            "files_failed": self.failed,
+            "files_skipped": self.skipped,
+            "chunks": self.chunks,
+            "elapsed_s": round(elapsed, 2),
+            "files_per_s": round(processed / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_s": round(self.chunks / elapsed, 1) if elapsed else 0.0,
+            "interrupted": self.interrupted,
+        }
@@ -11,14 +11,29 @@ from langchain_community.document_loaders import (
     PyPDFLoader, 
     Docx2txtLoader, 
     TextLoader, 
-    CSVLoader, 
     UnstructuredExcelLoader
 )
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from src.config import CHUNK_SIZE, CHUNK_OVERLAP
+from src.config import CHUNK_SIZE, CHUNK_OVERLAP, TABLE_CHUNK_CHARS
+from src.ingestion.table_loader import iter_csv_pages, iter_xlsx_pages
+
+# Extensions iter_document_chunks can read
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md", ".csv", ".xlsx", ".xls")
+# Read as row groups that are already chunk-sized (see table_loader)
+TABLE_EXTENSIONS = (".csv", ".xlsx")
+# Plain text is read in blocks of about this many characters, cut at paragraph breaks
+TEXT_BLOCK_CHARS = 64 * 1024
+
+
+class DocumentLoadError(Exception):
+    """The document could not be parsed (possibly part-way through)."""
 
 def get_loader_for_file(file_path: str):
-    """Factory function to choose the right loader based on extension."""
+    """
+    Factory function to choose the right loader based on extension.
+    CSV and XLSX files are read by table_loader instead (see _iter_pages).
+    """
     ext = os.path.splitext(file_path)[1].lower()
     
     if ext == ".pdf":
@@ -27,37 +42,78 @@ def get_loader_for_file(file_path: str):
         return Docx2txtLoader(file_path)
     elif ext in [".txt", ".md"]:
         return TextLoader(file_path, encoding="utf-8")
-    elif ext == ".csv":
-        return CSVLoader(file_path, encoding="utf-8")
     elif ext in [".xlsx", ".xls"]:
         # Note: Might require 'pip install openpyxl'
         return UnstructuredExcelLoader(file_path)
     else:
         raise ValueError(f"Unsupported file format: {ext}")
 
-def load_and_split_document(file_path: str, file_name: str, tenant_id: str):
-    """Universal loader that handles multiple formats, splits, and tags metadata."""
-    
-    # 1. Select the correct loader
-    try:
-        loader = get_loader_for_file(file_path)
-        documents = loader.load()
-    except Exception as e:
-        return f"Error loading {file_name}: {str(e)}", []
-
-    # 2. Split Text (Universal chunking)
-    text_splitter = RecursiveCharacterTextSplitter(
+def _text_splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
         separators=["\n\n", "\n", ".", " ", ""] # Try to keep paragraphs together
     )
-    chunks = text_splitter.split_documents(documents)
-    
-    # 3. Add Multi-Tenant Metadata
-    for chunk in chunks:
-        chunk.metadata["tenant_id"] = tenant_id
-        chunk.metadata["source"] = file_name
-    
+
+def _iter_text_pages(file_path: str):
+    """Plain text in TEXT_BLOCK_CHARS blocks that end on a paragraph (or line) break."""
+    metadata = {"source": file_path}
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        while block := f.read(TEXT_BLOCK_CHARS):
+            buffer += block
+            cut = buffer.rfind("\n\n")
+            if cut <= 0:
+                cut = buffer.rfind("\n")
+            if cut <= 0:
+                if len(buffer) < 4 * TEXT_BLOCK_CHARS:
+                    continue
+                cut = len(buffer)
+            yield Document(page_content=buffer[:cut], metadata=dict(metadata))
+            buffer = buffer[cut:]
+        if buffer.strip():
+            yield Document(page_content=buffer, metadata=dict(metadata))
+
+def _iter_pages(file_path: str):
+    """Pages (PDF), row groups (CSV, XLSX) or text blocks, read lazily."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".csv":
+        return iter_csv_pages(file_path)
+    if ext == ".xlsx":
+        return iter_xlsx_pages(file_path)
+    if ext in [".txt", ".md"]:
+        return _iter_text_pages(file_path)
+    return get_loader_for_file(file_path).lazy_load()
+
+def iter_document_chunks(file_path: str, file_name: str, tenant_id: str):
+    """
+    Streaming counterpart of load_and_split_document: pages are parsed lazily
+    and split one at a time, so only the current page and its chunks are in
+    memory. Raises DocumentLoadError when parsing fails.
+    """
+    text_splitter = _text_splitter()
+    is_table = os.path.splitext(file_path)[1].lower() in TABLE_EXTENSIONS
+    try:
+        for page in _iter_pages(file_path):
+            # Row groups keep their header; only a single oversized row is split
+            if is_table and len(page.page_content) <= TABLE_CHUNK_CHARS:
+                chunks = [page]
+            else:
+                chunks = text_splitter.split_documents([page])
+            for chunk in chunks:
+                chunk.metadata["tenant_id"] = tenant_id
+                chunk.metadata["source"] = file_name
+                yield chunk
+    except Exception as e:
+        raise DocumentLoadError(f"Error loading {file_name}: {str(e)}") from e
+
+def load_and_split_document(file_path: str, file_name: str, tenant_id: str):
+    """Universal loader that handles multiple formats, splits, and tags metadata."""
+    try:
+        chunks = list(iter_document_chunks(file_path, file_name, tenant_id))
+    except DocumentLoadError as e:
+        return str(e), []
+
     return None, chunks # Error is None if successful
 
 def save_uploaded_file(uploaded_file, tenant_id: str):
@@ -0,0 +1,252 @@
+# src/ingestion/embedding_cache.py
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.config import (
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    QUERY_EMBEDDING_LRU_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------
+# ✔ On-disk cache keyed by (model, sha256(text))
+# ------------------------------------------------------------
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache with size-bounded LRU eviction.
+    Vectors are stored as float32 blobs; `last_used` drives eviction.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, texts: list[str]) -> list:
+        """Return a vector (list of floats) or None for each text."""
+        hashes = [text_hash(t) for t in texts]
+        found = {}
+
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+            results = []
+            for h in hashes:
+                blob = found.get(h)
+                if blob is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(np.frombuffer(blob, dtype=np.float32).tolist())
+            return results
+
+    def put_many(self, model: str, texts: list[str], vectors: list):
+        if not texts:
+            return
+        now = time.time()
+        rows = [
+            (model, text_hash(t), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._entries += self._conn.total_changes - before
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        overflow = self._entries - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._entries -= overflow
+        logger.info(f"Embedding cache evicted {overflow} least recently used entries")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+        }
+
+
+# ------------------------------------------------------------
+# ✔ In-process LRU for question embeddings
+# ------------------------------------------------------------
+class EmbeddingLRU:
+    """
+    Bounded in-memory map (model, text) -> vector. Sits in front of the
+    disk cache for questions: a repeat costs a dict lookup, not a SQLite
+    read or an embedding request.
+    """
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_LRU_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model: str, text: str):
+        with self._lock:
+            vector = self._entries.get((model, text))
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((model, text))
+            self.hits += 1
+            return vector
+
+    def put(self, model: str, text: str, vector):
+        with self._lock:
+            self._entries[(model, text)] = vector
+            self._entries.move_to_end((model, text))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+query_embedding_lru = EmbeddingLRU() if QUERY_EMBEDDING_LRU_SIZE > 0 else None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Return the process-wide cache (None when disabled)."""
+    global _cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+# ------------------------------------------------------------
+# ✔ Only send cache misses to the provider
+# ------------------------------------------------------------
+def embed_with_cache(texts: list[str], model: str, embed_fn) -> list:
+    """
+    Embed `texts`, calling `embed_fn(list_of_texts)` only for texts that are
+    not cached yet. Duplicates within the call are embedded once.
+    """
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return embed_fn(texts)
+
+    unique_texts = list(dict.fromkeys(texts))
+    cached = dict(zip(unique_texts, cache.get_many(model, unique_texts)))
+
+    missing = [t for t in unique_texts if cached[t] is None]
+    if missing:
+        vectors = embed_fn(missing)
+        if len(vectors) != len(missing):
+            raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(missing)} texts")
+        cache.put_many(model, missing, vectors)
+        cached.update(zip(missing, vectors))
+
+    return [cached[t] for t in texts]
+
+
+async def aembed_with_cache(texts: list[str], model: str, aembed_fn) -> list:
+    """
+    Async embed_with_cache. The SQLite lookups run in a worker thread so the
+    event loop never blocks on disk; `aembed_fn` is awaited for the misses.
+    """
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return await aembed_fn(texts)
+
+    unique_texts = list(dict.fromkeys(texts))
+    cached = dict(zip(unique_texts, await asyncio.to_thread(cache.get_many, model, unique_texts)))
+
+    missing = [t for t in unique_texts if cached[t] is None]
+    if missing:
+        vectors = await aembed_fn(missing)
+        if len(vectors) != len(missing):
+            raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(missing)} texts")
+        await asyncio.to_thread(cache.put_many, model, missing, vectors)
+        cached.update(zip(missing, vectors))
+
+    return [cached[t] for t in texts]
@@ -0,0 +1,197 @@
+# src/ingestion/embedding_scheduler.py
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from src.config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_BATCH_MAX_ITEMS,
+    EMBEDDING_MAX_INPUT_TOKENS,
+    EMBEDDING_MAX_WORKERS,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_RETRY_BASE_DELAY,
+)
+from src.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: the request itself was fine, the API was not
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+# ------------------------------------------------------------
+# ✔ Token-aware batching + bounded concurrent dispatch
+# ------------------------------------------------------------
+class EmbeddingScheduler:
+    """
+    Packs texts into requests by token count, sends the requests concurrently
+    on a bounded worker pool, retries rate limits with exponential backoff and
+    returns vectors in the original input order.
+
+    The bound is per scheduler, not per call: however many documents are
+    embedded at once, at most `max_workers` requests are in flight from
+    threads (and at most `max_workers` per event loop from aembed).
+
+    `embed_batch_fn(list_of_texts) -> list_of_vectors` performs one API request.
+    `aembed_batch_fn` is its coroutine counterpart, used by aembed(); there the
+    batches run as tasks on the event loop instead of worker threads.
+    """
+
+    def __init__(
+        self,
+        embed_batch_fn,
+        aembed_batch_fn=None,
+        model: str = EMBEDDING_MODEL,
+        max_tokens_per_batch: int = EMBEDDING_BATCH_MAX_TOKENS,
+        max_items_per_batch: int = EMBEDDING_BATCH_MAX_ITEMS,
+        max_input_tokens: int = EMBEDDING_MAX_INPUT_TOKENS,
+        max_workers: int = EMBEDDING_MAX_WORKERS,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        retry_base_delay: float = EMBEDDING_RETRY_BASE_DELAY,
+    ):
+        self.embed_batch_fn = embed_batch_fn
+        self.aembed_batch_fn = aembed_batch_fn
+        self.model = model
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_items_per_batch = max_items_per_batch
+        self.max_input_tokens = max_input_tokens
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed")
+        # asyncio semaphores belong to one event loop
+        self._async_slots = weakref.WeakKeyDictionary()
+
+    def pack(self, token_counts: list[int]) -> list[list[int]]:
+        """Group text indexes into batches that respect the token and item limits."""
+        batches, current, current_tokens = [], [], 0
+        for i, tokens in enumerate(token_counts):
+            if current and (
+                current_tokens + tokens > self.max_tokens_per_batch
+                or len(current) >= self.max_items_per_batch
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _prepare(self, texts: list[str]):
+        """(texts, token_counts) with oversized inputs truncated."""
+        texts = list(texts)
+        token_counts = [count_tokens(t, self.model) for t in texts]
+        for i, tokens in enumerate(token_counts):
+            # The API rejects single inputs above the model's context length
+            if tokens > self.max_input_tokens:
+                logger.warning(f"Truncating embedding input {i} from {tokens} to {self.max_input_tokens} tokens")
+                texts[i] = truncate_to_tokens(texts[i], self.max_input_tokens, self.model)
+                token_counts[i] = self.max_input_tokens
+        return texts, token_counts
+
+    def embed(self, texts: list[str]) -> list:
+        if not texts:
+            return []
+
+        texts, token_counts = self._prepare(texts)
+        batches = self.pack(token_counts)
+
+        def run(batch):
+            return batch, self._embed_with_retry([texts[i] for i in batch])
+
+        if len(batches) == 1:
+            completed = [run(batches[0])]
+        else:
+            logger.info(f"Embedding {len(texts)} texts in {len(batches)} batches")
+            completed = list(self._pool.map(run, batches))
+
+        return _in_input_order(len(texts), completed)
+
+    async def aembed(self, texts: list[str]) -> list:
+        """Async embed(): at most max_workers requests in flight, no threads."""
+        if not texts:
+            return []
+        if self.aembed_batch_fn is None:
+            return await asyncio.to_thread(self.embed, texts)
+
+        texts, token_counts = self._prepare(texts)
+        batches = self.pack(token_counts)
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_slots.get(loop)
+        if semaphore is None:
+            semaphore = self._async_slots[loop] = asyncio.Semaphore(self.max_workers)
+
+        async def run(batch):
+            async with semaphore:
+                return batch, await self._aembed_with_retry([texts[i] for i in batch])
+
+        completed = await asyncio.gather(*(run(batch) for batch in batches))
+        return _in_input_order(len(texts), completed)
+
+    def _embed_with_retry(self, batch_texts: list[str]) -> list:
+        attempt = 0
+        while True:
+            try:
+                # The slot is held for the request only, not during the backoff
+                with self._slots:
+                    return self.embed_batch_fn(batch_texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"Embedding request failed ({type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    async def _aembed_with_retry(self, batch_texts: list[str]) -> list:
+        attempt = 0
+        while True:
+            try:
+                return await self.aembed_batch_fn(batch_texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"Embedding request failed ({type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, error, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Exponential backoff with jitter so workers don't retry in lockstep
+        return self.retry_base_delay * (2 ** attempt) * (0.5 + random.random())
+
+
+def _in_input_order(size: int, completed) -> list:
+    results = [None] * size
+    for batch, vectors in completed:
+        for i, vector in zip(batch, vectors):
+            results[i] = vector
+    return results
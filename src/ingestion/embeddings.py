@@ -1,20 +1,16 @@
 # src/ingestion/embeddings.py
 
-from openai import OpenAI
-from src.config import OPENAI_API_KEY, EMBEDDING_MODEL
-
-# Initialize OpenAI client globally
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+from src.embedding_providers import get_embedding_provider
+from src.ingestion.embedding_cache import embed_with_cache
 
 def get_openai_embeddings(texts: list[str]) -> list[list[float]]:
-    """Generates embeddings for a list of texts using the OpenAI API."""
+    """
+    Generates embeddings for a list of texts with the configured provider
+    (OpenAI or local, despite the name), embedding only cache misses.
+    """
     try:
-        response = openai_client.embeddings.create(
-            input=texts,
-            model=EMBEDDING_MODEL
-        )
-        # Extract the vector list from the response
-        return [data.embedding for data in response.data]
+        provider = get_embedding_provider()
+        return embed_with_cache(texts, provider.model_id, provider.embed)
     except Exception as e:
         print(f"Error generating embeddings: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,229 @@
+# src/ingestion/job_queue.py
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+from src.config import INGEST_PARSE_WORKERS, INGEST_INDEX_WORKERS, INGEST_STREAM_BATCH_SIZE
+from src.ingestion.doc_loader import iter_document_chunks, save_uploaded_file, DocumentLoadError
+from src.ingestion.storage import index_chunk_stream
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs are kept this long so every session can read their result
+FINISHED_JOB_RETENTION_SECONDS = 3600
+
+QUEUED, PARSING, EMBEDDING, DONE, FAILED = "queued", "parsing", "embedding", "done", "failed"
+
+
+@dataclass
+class IngestionJob:
+    id: str
+    tenant_id: str
+    file_name: str
+    file_path: str
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    chunks: int = 0
+    created_at: float = field(default_factory=time.time)
+    finished_at: float = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+# Parsed batches waiting for the index thread, per file: the parser blocks
+# beyond this, so memory stays bounded however large the document is
+PARSE_QUEUE_BATCHES = 4
+# How often a blocked parser / waiting index thread re-checks the other side
+HANDOFF_POLL_SECONDS = 1.0
+
+
+def _parse_into_queue(file_path: str, file_name: str, tenant_id: str, batches, cancelled, batch_size: int):
+    """
+    Runs in a parse process: sends the file's chunks back in batches of
+    `batch_size` as they are split, then ("done", None) or ("error", message).
+    Stops early once `cancelled` is set (the index side gave up).
+    """
+    def put(item) -> bool:
+        while not cancelled.is_set():
+            try:
+                batches.put(item, timeout=HANDOFF_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        batch = []
+        for chunk in iter_document_chunks(file_path, file_name, tenant_id):
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                if not put(("chunks", batch)):
+                    return
+                batch = []
+        if batch and not put(("chunks", batch)):
+            return
+        put(("done", None))
+    except Exception as e:
+        put(("error", str(e)))
+
+
+def _receive_chunks(batches, future):
+    """Chunks sent back by _parse_into_queue, as one stream for index_chunk_stream."""
+    while True:
+        try:
+            kind, value = batches.get(timeout=HANDOFF_POLL_SECONDS)
+        except queue.Empty:
+            if future.done():
+                error = future.exception()
+                if error is not None:
+                    raise DocumentLoadError(f"Parser crashed: {error}") from error
+                return
+            continue
+        if kind == "chunks":
+            yield from value
+        elif kind == "error":
+            raise DocumentLoadError(value)
+        else:
+            return
+
+
+# ------------------------------------------------------------
+# ✔ Parse in a process pool, embed/upsert in a thread pool
+# ------------------------------------------------------------
+class IngestionQueue:
+    """
+    Runs ingestion off the Streamlit script thread.
+
+    Parsing + splitting is CPU-bound (pypdf, unstructured), so it goes to a
+    process pool and scales with cores. Embedding + upsert is network-bound
+    and goes to a thread pool. Each file is tracked as an IngestionJob.
+
+    Every file is streamed: the parse process sends chunks back in batches
+    of INGEST_STREAM_BATCH_SIZE through a bounded queue while the index
+    thread embeds and upserts them, so memory use does not depend on the
+    size of the document.
+    """
+
+    def __init__(self, parse_workers: int = INGEST_PARSE_WORKERS, index_workers: int = INGEST_INDEX_WORKERS):
+        # "spawn" avoids forking a process that already runs Streamlit/HTTP threads
+        context = multiprocessing.get_context("spawn")
+        self._parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=context)
+        self._index_pool = ThreadPoolExecutor(max_workers=index_workers, thread_name_prefix="ingest")
+        # Manager queues can be handed to pool workers (plain ones cannot)
+        self._manager = context.Manager()
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, tenant_id: str, file_path: str, file_name: str) -> str:
+        job = IngestionJob(id=uuid.uuid4().hex, tenant_id=tenant_id, file_name=file_name, file_path=file_path)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._update(job.id, status=PARSING, progress=0.05)
+        self._index_pool.submit(self._index_stream, job.id)
+        return job.id
+
+    def record_failure(self, tenant_id: str, file_name: str, message: str) -> str:
+        """Track a file that failed before it could be queued (e.g. could not be saved)."""
+        job = IngestionJob(id=uuid.uuid4().hex, tenant_id=tenant_id, file_name=file_name, file_path="")
+        with self._lock:
+            self._jobs[job.id] = job
+        self._finish(job.id, FAILED, message)
+        return job.id
+
+    def _index_stream(self, job_id: str):
+        job = self.get_job(job_id)
+
+        def on_progress(done, total):
+            # Chunk total is unknown while streaming: creep towards 95%
+            self._update(job_id, status=EMBEDDING, progress=0.05 + 0.9 * done / (done + 2000), chunks=done)
+
+        batches = cancelled = None
+        try:
+            batches = self._manager.Queue(maxsize=PARSE_QUEUE_BATCHES)
+            cancelled = self._manager.Event()
+            future = self._parse_pool.submit(
+                _parse_into_queue, job.file_path, job.file_name, job.tenant_id,
+                batches, cancelled, INGEST_STREAM_BATCH_SIZE,
+            )
+            chunks = _receive_chunks(batches, future)
+            message = index_chunk_stream(job.tenant_id, job.file_name, chunks, progress_callback=on_progress)
+        except Exception as e:
+            logger.exception(f"Ingestion of {job.file_name} failed")
+            message = f"FAILED: {e}"
+        finally:
+            if cancelled is not None:
+                # Unblocks a parser whose output is no longer being read
+                cancelled.set()
+
+        self._finish(job_id, FAILED if message.startswith("FAILED") else DONE, message)
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            self._jobs[job_id] = replace(self._jobs[job_id], **changes)
+
+    def _finish(self, job_id: str, status: str, message: str):
+        self._update(job_id, status=status, message=message, progress=1.0, finished_at=time.time())
+        logger.info(f"Ingestion job {job_id}: {message}")
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> IngestionJob:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_jobs(self, job_ids) -> list:
+        """Snapshots of the given jobs, in the given order (unknown ids skipped)."""
+        with self._lock:
+            return [self._jobs[j] for j in job_ids if j in self._jobs]
+
+    def discard_jobs(self, job_ids):
+        """Drop finished jobs whose results have been read (batch callers track thousands)."""
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job.finished:
+                    del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self._parse_pool.shutdown(wait=wait)
+        self._index_pool.shutdown(wait=wait)
+        self._manager.shutdown()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Process-wide queue, shared by every Streamlit session."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestionQueue()
+        return _queue
+
+
+def enqueue_upload(uploaded_file, tenant_id: str) -> str:
+    """
+    Save the upload on the calling thread (the Streamlit buffer is not
+    picklable) and queue the rest. Returns the job id.
+    """
+    queue = get_ingestion_queue()
+    try:
+        file_path = save_uploaded_file(uploaded_file, tenant_id)
+    except Exception as e:
+        return queue.record_failure(tenant_id, uploaded_file.name, f"FAILED: Could not save uploaded file: {e}")
+    return queue.submit(tenant_id, file_path, uploaded_file.name)
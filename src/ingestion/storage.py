@@ -1,9 +1,19 @@
 # src/ingestion/storage.py
 
+import hashlib
+import json
+import threading
+import uuid
 from datetime import datetime
+from itertools import islice
 from src.database import SessionLocal, Document
-from src.ingestion.doc_loader import load_and_split_document, save_uploaded_file
-from src.qdrant_client import upsert_documents   # ← NEW FIXED IMPORT
+from src.ingestion.doc_loader import iter_document_chunks, save_uploaded_file, DocumentLoadError
+from src.qdrant_client import upsert_documents, delete_documents, collection_count
+from src.rag.answer_cache import invalidate_tenant_answers
+from src.config import INGEST_UPSERT_BATCH_SIZE, INGEST_STREAM_BATCH_SIZE
+
+_document_locks = {}
+_document_locks_guard = threading.Lock()
 
 
 def ingest_document(uploaded_file, tenant_id: str):
@@ -25,41 +35,151 @@ def ingest_document(uploaded_file, tenant_id: str):
         return f"FAILED: Could not save uploaded file: {e}"
 
     # -----------------------------------------------------------
-    # 2. Extract text + split into chunks
+    # 2. Extract text + split into chunks, streamed page by page
     # -----------------------------------------------------------
-    error, chunks = load_and_split_document(file_path, file_name, tenant_id)
+    chunks = iter_document_chunks(file_path, file_name, tenant_id)
 
-    if error:
-        return f"FAILED: {error}"
+    return index_chunk_stream(tenant_id, file_name, chunks)
 
-    if not chunks:
-        return "Warning: No extractable text found in the document."
 
-    # -----------------------------------------------------------
-    # 3. Store embeddings in Qdrant (per-tenant collection)
-    # -----------------------------------------------------------
-    try:
-        vector_count = upsert_documents(tenant_id, chunks)
-    except Exception as e:
-        return f"FAILED: Qdrant ingestion error: {e}"
+def chunk_id(tenant_id: str, source: str, content: str) -> str:
+    """Deterministic point id: the same text in the same file always maps to the same id."""
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{tenant_id}/{source}/{content_hash}"))
 
-    # -----------------------------------------------------------
-    # 4. Log ingestion in the database
-    # -----------------------------------------------------------
-    db = SessionLocal()
-    try:
-        new_doc = Document(
-            tenant_id=tenant_id,
-            file_name=file_name,
-            upload_date=datetime.utcnow(),
-            vector_count=vector_count
-        )
-        db.add(new_doc)
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        return f"FAILED: DB logging error: {e}"
-    finally:
-        db.close()
 
-    return f"Success ({vector_count} chunks embedded)"
+def _document_lock(tenant_id: str, file_name: str):
+    # Two uploads of the same file must not diff against the same manifest
+    with _document_locks_guard:
+        return _document_locks.setdefault((tenant_id, file_name), threading.Lock())
+
+
+def _load_manifest(db, tenant_id: str, file_name: str):
+    """Latest Document row for the file and the chunk ids it recorded."""
+    doc = (
+        db.query(Document)
+        .filter(Document.tenant_id == tenant_id, Document.file_name == file_name)
+        .order_by(Document.upload_date.desc(), Document.id.desc())
+        .first()
+    )
+    if doc is None or not doc.chunk_manifest:
+        return doc, set()
+    return doc, set(json.loads(doc.chunk_manifest))
+
+
+def index_chunks(tenant_id: str, file_name: str, chunks, progress_callback=None):
+    """Steps 3-4 of ingestion for an already split list of chunks."""
+    return index_chunk_stream(
+        tenant_id, file_name, chunks,
+        progress_callback=progress_callback,
+        total=len(chunks),
+        batch_size=INGEST_UPSERT_BATCH_SIZE,
+    )
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def index_chunk_stream(tenant_id: str, file_name: str, chunks, progress_callback=None,
+                       total: int = None, batch_size: int = INGEST_STREAM_BATCH_SIZE):
+    """
+    Steps 3-4 of ingestion for an iterable of split chunks (a list, or the
+    generator from iter_document_chunks).
+
+    Chunks are consumed, embedded and upserted `batch_size` at a time, so
+    with a generator only one micro-batch of chunks is held in memory; just
+    the chunk ids are kept for the whole file.
+
+    Chunk ids are derived from (tenant, file, content hash), so on re-upload
+    only new or changed chunks are embedded and upserted, and chunks that
+    disappeared from the file are deleted. The file's chunk manifest is kept
+    on its Document row, so the diff never has to scan the vector store.
+    `progress_callback(done, total)` is called after each batch; `total` is
+    None when the number of chunks is not known up front.
+    """
+    with _document_lock(tenant_id, file_name):
+        db = SessionLocal()
+        try:
+            doc, previous_ids = _load_manifest(db, tenant_id, file_name)
+        finally:
+            db.close()
+
+        if previous_ids and collection_count(tenant_id) == 0:
+            # The vector store was wiped (e.g. in-memory mode restarted); re-embed everything
+            previous_ids = set()
+
+        # -----------------------------------------------------------
+        # 3. Store embeddings in Qdrant (per-tenant collection)
+        # -----------------------------------------------------------
+        seen_ids = set()
+        done = embedded = 0
+        removed_ids = set()
+        failure = None
+        try:
+            for batch in _batches(chunks, batch_size):
+                new_chunks = []
+                for chunk in batch:
+                    chunk.id = chunk_id(tenant_id, file_name, chunk.page_content)
+                    # Identical chunks in one file collapse to a single point
+                    if chunk.id in seen_ids:
+                        continue
+                    seen_ids.add(chunk.id)
+                    if chunk.id not in previous_ids:
+                        new_chunks.append(chunk)
+                if new_chunks:
+                    upsert_documents(tenant_id, new_chunks)
+                    embedded += len(new_chunks)
+                done += len(batch)
+                if progress_callback:
+                    progress_callback(done, total)
+
+            removed_ids = previous_ids - seen_ids
+            delete_documents(tenant_id, removed_ids)
+        except DocumentLoadError as e:
+            failure = f"FAILED: {e}"
+        except Exception as e:
+            failure = f"FAILED: Qdrant ingestion error: {e}"
+        finally:
+            if embedded or removed_ids:
+                # Cached answers were computed against the old document set
+                invalidate_tenant_answers(tenant_id)
+
+        if failure and not embedded:
+            return failure
+        if not seen_ids and not removed_ids:
+            return "Warning: No extractable text found in the document."
+
+        # -----------------------------------------------------------
+        # 4. Record the document and its chunk manifest in the database
+        # -----------------------------------------------------------
+        # After a failure part-way through, the manifest also lists what
+        # was already upserted so the next upload's diff can clean it up.
+        manifest = previous_ids | seen_ids if failure else seen_ids
+        db = SessionLocal()
+        try:
+            if doc is None:
+                doc = Document(tenant_id=tenant_id, file_name=file_name)
+            doc.upload_date = datetime.utcnow()
+            doc.vector_count = len(manifest)
+            doc.chunk_manifest = json.dumps(sorted(manifest))
+            db.merge(doc)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            return failure or f"FAILED: DB logging error: {e}"
+        finally:
+            db.close()
+
+    if failure:
+        return failure
+    if not seen_ids:
+        # The file's earlier chunks were removed above: an empty file must not keep serving them
+        return f"Warning: No extractable text found in the document ({len(removed_ids)} old chunks removed)."
+    unchanged = len(seen_ids) - embedded
+    return (
+        f"Success ({embedded} chunks embedded, {unchanged} unchanged, "
+        f"{len(removed_ids)} removed)"
+    )
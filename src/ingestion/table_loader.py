@@ -0,0 +1,162 @@
+# src/ingestion/table_loader.py
+
+from itertools import islice
+
+import pandas as pd
+from langchain_core.documents import Document
+
+from src.config import TABLE_CHUNK_CHARS, TABLE_READ_ROWS
+
+CELL_SEPARATOR = "\t"
+# Tabs and line breaks inside a cell would break the row layout
+CELL_WHITESPACE = r"[\t\r\n]+"
+
+
+# ------------------------------------------------------------
+# ✔ Rows -> text, a whole block at a time
+# ------------------------------------------------------------
+def render_rows(frame: pd.DataFrame) -> pd.Series:
+    """
+    One tab-separated line per non-empty row (index kept), built with pandas
+    string operations over whole columns rather than per-row Python.
+    """
+    if frame.empty or not len(frame.columns):
+        return pd.Series([], dtype=object)
+    cells = frame.fillna("").astype(str)
+    cells = cells.apply(lambda column: column.str.replace(CELL_WHITESPACE, " ", regex=True).str.strip())
+    cells = cells[(cells != "").any(axis=1)]
+    if cells.empty:
+        return pd.Series([], dtype=object)
+    first, rest = cells.iloc[:, 0], [cells.iloc[:, i] for i in range(1, cells.shape[1])]
+    return first.str.cat(rest, sep=CELL_SEPARATOR) if rest else first
+
+
+class TableChunker:
+    """
+    Packs rendered rows into chunks of at most `chunk_chars` characters,
+    each starting with the column header so every chunk can be read (and
+    retrieved) on its own. Rows arrive in blocks; a partly filled chunk is
+    carried over to the next block, so block boundaries add no small chunks.
+    """
+
+    def __init__(self, header: str, source: str, label: str = "", chunk_chars: int = TABLE_CHUNK_CHARS):
+        self.header = header
+        self.source = source
+        self.label = label
+        # A single row longer than this still gets a chunk of its own
+        self.budget = max(chunk_chars - len(header) - 1, 1)
+        self._rows = []
+        self._used = 0
+        self._first_row = self._last_row = None
+        self._emitted = False
+
+    def _page(self) -> str:
+        rows = f"rows {self._first_row}-{self._last_row}"
+        return f"{self.label}, {rows}" if self.label else rows
+
+    def _flush(self) -> Document:
+        document = Document(
+            page_content="\n".join([self.header] + self._rows),
+            metadata={"source": self.source, "page": self._page()},
+        )
+        self._rows, self._used, self._emitted = [], 0, True
+        return document
+
+    def add(self, lines: pd.Series):
+        """
+        Documents completed by this block of rendered rows. The Series index
+        is the 0-based data row number, used in the "page" of each chunk.
+        """
+        lengths = (lines.str.len().to_numpy() + 1).tolist()
+        for row, line, length in zip((lines.index + 1).tolist(), lines.tolist(), lengths):
+            if self._rows and self._used + length > self.budget:
+                yield self._flush()
+            if not self._rows:
+                self._first_row = row
+            self._rows.append(line)
+            self._used += length
+            self._last_row = row
+
+    def close(self):
+        if self._rows:
+            yield self._flush()
+        elif not self._emitted:
+            # A table with a header and no rows still says what it holds
+            yield Document(page_content=self.header, metadata={"source": self.source, "page": self.label or "header"})
+
+
+def _header_line(columns) -> str:
+    # pandas names blank header cells "Unnamed: <n>"
+    names = ["" if str(c).startswith("Unnamed: ") else str(c) for c in columns]
+    return CELL_SEPARATOR.join(" ".join(n.split()) for n in names)
+
+
+# ------------------------------------------------------------
+# ✔ CSV: pandas reader in blocks of TABLE_READ_ROWS rows
+# ------------------------------------------------------------
+CSV_OPTIONS = dict(dtype=str, keep_default_na=False, encoding="utf-8", encoding_errors="replace", skipinitialspace=True)
+
+
+def _fold_extra_cells(width: int):
+    """
+    on_bad_lines handler: a row with more cells than the header (typically an
+    unquoted comma in the last field) keeps them, joined into its last column.
+    """
+    def fold(cells: list) -> list:
+        return cells[:width - 1] + [",".join(cells[width - 1:])]
+    return fold
+
+
+def iter_csv_pages(file_path: str, read_rows: int = TABLE_READ_ROWS):
+    """
+    Row-group Documents for a CSV, read TABLE_READ_ROWS rows at a time so
+    memory does not grow with the file. Cells are kept as the text in the
+    file (no number or date parsing); a malformed row does not fail the file.
+    """
+    try:
+        width = len(pd.read_csv(file_path, nrows=0, **CSV_OPTIONS).columns)
+    except pd.errors.EmptyDataError:
+        return
+    # Only the python engine accepts a callable for rows with too many cells
+    reader = pd.read_csv(
+        file_path, chunksize=read_rows, engine="python", on_bad_lines=_fold_extra_cells(width), **CSV_OPTIONS
+    )
+    chunker = None
+    with reader:
+        for frame in reader:
+            if chunker is None:
+                chunker = TableChunker(_header_line(frame.columns), file_path)
+            yield from chunker.add(render_rows(frame))
+    if chunker is not None:
+        yield from chunker.close()
+
+
+# ------------------------------------------------------------
+# ✔ XLSX: openpyxl read-only rows, rendered in pandas blocks
+# ------------------------------------------------------------
+def iter_xlsx_pages(file_path: str, read_rows: int = TABLE_READ_ROWS):
+    """
+    Row-group Documents for every sheet. Rows are streamed from the zip in
+    openpyxl's read-only mode and rendered TABLE_READ_ROWS at a time; the
+    first non-empty row of a sheet is its header.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next((r for r in rows if any(v is not None and str(v).strip() for v in r)), None)
+            if header is None:
+                continue
+            columns = ["" if v is None else v for v in header]
+            chunker = TableChunker(_header_line(columns), file_path, label=sheet.title)
+            offset = 0
+            while block := list(islice(rows, read_rows)):
+                frame = pd.DataFrame(block, dtype=object, index=range(offset, offset + len(block)))
+                offset += len(block)
+                yield from chunker.add(render_rows(frame))
+            yield from chunker.close()
+    finally:
+        workbook.close()
+
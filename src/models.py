@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -16,6 +16,26 @@ class Document(Base):
     file_name = Column(String, nullable=False)
     upload_date = Column(DateTime, default=datetime.utcnow)
     vector_count = Column(Integer, default=0)
+    # JSON list of the chunk ids currently indexed for this file
+    chunk_manifest = Column(Text)
+
+class IngestCheckpoint(Base):
+    __tablename__ = 'ingest_checkpoints'
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String, ForeignKey('tenants.id'), nullable=False)
+    # Path relative to the tenant's source directory (also the document's file_name)
+    path = Column(String, nullable=False)
+    mtime = Column(Float, nullable=False)
+    size = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    chunks = Column(Integer, default=0)
+    message = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ux_ingest_checkpoints_tenant_path', 'tenant_id', 'path', unique=True),
+    )
 
 class ConversationLog(Base):
     __tablename__ = 'conversation_logs'
@@ -26,3 +46,13 @@ class ConversationLog(Base):
     answer = Column(Text, nullable=False)
     citations = Column(Text)
     is_validated = Column(Integer, default=0)
+    # A follow-up question rewritten with the chat history (NULL when not rewritten)
+    standalone_question = Column(Text)
+
+    # Admin log pages are read newest first, optionally per tenant / validation
+    # status; the trailing id keeps keyset pagination on the index.
+    __table_args__ = (
+        Index('ix_conversation_logs_tenant_ts', 'tenant_id', 'timestamp', 'id'),
+        Index('ix_conversation_logs_ts', 'timestamp', 'id'),
+        Index('ix_conversation_logs_validated_ts', 'is_validated', 'timestamp', 'id'),
+    )
@@ -56,12 +56,23 @@
 
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+import asyncio
 import logging
+import os
+import uuid
+import warnings
+
+from src.config import VECTOR_STORE_MODE, VECTOR_STORE_DIR
+from src.embedding_providers import get_embedding_provider
+from src.ingestion.embedding_cache import embed_with_cache, aembed_with_cache, query_embedding_lru
+from src.vector_store import DEFAULT_OVERSAMPLING
+from src.collection_manager import CollectionManager
 
 logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------
-# ✔ Always use in-memory Qdrant for Streamlit (no Docker needed)
+# ✔ In-memory Qdrant, only used when VECTOR_STORE_MODE="memory"
+#   (the default "disk" mode keeps per-tenant files in VECTOR_STORE_DIR)
 # ------------------------------------------------------------
 _qdrant_client = QdrantClient(path=":memory:")
 
@@ -70,53 +81,144 @@ def get_qdrant_client():
     return _qdrant_client
 
 
-# ------------------------------------------------------------
-# ✔ Embedding model using OpenAI (no LangChain)
-# ------------------------------------------------------------
-from openai import OpenAI
-import os
+def use_disk_store():
+    """True when vectors live in the persistent memory-mapped store."""
+    return VECTOR_STORE_MODE == "disk"
 
-openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def embed_texts(texts):
-    """Returns embeddings for a list of texts using OpenAI API."""
-    resp = openai.embeddings.create(
-        input=texts,
-        model="text-embedding-3-small"
-    )
-    return [d.embedding for d in resp.data]
+def initialize_qdrant_collection():
+    """Called once during Streamlit setup. Tenant data itself is opened lazily on first use."""
+    if use_disk_store():
+        os.makedirs(VECTOR_STORE_DIR, exist_ok=True)
+        logger.info(f"Using disk vector store at {VECTOR_STORE_DIR}")
+    else:
+        logger.info("Using in-memory Qdrant vector store (not persisted)")
 
 
 # ------------------------------------------------------------
-# ✔ Create collection per tenant
+# ✔ Embeddings from the configured provider (see src/embedding_providers.py)
 # ------------------------------------------------------------
-def ensure_collection(tenant_id, vector_size=1536):
-    """Create a separate vector collection for each tenant."""
-    client = get_qdrant_client()
-    collection_name = f"{tenant_id}_docs"
-
-    existing = client.get_collections().collections
-    if collection_name in [c.name for c in existing]:
-        return collection_name
+def embed_texts(texts):
+    """Returns embeddings for a list of texts; only cache misses reach the provider."""
+    provider = get_embedding_provider()
+    return embed_with_cache(texts, provider.model_id, provider.embed)
+
+async def aembed_texts(texts):
+    """Async embed_texts for the event-loop path."""
+    provider = get_embedding_provider()
+    return await aembed_with_cache(texts, provider.model_id, provider.aembed)
+
+def embed_query(text):
+    """Embedding of one question; repeats are served from the in-process LRU."""
+    model = get_embedding_provider().model_id
+    vector = query_embedding_lru.get(model, text) if query_embedding_lru else None
+    if vector is None:
+        vector = embed_texts([text])[0]
+        if query_embedding_lru:
+            query_embedding_lru.put(model, text, vector)
+    return vector
+
+async def aembed_query(text):
+    """Async embed_query."""
+    model = get_embedding_provider().model_id
+    vector = query_embedding_lru.get(model, text) if query_embedding_lru else None
+    if vector is None:
+        vector = (await aembed_texts([text]))[0]
+        if query_embedding_lru:
+            query_embedding_lru.put(model, text, vector)
+    return vector
 
-    logger.info(f"Creating Qdrant collection for {tenant_id}")
 
-    client.recreate_collection(
+# ------------------------------------------------------------
+# ✔ Create collection per tenant
+# ------------------------------------------------------------
+def _quantization_config(quantization):
+    """Qdrant quantization settings for "int8" / "binary" (None for "none")."""
+    if quantization == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _create_collection(client, collection_name, vector_size, quantization):
+    """Vector size defaults to the embedding provider's; the collection records the model."""
+    provider = get_embedding_provider()
+    vector_size = vector_size or provider.dimension
+    logger.info(
+        f"Creating Qdrant collection {collection_name} "
+        f"({provider.model_id}, {vector_size} dims, quantization: {quantization})"
+    )
+    client.create_collection(
         collection_name=collection_name,
         vectors_config=models.VectorParams(
             size=vector_size,
-            distance=models.Distance.COSINE
+            distance=models.Distance.COSINE,
+            on_disk=quantization != "none",
+        ),
+        quantization_config=_quantization_config(quantization),
+        metadata={"embedding_model": provider.model_id},
+    )
+
+
+collection_manager = CollectionManager(get_qdrant_client, _create_collection, use_disk_store)
+
+
+def ensure_collection(tenant_id, vector_size=None, quantization=None):
+    """
+    Create a separate vector collection for each tenant, sized for the
+    embedding provider's vectors unless `vector_size` is given.
+    `quantization` ("none" / "int8" / "binary", default from config) only
+    applies when the collection is created: codes are kept in RAM and the
+    float vectors on disk. Existence is checked once per tenant and then
+    served from the collection manager's registry.
+    """
+    return collection_manager.collection(tenant_id, vector_size, quantization)
+
+
+def _search_params(tenant_id):
+    """Rescore quantized candidates with the original vectors."""
+    quantization = collection_manager.quantization(tenant_id)
+    if quantization == "none":
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=float(DEFAULT_OVERSAMPLING[quantization]),
         )
     )
-    return collection_name
 
 
 # ------------------------------------------------------------
 # ✔ Add documents to tenant-specific collection
 # ------------------------------------------------------------
+def _to_point_record(chunk):
+    """
+    Normalise a chunk into (id, text, payload).
+
+    Accepts LangChain Documents (what load_and_split_document returns) or
+    plain dicts with a "text" key. The payload is always stored as
+    {"page_content": ..., "metadata": {...}} so retrieval can read it back.
+    """
+    if hasattr(chunk, "page_content"):
+        text = chunk.page_content
+        metadata = dict(chunk.metadata)
+        point_id = getattr(chunk, "id", None)
+    else:
+        text = chunk["text"]
+        metadata = {k: v for k, v in chunk.items() if k not in ("id", "text")}
+        point_id = chunk.get("id")
+
+    point_id = str(point_id or uuid.uuid4())
+    return point_id, text, {"page_content": text, "metadata": metadata}
+
+
 def upsert_documents(tenant_id, chunks):
     """
-    chunks = [
+    chunks = LangChain Documents, or dicts like
+    [
       {
           "id": "...",
           "text": "...",
@@ -125,20 +227,32 @@ def upsert_documents(tenant_id, chunks):
       }
     ]
     """
+    if not chunks:
+        return 0
+
+    records = [_to_point_record(c) for c in chunks]
+    ids = [r[0] for r in records]
+    texts = [r[1] for r in records]
+    payloads = [r[2] for r in records]
+    vectors = embed_texts(texts)
+
+    if use_disk_store():
+        # Opened (and synced with the store) before the vectors are written
+        sparse_index = get_tenant_sparse_index(tenant_id)
+        written = collection_manager.store(tenant_id).upsert(ids, vectors, payloads)
+        sparse_index.add(ids, texts)
+        return written
 
     client = get_qdrant_client()
     collection = ensure_collection(tenant_id)
 
-    texts = [c["text"] for c in chunks]
-    vectors = embed_texts(texts)
-
     points = []
-    for chunk, vector in zip(chunks, vectors):
+    for point_id, vector, payload in zip(ids, vectors, payloads):
         points.append(
             models.PointStruct(
-                id=chunk["id"],
+                id=point_id,
                 vector=vector,
-                payload=chunk
+                payload=payload
             )
         )
 
@@ -146,24 +260,129 @@ def upsert_documents(tenant_id, chunks):
         collection_name=collection,
         points=points
     )
+    get_tenant_sparse_index(tenant_id).add(ids, texts)
 
     return len(points)
 
 
 # ------------------------------------------------------------
-# ✔ Query tenant-specific collection only
+# ✔ Remove documents from tenant-specific collection
 # ------------------------------------------------------------
-def query_documents(tenant_id, query_text, top_k=5):
+def delete_documents(tenant_id, ids):
+    """Delete points by id from the tenant's collection."""
+    ids = [str(i) for i in ids]
+    if not ids:
+        return 0
+
+    get_tenant_sparse_index(tenant_id).remove(ids)
+
+    if use_disk_store():
+        return collection_manager.store(tenant_id).delete(ids)
+
     client = get_qdrant_client()
-    collection = ensure_collection(tenant_id)
+    client.delete(
+        collection_name=ensure_collection(tenant_id),
+        points_selector=models.PointIdsList(points=ids)
+    )
+    return len(ids)
 
-    query_vector = embed_texts([query_text])[0]
 
-    results = client.search(
-        collection_name=collection,
-        query_vector=query_vector,
-        limit=top_k,
+def retrieve_documents(tenant_id, ids):
+    """Fetch points (with payload) by id from the tenant's collection."""
+    ids = [str(i) for i in ids]
+    if not ids:
+        return []
+
+    if use_disk_store():
+        return collection_manager.store(tenant_id).retrieve(ids)
+
+    client = get_qdrant_client()
+    return client.retrieve(
+        collection_name=ensure_collection(tenant_id),
+        ids=ids,
         with_payload=True
     )
 
-    return results
+
+# ------------------------------------------------------------
+# ✔ Keyword (BM25) index kept in step with the vectors
+# ------------------------------------------------------------
+def get_tenant_sparse_index(tenant_id):
+    """
+    The tenant's BM25 index. In disk mode it is persisted next to the vector
+    files; each time it is loaded, chunks the stored vectors have and it
+    lacks (older collections, or a crash between the two writes) are
+    indexed from their payloads.
+    """
+    if not use_disk_store():
+        # In-memory Qdrant is lost on restart, so its keyword index is too
+        return collection_manager.sparse_index(tenant_id, persist=False)
+
+    index = collection_manager.sparse_index(tenant_id)
+    if not index.synced:
+        store = collection_manager.store(tenant_id)
+        added, removed = index.sync(
+            lambda: ((point_id, payload.get("page_content", "")) for point_id, payload in store.points())
+        )
+        if added or removed:
+            logger.info(f"Keyword index for {tenant_id}: indexed {added} stored chunks, dropped {removed} deleted ones")
+    return index
+
+
+def keyword_search(tenant_id, query_text, top_k=20):
+    """[(point_id, bm25_score)] from the tenant's keyword index."""
+    return get_tenant_sparse_index(tenant_id).search(query_text, limit=top_k)
+
+
+def collection_count(tenant_id):
+    """Number of points currently stored for the tenant."""
+    if use_disk_store():
+        return collection_manager.store(tenant_id).count()
+
+    client = get_qdrant_client()
+    return client.count(collection_name=ensure_collection(tenant_id), exact=True).count
+
+
+# ------------------------------------------------------------
+# ✔ Query tenant-specific collection only
+# ------------------------------------------------------------
+def query_documents(tenant_id, query_text, top_k=5, query_vector=None):
+    """Returns scored points (with .id, .score, .payload) from the tenant's collection."""
+    if query_vector is None:
+        query_vector = embed_query(query_text)
+
+    if use_disk_store():
+        return collection_manager.store(tenant_id).search(query_vector, limit=top_k)
+
+    client = get_qdrant_client()
+    collection = ensure_collection(tenant_id)
+
+    with warnings.catch_warnings():
+        # The embedded (":memory:") client always searches exactly and warns that
+        # search params are ignored; against a Qdrant server they take effect.
+        warnings.filterwarnings("ignore", message="Local mode performs exact", category=UserWarning)
+        results = client.query_points(
+            collection_name=collection,
+            query=query_vector,
+            limit=top_k,
+            search_params=_search_params(tenant_id),
+            with_payload=True
+        )
+
+    return results.points
+
+
+async def aquery_documents(tenant_id, query_text, top_k=5, query_vector=None):
+    """
+    Async query_documents. Embedding is awaited on the shared async client;
+    the search itself is in-process (numpy / local Qdrant) and runs in a
+    worker thread so it does not stall other conversations on the loop.
+    """
+    if query_vector is None:
+        query_vector = await aembed_query(query_text)
+    return await asyncio.to_thread(query_documents, tenant_id, query_text, top_k, query_vector)
+
+
+def collection_stats(tenant_ids=None):
+    """Per-tenant vector counts and memory footprint (see CollectionManager.stats)."""
+    return collection_manager.stats(tenant_ids)
@@ -0,0 +1,131 @@
+# src/rag/answer_cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+
+import numpy as np
+
+from src.config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# ✔ Per-tenant cache of answers keyed by question embedding
+# ------------------------------------------------------------
+class SemanticAnswerCache:
+    """
+    Returns a stored answer when a new question embedding is within
+    `threshold` cosine similarity of a cached one for the same tenant.
+
+    Each entry remembers the tenant's document version at the time the
+    answer was produced; ingestion bumps the version, so answers computed
+    against an older document set are never served.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._versions = {}
+        self._ids = count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def tenant_version(self, tenant_id: str) -> int:
+        with self._lock:
+            return self._versions.get(tenant_id, 0)
+
+    def invalidate_tenant(self, tenant_id: str):
+        """Called when the tenant's documents change."""
+        with self._lock:
+            self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+            dropped = len(self._entries.pop(tenant_id, {}))
+        if dropped:
+            logger.info(f"Semantic cache: dropped {dropped} answers for {tenant_id}")
+
+    def lookup(self, tenant_id: str, query_vector):
+        """Return (answer, citations) for a close enough cached question, else None."""
+        query = _unit(query_vector)
+        now = time.time()
+
+        with self._lock:
+            entries = self._entries.get(tenant_id)
+            version = self._versions.get(tenant_id, 0)
+            if entries:
+                for key in [k for k, e in entries.items()
+                            if e["version"] != version or now - e["created_at"] > self.ttl_seconds]:
+                    del entries[key]
+
+            if not entries:
+                self.misses += 1
+                return None
+
+            keys = list(entries)
+            scores = np.stack([entries[k]["vector"] for k in keys]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            entries.move_to_end(keys[best])
+            entry = entries[keys[best]]
+            self.hits += 1
+
+        logger.info(f"Semantic cache hit for {tenant_id} (similarity {scores[best]:.3f}): {entry['question']!r}")
+        return entry["answer"], list(entry["citations"])
+
+    def store(self, tenant_id: str, question: str, query_vector, answer: str, citations: list, version: int):
+        """`version` is the tenant_version() read before retrieval started."""
+        with self._lock:
+            if version != self._versions.get(tenant_id, 0):
+                # Documents changed while this answer was being generated
+                return
+            entries = self._entries.setdefault(tenant_id, OrderedDict())
+            entries[next(self._ids)] = {
+                "question": question,
+                "vector": _unit(query_vector),
+                "answer": answer,
+                "citations": list(citations),
+                "version": version,
+                "created_at": time.time(),
+            }
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": {t: len(e) for t, e in self._entries.items()},
+            }
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+answer_cache = SemanticAnswerCache() if SEMANTIC_CACHE_ENABLED else None
+
+
+def invalidate_tenant_answers(tenant_id: str):
+    if answer_cache is not None:
+        answer_cache.invalidate_tenant(tenant_id)
@@ -1,60 +1,307 @@
 # src/rag/chat_service.py
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
 # Import the new manual retrieval function
-from src.rag.retrieval import get_tenant_docs, format_retrieved_context
+from src.rag.retrieval import get_tenant_docs, aget_tenant_docs, format_retrieved_context
 from src.rag.prompt_templates import SYSTEM_PROMPT
-from src.config import OPENAI_API_KEY, LLM_MODEL
-from src.database import log_conversation
+from src.rag.answer_cache import answer_cache
+from src.rag.validated_answers import validated_answers, normalize_question
+from src.rag.single_flight import SingleFlight
+from src.rag.conversation import ConversationMemory
+from src.qdrant_client import embed_query, aembed_query
+from src.clients import get_chat_model
+from src.database import log_conversation, log_conversation_nowait
+from src.config import REQUEST_COALESCING_ENABLED
+import asyncio
 import json
 
-def get_rag_response(query: str, tenant_id: str):
+NO_CONTEXT_ANSWER = "I cannot answer this question based on the tenant's documents provided."
+
+# Concurrent identical questions for a tenant share one pipeline run
+coalescer = SingleFlight() if REQUEST_COALESCING_ENABLED else None
+
+
+def _build_messages(query: str, context: str, history=None, standalone_query: str = None):
+    """System prompt, then earlier turns (summary + recent messages), then the question."""
+    formatted_system_prompt = SYSTEM_PROMPT.format(context=context, question=standalone_query or query)
+    return [
+        SystemMessage(content=formatted_system_prompt),
+        *(history or []),
+        HumanMessage(content=query)
+    ]
+
+
+def _coalesce(memory) -> bool:
+    """Only history-free questions can share an answer with other users."""
+    return coalescer is not None and (memory is None or not memory.has_history)
+
+
+def _remember_turn(memory, query: str, answer: str, citations_list):
+    if memory is not None and answer and citations_list != ["Error"]:
+        memory.add_turn(query, answer)
+
+
+def _standalone(query: str, search_query: str):
+    """The rewritten question to log next to the raw one, or None when it was not rewritten."""
+    return search_query if search_query != query else None
+
+
+def _validated_answer(tenant_id: str, query: str, query_vector=None):
     """
-    Main service function for RAG: manually retrieves context, calls LLM, and logs interaction.
+    (answer, citations) an admin validated for this question, or None.
+    Without `query_vector` only an exact question match is checked.
     """
-    
-    answer = ""
-    citations_list = []
+    if validated_answers is None:
+        return None
+    return validated_answers.lookup(tenant_id, query, query_vector)
+
+
+def _cached_answer(tenant_id: str, query_vector):
+    """(answer, citations) from the semantic cache, or None."""
+    if answer_cache is None:
+        return None
+    return answer_cache.lookup(tenant_id, query_vector)
+
+
+def _docs_version(tenant_id: str) -> int:
+    return answer_cache.tenant_version(tenant_id) if answer_cache is not None else 0
+
+
+def _coalescing_key(tenant_id: str, query: str):
+    return tenant_id, normalize_question(query)
+
+
+def _remember_answer(tenant_id, query, query_vector, answer, citations_list, docs_version):
+    if answer_cache is not None:
+        answer_cache.store(tenant_id, query, query_vector, answer, citations_list, docs_version)
+
 
+def _answer(query: str, tenant_id: str, memory: ConversationMemory = None, search_query: str = None):
+    """
+    (answer, citations) for the question: an admin-validated or cached
+    answer when there is one, else retrieval + LLM. Does not log.
+    `search_query` is the follow-up rewritten as a standalone question
+    (used for the lookups and the search); with `memory` the earlier turns
+    go into the prompt.
+    """
+    search_query = search_query or query
     try:
-        # 1. Initialize LLM
-        llm = ChatOpenAI(model=LLM_MODEL, api_key=OPENAI_API_KEY, temperature=0)
-        
-        # 2. Retrieve Documents (Using Manual Qdrant Call)
-        # This bypasses the 'retriever.invoke' error
-        retrieved_docs = get_tenant_docs(query, tenant_id)
-        
-        # 3. Format Context and Citations
+        # 1. Shared LLM client (pooled keep-alive connections)
+        llm = get_chat_model()
+
+        # 2. Admin-validated answer for this exact question: no embedding needed
+        cached = _validated_answer(tenant_id, search_query)
+        if cached:
+            return cached
+
+        # 3. Embed the question once: used for the validated/semantic caches and the search
+        query_vector = embed_query(search_query)
+
+        cached = _validated_answer(tenant_id, search_query, query_vector) or _cached_answer(tenant_id, query_vector)
+        if cached:
+            return cached
+
+        docs_version = _docs_version(tenant_id)
+
+        # 4. Retrieve Documents from the tenant's collection
+        retrieved_docs = get_tenant_docs(search_query, tenant_id, query_vector=query_vector)
+
+        # 5. Format Context and Citations
         context, citations_list = format_retrieved_context(retrieved_docs)
-        
+
         # Handle case where no documents are found
         if not context:
-            answer = "I cannot answer this question based on the tenant's documents provided."
-            citations_json = json.dumps([])
-            log_conversation(tenant_id, query, answer, citations_json)
-            return answer, []
-
-        # 4. Construct the Messages for the LLM
-        formatted_system_prompt = SYSTEM_PROMPT.format(context=context, question=query)
-        
-        messages = [
-            SystemMessage(content=formatted_system_prompt),
-            HumanMessage(content=query)
-        ]
-
-        # 5. Generate Response
+            return NO_CONTEXT_ANSWER, []
+
+        # 6. Construct the Messages for the LLM
+        history = memory.history_messages() if memory is not None else []
+        messages = _build_messages(query, context, history, search_query)
+
+        # 7. Generate Response
         response_message = llm.invoke(messages)
         answer = response_message.content
 
+        # Answers shaped by one user's history are not reused for others
+        if not history:
+            _remember_answer(tenant_id, search_query, query_vector, answer, citations_list, docs_version)
+        return answer, citations_list
+
     except Exception as e:
-        answer = f"An error occurred during RAG processing: {str(e)}"
-        citations_list = ["Error"]
-        print(f"RAG Error: {e}") 
-        
-    # 6. Log Conversation to SQLite
-    citations_json = json.dumps(citations_list)
-    log_conversation(tenant_id, query, answer, citations_json)
-
-    return answer, citations_list
\ No newline at end of file
+        print(f"RAG Error: {e}")
+        return f"An error occurred during RAG processing: {str(e)}", ["Error"]
+
+
+def get_rag_response(query: str, tenant_id: str, memory: ConversationMemory = None):
+    """
+    Main service function for RAG: manually retrieves context, calls LLM, and logs interaction.
+    Identical questions already being answered for the tenant wait for
+    that answer instead of running the pipeline again; each is logged.
+    Pass the chat's `memory` for multi-turn conversations; the turn is
+    added to it.
+    """
+    search_query = query
+    if _coalesce(memory):
+        answer, citations_list = coalescer.do(_coalescing_key(tenant_id, query), lambda: _answer(query, tenant_id))
+    else:
+        search_query = memory.standalone_question(query) if memory is not None else query
+        answer, citations_list = _answer(query, tenant_id, memory, search_query)
+    citations_list = list(citations_list)
+
+    # 8. Log Conversation to SQLite (with the question the answer was looked up by)
+    log_conversation(tenant_id, query, answer, json.dumps(citations_list), _standalone(query, search_query))
+    _remember_turn(memory, query, answer, citations_list)
+
+    return answer, citations_list
+
+
+async def _aanswer(query: str, tenant_id: str, memory: ConversationMemory = None, search_query: str = None):
+    """Async _answer."""
+    search_query = search_query or query
+    try:
+        llm = get_chat_model()
+
+        # The first lookup for a tenant loads its validated answers from SQLite
+        cached = await asyncio.to_thread(_validated_answer, tenant_id, search_query)
+        if cached:
+            return cached
+
+        query_vector = await aembed_query(search_query)
+
+        cached = _validated_answer(tenant_id, search_query, query_vector) or _cached_answer(tenant_id, query_vector)
+        if cached:
+            return cached
+
+        docs_version = _docs_version(tenant_id)
+
+        retrieved_docs = await aget_tenant_docs(search_query, tenant_id, query_vector=query_vector)
+        context, citations_list = format_retrieved_context(retrieved_docs)
+
+        if not context:
+            return NO_CONTEXT_ANSWER, []
+
+        history = memory.history_messages() if memory is not None else []
+        response_message = await llm.ainvoke(_build_messages(query, context, history, search_query))
+        answer = response_message.content
+
+        if not history:
+            _remember_answer(tenant_id, search_query, query_vector, answer, citations_list, docs_version)
+        return answer, citations_list
+
+    except Exception as e:
+        print(f"RAG Error: {e}")
+        return f"An error occurred during RAG processing: {str(e)}", ["Error"]
+
+
+async def aget_rag_response(query: str, tenant_id: str, memory: ConversationMemory = None):
+    """
+    Async get_rag_response: embedding, search and the LLM call are awaited
+    on shared async clients, so one event loop can serve many tenant
+    conversations at once. The log write is scheduled and not awaited.
+    """
+    search_query = query
+    if _coalesce(memory):
+        answer, citations_list = await coalescer.ado(
+            _coalescing_key(tenant_id, query), lambda: _aanswer(query, tenant_id)
+        )
+    else:
+        search_query = await memory.astandalone_question(query) if memory is not None else query
+        answer, citations_list = await _aanswer(query, tenant_id, memory, search_query)
+    citations_list = list(citations_list)
+
+    log_conversation_nowait(tenant_id, query, answer, json.dumps(citations_list), _standalone(query, search_query))
+    _remember_turn(memory, query, answer, citations_list)
+
+    return answer, citations_list
+
+
+def _stream_answer(query: str, tenant_id: str, memory: ConversationMemory = None, search_query: str = None):
+    """Events of stream_rag_response, without logging."""
+
+    answer_parts = []
+    citations_sent = False
+    search_query = search_query or query
+
+    try:
+        llm = get_chat_model()
+
+        cached = _validated_answer(tenant_id, search_query)
+        if cached is None:
+            query_vector = embed_query(search_query)
+            cached = _validated_answer(tenant_id, search_query, query_vector) or _cached_answer(tenant_id, query_vector)
+        if cached:
+            answer, citations_list = cached
+            citations_sent = True
+            yield "citations", citations_list
+            yield "delta", answer
+            return
+
+        docs_version = _docs_version(tenant_id)
+
+        retrieved_docs = get_tenant_docs(search_query, tenant_id, query_vector=query_vector)
+        context, citations_list = format_retrieved_context(retrieved_docs)
+
+        citations_sent = True
+        yield "citations", citations_list
+
+        if not context:
+            yield "delta", NO_CONTEXT_ANSWER
+            return
+
+        history = memory.history_messages() if memory is not None else []
+        for chunk in llm.stream(_build_messages(query, context, history, search_query)):
+            if chunk.content:
+                answer_parts.append(chunk.content)
+                yield "delta", chunk.content
+
+        if not history:
+            _remember_answer(tenant_id, search_query, query_vector, "".join(answer_parts), citations_list, docs_version)
+
+    except Exception as e:
+        error = f"An error occurred during RAG processing: {str(e)}"
+        print(f"RAG Error: {e}")
+        # Logged with the error marker even when real citations were already sent
+        yield "error", ["Error"]
+        if not citations_sent:
+            yield "citations", ["Error"]
+        # Keep whatever was already streamed so the user sees where it stopped
+        yield "delta", f"\n\n{error}" if answer_parts else error
+
+
+def stream_rag_response(query: str, tenant_id: str, memory: ConversationMemory = None):
+    """
+    Streaming variant of get_rag_response.
+
+    Yields ("citations", list) once, as soon as retrieval finishes, then
+    ("delta", str) for each piece of the answer as the LLM produces it.
+    Concurrent identical questions share one stream (a late joiner first
+    receives what was already produced). The full answer is logged once
+    the stream ends, and added to `memory` if it was read to the end.
+    """
+    search_query = query
+    if _coalesce(memory):
+        events = coalescer.stream(_coalescing_key(tenant_id, query), lambda: _stream_answer(query, tenant_id))
+    else:
+        search_query = memory.standalone_question(query) if memory is not None else query
+        events = _stream_answer(query, tenant_id, memory, search_query)
+
+    answer_parts = []
+    citations_list = []
+    completed = False
+    try:
+        for kind, value in events:
+            if kind == "error":
+                citations_list = value
+                continue
+            if kind == "citations":
+                citations_list = list(value)
+            else:
+                answer_parts.append(value)
+            yield kind, value
+        completed = True
+    finally:
+        log_conversation(
+            tenant_id, query, "".join(answer_parts), json.dumps(citations_list), _standalone(query, search_query)
+        )
+        if completed:
+            _remember_turn(memory, query, "".join(answer_parts), citations_list)
@@ -0,0 +1,149 @@
+# src/rag/context_packer.py
+
+import logging
+import re
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+from src.config import CONTEXT_TOKEN_BUDGET, CHUNK_OVERLAP, LLM_MODEL
+from src.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Chunks sharing this much of their word shingles carry the same information
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+# Shortest overlap accepted as "these two chunks were adjacent in the file"
+MIN_MERGE_OVERLAP = 20
+
+
+@dataclass
+class PackStats:
+    input_chunks: int = 0
+    kept_chunks: int = 0
+    duplicates_dropped: int = 0
+    merged: int = 0
+    input_tokens: int = 0
+    packed_tokens: int = 0
+    token_budget: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.input_tokens - self.packed_tokens
+
+
+def citation_for(doc: Document) -> str:
+    source = doc.metadata.get('source', 'Unknown Document')
+    # Handle page number being int/str or missing
+    page = doc.metadata.get('page', 'N/A')
+    return f"{source} (Page {page})"
+
+
+def render_chunk(doc: Document) -> str:
+    return f"Source: {citation_for(doc)}\nContent: {doc.page_content}"
+
+
+# ------------------------------------------------------------
+# ✔ Dedupe, merge, then fill the token budget by relevance
+# ------------------------------------------------------------
+def pack_context(docs: list[Document], token_budget: int = CONTEXT_TOKEN_BUDGET, model: str = LLM_MODEL):
+    """
+    Reduce retrieved chunks (best first) to what fits in `token_budget`:
+      1) drop near-duplicates of a better ranked chunk
+      2) merge chunks from the same source/page whose text overlaps
+         (neighbouring CHUNK_OVERLAP windows) into one passage
+      3) keep passages in relevance order while they fit the budget
+    Returns (packed_docs, PackStats).
+    """
+    stats = PackStats(input_chunks=len(docs), token_budget=token_budget)
+    stats.input_tokens = sum(count_tokens(render_chunk(d), model) for d in docs)
+
+    passages = []
+    shingles = []
+    for doc in docs:
+        doc_shingles = _shingles(doc.page_content)
+        if any(_similarity(doc_shingles, kept) >= NEAR_DUPLICATE_THRESHOLD for kept in shingles):
+            stats.duplicates_dropped += 1
+            continue
+
+        merged = False
+        for i, passage in enumerate(passages):
+            combined = _merge_adjacent(passage, doc)
+            if combined is not None:
+                passages[i] = combined
+                shingles[i] = shingles[i] | doc_shingles
+                stats.merged += 1
+                merged = True
+                break
+        if not merged:
+            passages.append(doc)
+            shingles.append(doc_shingles)
+
+    packed = []
+    used = 0
+    separator_tokens = count_tokens("\n\n---\n\n", model)
+    for passage in passages:
+        cost = count_tokens(render_chunk(passage), model) + (separator_tokens if packed else 0)
+        if used + cost <= token_budget:
+            packed.append(passage)
+            used += cost
+        elif not packed:
+            # The single best passage is larger than the whole budget: keep its head
+            header = count_tokens(render_chunk(Document(page_content="", metadata=passage.metadata)), model)
+            text = truncate_to_tokens(passage.page_content, max(token_budget - header, 0), model)
+            passage = Document(page_content=text, metadata=passage.metadata)
+            packed.append(passage)
+            used += count_tokens(render_chunk(passage), model)
+
+    stats.kept_chunks = len(packed)
+    stats.packed_tokens = used
+    return packed, stats
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _similarity(a: set, b: set) -> float:
+    """Overlap coefficient, so a chunk contained in a larger passage also counts."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _merge_adjacent(first: Document, second: Document):
+    """One passage if the two chunks come from the same place and overlap, else None."""
+    if (first.metadata.get("source"), first.metadata.get("page")) != (
+        second.metadata.get("source"), second.metadata.get("page")
+    ):
+        return None
+
+    a, b = first.page_content, second.page_content
+    overlap = _overlap(a, b)
+    if overlap:
+        text = a + b[overlap:]
+    else:
+        overlap = _overlap(b, a)
+        if not overlap:
+            return None
+        text = b + a[overlap:]
+    return Document(page_content=text, metadata=first.metadata)
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b` (0 if too short)."""
+    window = a[-(CHUNK_OVERLAP * 2):]
+    probe = b[:MIN_MERGE_OVERLAP]
+    if len(probe) < MIN_MERGE_OVERLAP:
+        return 0
+    start = window.find(probe)
+    while start != -1:
+        tail = window[start:]
+        if b.startswith(tail):
+            return len(tail)
+        start = window.find(probe, start + 1)
+    return 0
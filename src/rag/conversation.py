@@ -0,0 +1,203 @@
+# src/rag/conversation.py
+
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+
+from src.config import LLM_MODEL, QUERY_REWRITE_ENABLED, HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_MAX_TOKENS
+from src.clients import get_chat_model
+from src.rag.prompt_templates import HISTORY_SUMMARY_PROMPT, CONDENSE_QUESTION_PROMPT, SUMMARIZE_HISTORY_PROMPT
+from src.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Words that only make sense with the earlier turns ("is it free?", "what about the second one?")
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|one|ones|former|latter|above|same|else|another|other|again)\b"
+    r"|^\s*(and|or|but|so|also|then|what about|how about)\b",
+    re.IGNORECASE,
+)
+# Questions this short are usually follow-ups too ("why?", "and pricing?")
+SHORT_QUESTION_WORDS = 3
+# Turns shown to the question rewriter, and how much of each answer
+REWRITE_CONTEXT_TURNS = 3
+REWRITE_ANSWER_TOKENS = 150
+
+# Summaries are written off the request path
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+
+
+def looks_like_follow_up(question: str) -> bool:
+    """Cheap check for questions that depend on earlier turns (no LLM call)."""
+    return len(question.split()) <= SHORT_QUESTION_WORDS or bool(FOLLOW_UP_PATTERN.search(question))
+
+
+# ------------------------------------------------------------
+# ✔ Token-bounded chat history with a rolling summary
+# ------------------------------------------------------------
+class ConversationMemory:
+    """
+    History of one chat: the newest turns verbatim, older ones folded into a
+    running summary.
+
+    The prompt gets at most `token_budget` tokens of turns plus a summary of
+    at most `summary_max_tokens`, however long the chat gets. When stored
+    turns outgrow the budget, the oldest are merged into the summary by the
+    LLM in a background thread, so no answer waits for it; until then the
+    overflow is simply left out of the prompt.
+
+    Follow-up questions are rewritten into standalone ones before retrieval,
+    which needs the question itself to name what it is about.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, summary_max_tokens: int = HISTORY_SUMMARY_MAX_TOKENS,
+                 model: str = LLM_MODEL, llm_fn=get_chat_model, rewrite: bool = QUERY_REWRITE_ENABLED):
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.model = model
+        self.llm_fn = llm_fn
+        self.rewrite = rewrite
+        self.summary = ""
+        self._turns = []  # (question, answer, tokens), oldest first
+        self._lock = threading.Lock()
+        self._summarizing = False
+        self.turns_total = 0
+        self.turns_summarized = 0
+        self.rewrites = 0
+
+    @property
+    def has_history(self) -> bool:
+        with self._lock:
+            return bool(self._turns or self.summary)
+
+    def add_turn(self, question: str, answer: str):
+        # One long answer must not crowd every other turn out of the budget
+        answer = truncate_to_tokens(answer, max(1, self.token_budget // 2), self.model)
+        tokens = count_tokens(question, self.model) + count_tokens(answer, self.model)
+        with self._lock:
+            self._turns.append((question, answer, tokens))
+            self.turns_total += 1
+        self._schedule_summary()
+
+    def _recent_turns(self) -> list:
+        """Newest turns that fit the token budget (always at least the last one)."""
+        selected, used = [], 0
+        for turn in reversed(self._turns):
+            if selected and used + turn[2] > self.token_budget:
+                break
+            selected.append(turn)
+            used += turn[2]
+        return selected[::-1]
+
+    # --------------------------------------------------------
+    # Prompt history
+    # --------------------------------------------------------
+    def history_messages(self) -> list:
+        """Summary and recent turns as chat messages, to go before the new question."""
+        with self._lock:
+            summary, turns = self.summary, self._recent_turns()
+        messages = []
+        if summary:
+            messages.append(SystemMessage(content=HISTORY_SUMMARY_PROMPT.format(summary=summary)))
+        for question, answer, _ in turns:
+            messages += [HumanMessage(content=question), AIMessage(content=answer)]
+        return messages
+
+    # --------------------------------------------------------
+    # Incremental summarisation
+    # --------------------------------------------------------
+    def _schedule_summary(self):
+        with self._lock:
+            if self._summarizing:
+                return
+            overflow = self._turns[:len(self._turns) - len(self._recent_turns())]
+            if not overflow:
+                return
+            self._summarizing = True
+            summary = self.summary
+        _summary_pool.submit(self._fold, summary, overflow)
+
+    def _fold(self, summary: str, turns: list):
+        try:
+            new_summary = self._summarize(summary, turns)
+        except Exception as e:
+            # Still drop the turns: memory and prompt must stay bounded
+            logger.warning(f"History summary failed ({e}); forgetting {len(turns)} old turns")
+            new_summary = summary
+        with self._lock:
+            self.summary = new_summary
+            del self._turns[:len(turns)]
+            self.turns_summarized += len(turns)
+            self._summarizing = False
+        # More turns may have overflowed meanwhile
+        self._schedule_summary()
+
+    def _summarize(self, summary: str, turns: list) -> str:
+        prompt = SUMMARIZE_HISTORY_PROMPT.format(
+            summary=summary or "(none yet)",
+            turns="\n\n".join(f"User: {q}\nAssistant: {a}" for q, a, _ in turns),
+            max_words=int(self.summary_max_tokens * 0.75),
+        )
+        response = self.llm_fn().invoke([HumanMessage(content=prompt)])
+        return truncate_to_tokens(response.content.strip(), self.summary_max_tokens, self.model)
+
+    # --------------------------------------------------------
+    # Standalone questions for retrieval
+    # --------------------------------------------------------
+    def _rewrite_messages(self, question: str):
+        """Rewrite prompt, or None when the question should be used as is."""
+        if not self.rewrite or not looks_like_follow_up(question):
+            return None
+        with self._lock:
+            summary, turns = self.summary, self._turns[-REWRITE_CONTEXT_TURNS:]
+        if not summary and not turns:
+            return None
+        lines = [f"(Earlier: {summary})"] if summary else []
+        for q, a, _ in turns:
+            lines += [f"User: {q}", f"Assistant: {truncate_to_tokens(a, REWRITE_ANSWER_TOKENS, self.model)}"]
+        return [HumanMessage(content=CONDENSE_QUESTION_PROMPT.format(history="\n".join(lines), question=question))]
+
+    def _accept_rewrite(self, question: str, rewritten: str) -> str:
+        rewritten = rewritten.strip().splitlines()[0].strip().strip('"') if rewritten.strip() else ""
+        if not rewritten:
+            return question
+        if rewritten != question:
+            self.rewrites += 1
+            logger.info(f"Follow-up rewritten: {question!r} -> {rewritten!r}")
+        return rewritten
+
+    def standalone_question(self, question: str) -> str:
+        """The question made self-contained (unchanged when it already is or there is no history)."""
+        messages = self._rewrite_messages(question)
+        if messages is None:
+            return question
+        try:
+            return self._accept_rewrite(question, self.llm_fn().invoke(messages).content)
+        except Exception as e:
+            logger.warning(f"Question rewrite failed ({e}); searching with the original question")
+            return question
+
+    async def astandalone_question(self, question: str) -> str:
+        """Async standalone_question."""
+        messages = self._rewrite_messages(question)
+        if messages is None:
+            return question
+        try:
+            return self._accept_rewrite(question, (await self.llm_fn().ainvoke(messages)).content)
+        except Exception as e:
+            logger.warning(f"Question rewrite failed ({e}); searching with the original question")
+            return question
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "turns": self.turns_total,
+                "turns_in_memory": len(self._turns),
+                "turns_summarized": self.turns_summarized,
+                "summary_tokens": count_tokens(self.summary, self.model) if self.summary else 0,
+                "history_tokens": sum(t[2] for t in self._recent_turns()),
+                "rewrites": self.rewrites,
+            }
@@ -19,4 +19,35 @@ Your goal is to provide accurate answers based *strictly* on the retrieved conte
 
 [QUESTION]:
 {question}
-"""
\ No newline at end of file
+"""
+
+# Multi-turn chat (see src/rag/conversation.py)
+HISTORY_SUMMARY_PROMPT = """
+Summary of the earlier conversation (for reference only, not a source of facts):
+{summary}
+"""
+
+CONDENSE_QUESTION_PROMPT = """
+Rewrite the user's last message as a standalone question that can be understood without the conversation.
+Resolve pronouns and references ("it", "that one", "the second one") using the conversation.
+Keep names, codes and numbers exactly as written. If the message is already standalone, return it unchanged.
+Reply with the question only.
+
+[CONVERSATION]:
+{history}
+
+[LAST MESSAGE]:
+{question}
+"""
+
+SUMMARIZE_HISTORY_PROMPT = """
+Update the running summary of a conversation between a user and a document assistant.
+Keep the topics, documents, names, codes and numbers that later questions may refer to; drop pleasantries.
+Write at most {max_words} words.
+
+[CURRENT SUMMARY]:
+{summary}
+
+[NEW TURNS]:
+{turns}
+"""
@@ -0,0 +1,244 @@
+# src/rag/reranker.py
+
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from src.config import (
+    RERANKER,
+    RERANK_MODEL,
+    RERANK_TOP_N,
+    RERANK_BUDGET_MS,
+    RERANK_BUDGET_MS_TENANTS,
+    LOCAL_EMBEDDING_THREADS,
+    LOCAL_EMBEDDING_BATCH_SIZE,
+    LOCAL_EMBEDDING_CACHE_DIR,
+)
+from src.sparse_index import tokenize, BM25_K1, BM25_B
+
+logger = logging.getLogger(__name__)
+
+# Weight of the retrieval rank in the lexical score (the rest is BM25)
+LEXICAL_RANK_WEIGHT = 0.3
+# Smoothing of the per-candidate cost estimate
+COST_EWMA_ALPHA = 0.2
+# After this many budget skips in a row, rerank once anyway to refresh the estimate
+PROBE_AFTER_SKIPS = 20
+
+
+# ------------------------------------------------------------
+# ✔ Scorers: one relevance score per candidate text, higher is better
+# ------------------------------------------------------------
+class LexicalScorer:
+    """
+    BM25 of the question terms over the candidate set only, blended with
+    the retrieval rank so chunks that matched only semantically are not
+    pushed out by incidental keyword hits. Pure Python, no model.
+    """
+
+    name = "lexical"
+
+    def __init__(self, rank_weight: float = LEXICAL_RANK_WEIGHT):
+        self.rank_weight = rank_weight
+
+    def score(self, query: str, texts: list[str], query_vector=None) -> list:
+        n = len(texts)
+        prior = [1.0 - rank / n for rank in range(n)]
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return prior
+
+        docs = [Counter(tokenize(text)) for text in texts]
+        lengths = [sum(d.values()) for d in docs]
+        avg_length = (sum(lengths) / n) or 1.0
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for d in docs if term in d)
+            idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+        bm25 = []
+        for d, length in zip(docs, lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            bm25.append(sum(
+                idf[term] * d[term] * (BM25_K1 + 1) / (d[term] + norm)
+                for term in query_terms if term in d
+            ))
+        top = max(bm25) or 1.0
+        w = self.rank_weight
+        return [(1 - w) * s / top + w * p for s, p in zip(bm25, prior)]
+
+
+class EmbeddingScorer:
+    """
+    Cosine between the question and each chunk embedding. Chunk vectors
+    come from the embedding cache when the chunks were indexed with it on,
+    so this is a lookup rather than a provider call.
+    """
+
+    name = "embedding"
+
+    def __init__(self, embed_fn=None):
+        self.embed_fn = embed_fn
+
+    def score(self, query: str, texts: list[str], query_vector=None) -> list:
+        embed = self.embed_fn
+        if embed is None:
+            from src.qdrant_client import embed_texts as embed
+        if query_vector is None:
+            query_vector = embed([query])[0]
+        vectors = np.asarray(embed(list(texts)), dtype=np.float32)
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+        norms[norms == 0] = 1.0
+        return ((vectors @ query_vector) / norms).tolist()
+
+
+class CrossEncoderScorer:
+    """
+    Local cross-encoder (ONNX Runtime via fastembed) reading question and
+    chunk together. Most accurate, and the most expensive per candidate.
+    The model is loaded on first use; calls are serialised because ONNX
+    Runtime already spreads each batch over the available cores.
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, model: str = RERANK_MODEL, threads: int = LOCAL_EMBEDDING_THREADS,
+                 batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE, cache_dir: str = LOCAL_EMBEDDING_CACHE_DIR):
+        self.model = model
+        self.threads = threads or None
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    def score(self, query: str, texts: list[str], query_vector=None) -> list:
+        with self._lock:
+            if self._encoder is None:
+                from fastembed.rerank.cross_encoder import TextCrossEncoder
+                logger.info(f"Loading cross-encoder {self.model}")
+                self._encoder = TextCrossEncoder(model_name=self.model, cache_dir=self.cache_dir, threads=self.threads)
+            return [float(s) for s in self._encoder.rerank(query, list(texts), batch_size=self.batch_size)]
+
+
+def build_scorer(kind: str = RERANKER):
+    """Scorer for RERANKER ("none" -> None); cross-encoder needs fastembed."""
+    if kind == "none":
+        return None
+    if kind == "cross-encoder":
+        try:
+            import fastembed  # noqa: F401
+        except ImportError:
+            logger.warning("RERANKER=cross-encoder needs fastembed (pip install fastembed); using lexical reranking")
+            return LexicalScorer()
+        return CrossEncoderScorer()
+    if kind == "embedding":
+        return EmbeddingScorer()
+    if kind == "lexical":
+        return LexicalScorer()
+    raise ValueError(f"Unknown RERANKER {kind!r}; expected cross-encoder, lexical, embedding or none")
+
+
+# ------------------------------------------------------------
+# ✔ Reranking stage with a per-tenant latency budget
+# ------------------------------------------------------------
+class Reranker:
+    """
+    Reorders retrieved Documents with `scorer` and keeps the best `top_n`.
+
+    Each tenant has a budget (ms) for retrieval + reranking. The stage keeps
+    a running estimate of the scorer's cost per candidate; when the time
+    left after retrieval cannot cover it, the retrieval order is kept (still
+    cut to `top_n`) so a slow reranker never holds up the answer. A scorer
+    error also falls back to the retrieval order.
+    """
+
+    def __init__(self, scorer, top_n: int = RERANK_TOP_N, budget_ms: float = RERANK_BUDGET_MS,
+                 tenant_budgets: dict = None):
+        self.scorer = scorer
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+        self.tenant_budgets = dict(RERANK_BUDGET_MS_TENANTS if tenant_budgets is None else tenant_budgets)
+        self._lock = threading.Lock()
+        self._cost_per_doc_ms = None
+        self._skips_in_row = 0
+        self.reranked = 0
+        self.skipped = 0
+        self.failed = 0
+        self.total_ms = 0.0
+
+    def budget_for(self, tenant_id: str) -> float:
+        return self.tenant_budgets.get(tenant_id, self.budget_ms)
+
+    def _fits(self, tenant_id: str, candidates: int, started: float) -> bool:
+        budget = self.budget_for(tenant_id)
+        if budget <= 0:
+            return False
+        remaining = budget - ((time.perf_counter() - started) * 1000 if started else 0.0)
+        with self._lock:
+            if self._cost_per_doc_ms is None or self._skips_in_row >= PROBE_AFTER_SKIPS:
+                return remaining > 0
+            return self._cost_per_doc_ms * candidates <= remaining
+
+    def rerank(self, query: str, docs: list, tenant_id: str, top_n: int = None, started: float = None,
+               query_vector=None) -> list:
+        """
+        The best `top_n` of `docs` for `query`. `started` is the
+        time.perf_counter() at which retrieval began (counts against the budget).
+        """
+        top_n = top_n or self.top_n
+        if len(docs) <= 1:
+            return docs[:top_n]
+
+        if not self._fits(tenant_id, len(docs), started):
+            with self._lock:
+                self.skipped += 1
+                self._skips_in_row += 1
+            logger.info(f"Reranking skipped for {tenant_id}: over its {self.budget_for(tenant_id):.0f} ms budget")
+            return docs[:top_n]
+
+        t0 = time.perf_counter()
+        try:
+            scores = self.scorer.score(query, [d.page_content for d in docs], query_vector)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.warning(f"Reranking failed ({e}); keeping retrieval order")
+            return docs[:top_n]
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        with self._lock:
+            per_doc = elapsed_ms / len(docs)
+            # The first call may include loading the model; it is not a cost sample
+            if self.reranked and self._cost_per_doc_ms is None:
+                self._cost_per_doc_ms = per_doc
+            elif self.reranked:
+                self._cost_per_doc_ms += COST_EWMA_ALPHA * (per_doc - self._cost_per_doc_ms)
+            self._skips_in_row = 0
+            self.reranked += 1
+            self.total_ms += elapsed_ms
+
+        # Stable sort: ties keep the retrieval order
+        order = sorted(range(len(docs)), key=lambda i: -scores[i])
+        return [docs[i] for i in order[:top_n]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "scorer": self.scorer.name,
+                "top_n": self.top_n,
+                "budget_ms": self.budget_ms,
+                "reranked": self.reranked,
+                "skipped_over_budget": self.skipped,
+                "failed": self.failed,
+                "avg_ms": round(self.total_ms / self.reranked, 2) if self.reranked else 0.0,
+                "est_ms_per_candidate": round(self._cost_per_doc_ms, 4) if self._cost_per_doc_ms else None,
+            }
+
+
+_scorer = build_scorer()
+reranker = Reranker(_scorer) if _scorer is not None else None
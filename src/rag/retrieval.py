@@ -1,50 +1,115 @@
+import asyncio
+import logging
+import time
 from langchain_core.documents import Document
-from qdrant_client import models
-from src.qdrant_client import get_standalone_qdrant_client, get_embedding_model
-from src.config import QDRANT_COLLECTION_NAME
+from src.qdrant_client import query_documents, aquery_documents, keyword_search, retrieve_documents
+from src.sparse_index import reciprocal_rank_fusion
+from src.rag.context_packer import pack_context, citation_for, render_chunk
+from src.rag.reranker import reranker
+from src.config import (
+    HYBRID_SEARCH_ENABLED, RETRIEVAL_TOP_K, RETRIEVAL_CANDIDATES, RRF_K, CONTEXT_TOKEN_BUDGET, RERANK_CANDIDATES,
+)
 
-def get_tenant_docs(query: str, tenant_id: str, k: int = 15):
+logger = logging.getLogger(__name__)
+
+def _hybrid_search(query: str, tenant_id: str, k: int, query_vector=None):
     """
-    Manually retrieves documents using Qdrant's query_points method.
-    Strictly enforces tenant isolation via metadata filtering.
+    Dense + BM25 candidates fused by reciprocal rank. Exact terms (codes,
+    names, spreadsheet values) that embeddings miss still rank, so a small
+    k gives good recall.
     """
-    if not tenant_id:
-        print("Error: No tenant_id provided for retrieval.")
-        return []
+    dense = query_documents(tenant_id, query, top_k=max(k, RETRIEVAL_CANDIDATES), query_vector=query_vector)
+    sparse = keyword_search(tenant_id, query, top_k=max(k, RETRIEVAL_CANDIDATES))
+    return _fuse(tenant_id, dense, sparse, k)
+
 
-    client = get_standalone_qdrant_client()
-    embedding_model = get_embedding_model()
-    
-    # 1. Generate Query Embedding
-    query_vector = embedding_model.embed_query(query)
-    
-    # 2. Define Tenant Filter (STRICT)
-    # We filter by 'metadata.tenant_id' because LangChain nests the metadata
-    tenant_filter = models.Filter(
-        must=[
-            models.FieldCondition(
-                key="metadata.tenant_id", 
-                match=models.MatchValue(value=tenant_id)
-            )
-        ]
+async def _ahybrid_search(query: str, tenant_id: str, k: int, query_vector=None):
+    """Async _hybrid_search: the dense and keyword searches run concurrently."""
+    dense, sparse = await asyncio.gather(
+        aquery_documents(tenant_id, query, top_k=max(k, RETRIEVAL_CANDIDATES), query_vector=query_vector),
+        asyncio.to_thread(keyword_search, tenant_id, query, max(k, RETRIEVAL_CANDIDATES)),
     )
-    
-    # 3. Execute Search
-    results_obj = client.query_points(
-        collection_name=QDRANT_COLLECTION_NAME,
-        query=query_vector,
-        query_filter=tenant_filter, # STRICT FILTER APPLIED HERE
+    return await asyncio.to_thread(_fuse, tenant_id, dense, sparse, k)
+
+
+def _fuse(tenant_id: str, dense, sparse, k: int):
+    fused_ids = reciprocal_rank_fusion(
+        [[str(p.id) for p in dense], [doc_id for doc_id, _ in sparse]],
+        k=RRF_K,
         limit=k,
-        with_payload=True
     )
-    
-    # 4. Handle Response Format (Robustness)
-    if hasattr(results_obj, 'points'):
-        points = results_obj.points
+
+    points = {str(p.id): p for p in dense}
+    missing = [doc_id for doc_id in fused_ids if doc_id not in points]
+    for point in retrieve_documents(tenant_id, missing):
+        points[str(point.id)] = point
+
+    return [points[doc_id] for doc_id in fused_ids if doc_id in points]
+
+
+def _fetch_sizes(k: int = None):
+    """(documents returned, candidates retrieved): over-fetch when a reranker picks the best."""
+    if reranker is None:
+        k = k or RETRIEVAL_TOP_K
+        return k, k
+    k = k or reranker.top_n
+    return k, max(k, RERANK_CANDIDATES)
+
+
+def get_tenant_docs(query: str, tenant_id: str, k: int = None, query_vector=None):
+    """
+    Retrieves documents from the tenant's own collection (hybrid dense +
+    keyword search unless HYBRID_SEARCH_ENABLED is off).
+    With a reranker configured, RERANK_CANDIDATES chunks are retrieved and
+    the best `k` (default RERANK_TOP_N, else RETRIEVAL_TOP_K) are returned.
+    Tenant isolation comes from the per-tenant collection, and is
+    re-checked on the returned metadata.
+    Pass `query_vector` when the caller already embedded the query.
+    """
+    if not tenant_id:
+        print("Error: No tenant_id provided for retrieval.")
+        return []
+
+    started = time.perf_counter()
+    k, fetch = _fetch_sizes(k)
+
+    # 1. Search the tenant's collection
+    if HYBRID_SEARCH_ENABLED:
+        points = _hybrid_search(query, tenant_id, fetch, query_vector=query_vector)
     else:
-        points = results_obj
+        points = query_documents(tenant_id, query, top_k=fetch, query_vector=query_vector)
 
-    # 5. Convert to LangChain Documents
+    # 2. Convert to LangChain Documents
+    docs = _to_tenant_docs(points, tenant_id)
+
+    # 3. Keep the best k (within the tenant's latency budget)
+    if reranker is None:
+        return docs[:k]
+    return reranker.rerank(query, docs, tenant_id, top_n=k, started=started, query_vector=query_vector)
+
+
+async def aget_tenant_docs(query: str, tenant_id: str, k: int = None, query_vector=None):
+    """Async get_tenant_docs, for callers running on an event loop."""
+    if not tenant_id:
+        print("Error: No tenant_id provided for retrieval.")
+        return []
+
+    started = time.perf_counter()
+    k, fetch = _fetch_sizes(k)
+
+    if HYBRID_SEARCH_ENABLED:
+        points = await _ahybrid_search(query, tenant_id, fetch, query_vector=query_vector)
+    else:
+        points = await aquery_documents(tenant_id, query, top_k=fetch, query_vector=query_vector)
+
+    docs = _to_tenant_docs(points, tenant_id)
+    if reranker is None:
+        return docs[:k]
+    # Scoring is CPU work: keep it off the event loop
+    return await asyncio.to_thread(reranker.rerank, query, docs, tenant_id, k, started, query_vector)
+
+
+def _to_tenant_docs(points, tenant_id: str):
     docs = []
     for point in points:
         payload = point.payload or {}
@@ -67,23 +132,29 @@ def get_tenant_docs(query: str, tenant_id: str, k: int = 15):
         
     return docs
 
-def format_retrieved_context(docs: list[Document]):
-    """Formats retrieved documents into context text and citations."""
+def format_retrieved_context(docs: list[Document], token_budget: int = CONTEXT_TOKEN_BUDGET):
+    """
+    Formats retrieved documents into context text and citations.
+    Chunks are deduplicated, merged and trimmed to `token_budget` tokens
+    (see pack_context); only chunks that made it into the context are cited.
+    """
     if not docs:
         return "", []
 
+    packed, stats = pack_context(docs, token_budget=token_budget)
+    logger.info(
+        f"Context packed: {stats.kept_chunks}/{stats.input_chunks} chunks, "
+        f"{stats.packed_tokens}/{stats.input_tokens} tokens "
+        f"({stats.tokens_saved} saved, {stats.duplicates_dropped} duplicates, {stats.merged} merged)"
+    )
+
     context_list = []
     citation_list = []
 
-    for doc in docs:
-        source = doc.metadata.get('source', 'Unknown Document')
-        # Handle page number being int/str or missing
-        page = doc.metadata.get('page', 'N/A')
-        
-        citation = f"{source} (Page {page})"
-        citation_list.append(citation)
-        
+    for doc in packed:
+        citation_list.append(citation_for(doc))
+
         # Concatenate context with citation metadata
-        context_list.append(f"Source: {citation}\nContent: {doc.page_content}")
+        context_list.append(render_chunk(doc))
 
-    return "\n\n---\n\n".join(context_list), list(set(citation_list))
\ No newline at end of file
+    return "\n\n---\n\n".join(context_list), list(dict.fromkeys(citation_list))
@@ -0,0 +1,141 @@
+# src/rag/single_flight.py
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight computation and everything it has produced so far."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.events = []
+        self.done = False
+        self.error = None
+
+
+# ------------------------------------------------------------
+# ✔ Share one in-flight computation between identical requests
+# ------------------------------------------------------------
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    work, callers arriving before it finishes wait for it and receive the
+    same result (or exception). Once it finishes, the key is free again:
+    nothing is cached here.
+
+      do(key, fn)           -> threads, returns fn()
+      ado(key, coro_fn)     -> asyncio, returns await coro_fn()
+      stream(key, gen_fn)   -> generators; late joiners get the events
+                               already produced, then the live ones
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key):
+        """(call, is_leader) for `key`."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                return call, True
+            self.followers += 1
+            return call, False
+
+    def _finish(self, key, call, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        with call.cond:
+            call.error = error
+            call.done = True
+            call.cond.notify_all()
+
+    def do(self, key, fn):
+        call, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key, call, e)
+                raise
+            call.events.append(result)
+            self._finish(key, call)
+            return result
+
+        with call.cond:
+            call.cond.wait_for(lambda: call.done)
+        if call.error is not None:
+            raise call.error
+        return call.events[0]
+
+    async def ado(self, key, coro_fn):
+        # Tasks belong to one event loop, so the loop is part of the key
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(coro_fn())
+                task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+                self.leaders += 1
+            else:
+                self.followers += 1
+        # A cancelled caller must not cancel the work the others are waiting for
+        return await asyncio.shield(task)
+
+    def stream(self, key, gen_fn):
+        """
+        Iterate the events of gen_fn(), shared by every caller with `key`.
+        The generator is driven by a background thread, so a caller that
+        stops reading early never stalls the others.
+        """
+        call, leader = self._join(key)
+        if leader:
+            threading.Thread(
+                target=self._pump, args=(key, call, gen_fn), name="single-flight", daemon=True
+            ).start()
+        return self._replay(call)
+
+    def _pump(self, key, call, gen_fn):
+        try:
+            for event in gen_fn():
+                with call.cond:
+                    call.events.append(event)
+                    call.cond.notify_all()
+        except BaseException as e:
+            logger.exception(f"Shared stream for {key!r} failed")
+            self._finish(key, call, e)
+        else:
+            self._finish(key, call)
+
+    @staticmethod
+    def _replay(call):
+        position = 0
+        while True:
+            with call.cond:
+                call.cond.wait_for(lambda: position < len(call.events) or call.done)
+                if position < len(call.events):
+                    event = call.events[position]
+                elif call.error is not None:
+                    raise call.error
+                else:
+                    return
+            position += 1
+            yield event
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._tasks),
+                "computed": self.leaders,
+                "coalesced": self.followers,
+            }
@@ -0,0 +1,159 @@
+# src/rag/validated_answers.py
+
+import json
+import logging
+import re
+import threading
+
+import numpy as np
+
+from src.config import VALIDATED_ANSWERS_ENABLED, VALIDATED_ANSWER_THRESHOLD
+from src.database import get_validated_answers
+from src.qdrant_client import embed_texts
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Case, whitespace and trailing punctuation don't change the question."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+# ------------------------------------------------------------
+# ✔ Admin-approved answers, served without retrieval or LLM
+# ------------------------------------------------------------
+class ValidatedAnswerStore:
+    """
+    Per-tenant index of validated Q&A pairs from the conversation logs.
+
+    A question is matched first by its normalised text (no embedding call
+    needed), then by cosine similarity of its embedding to the validated
+    questions. A tenant's pairs are read from the database on first use;
+    admin validations/corrections update the index in place.
+    """
+
+    def __init__(self, threshold: float = VALIDATED_ANSWER_THRESHOLD, load_fn=get_validated_answers, embed_fn=embed_texts):
+        self.threshold = threshold
+        self.load_fn = load_fn
+        self.embed_fn = embed_fn
+        self._tenants = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _tenant(self, tenant_id: str) -> dict:
+        with self._lock:
+            index = self._tenants.get(tenant_id)
+        if index is not None:
+            return index
+
+        entries = self.load_fn(tenant_id)
+        vectors = self.embed_fn([_lookup_question(e) for e in entries]) if entries else []
+        index = {"entries": {}, "exact": {}, "matrix": None}
+        for entry, vector in zip(entries, vectors):
+            self._insert(index, entry, vector)
+        logger.info(f"Loaded {len(entries)} validated answers for {tenant_id}")
+
+        with self._lock:
+            # Another thread may have loaded (or an admin edited) meanwhile
+            return self._tenants.setdefault(tenant_id, index)
+
+    @staticmethod
+    def _insert(index: dict, entry: dict, vector):
+        citations = entry.get("citations") or "[]"
+        if isinstance(citations, str):
+            try:
+                citations = json.loads(citations)
+            except ValueError:
+                citations = []
+        item = {
+            "id": entry["id"],
+            "question": _lookup_question(entry),
+            "answer": entry["answer"],
+            "citations": list(citations),
+            "vector": _unit(vector),
+        }
+        index["entries"][item["id"]] = item
+        # Later validations of the same question win
+        index["exact"][normalize_question(item["question"])] = item["id"]
+        index["matrix"] = None
+
+    def add(self, entry: dict):
+        """Index a validated log entry (as returned by database.validate_answer)."""
+        index = self._tenant(entry["tenant_id"])
+        vector = self.embed_fn([_lookup_question(entry)])[0]
+        with self._lock:
+            self._insert(index, entry, vector)
+
+    def remove(self, tenant_id: str, log_id: int):
+        index = self._tenant(tenant_id)
+        with self._lock:
+            item = index["entries"].pop(log_id, None)
+            if item is None:
+                return
+            key = normalize_question(item["question"])
+            if index["exact"].get(key) == log_id:
+                # Fall back to the newest remaining validation of the same question
+                others = [i for i, e in index["entries"].items() if normalize_question(e["question"]) == key]
+                if others:
+                    index["exact"][key] = others[-1]
+                else:
+                    del index["exact"][key]
+            index["matrix"] = None
+
+    def lookup(self, tenant_id: str, question: str, query_vector=None):
+        """
+        (answer, citations) for a validated match, else None. Without
+        `query_vector` only the exact-text match is tried.
+        """
+        index = self._tenant(tenant_id)
+        with self._lock:
+            log_id = index["exact"].get(normalize_question(question))
+            if log_id is not None:
+                item = index["entries"][log_id]
+                self.exact_hits += 1
+                logger.info(f"Validated answer (exact) for {tenant_id}: {item['question']!r}")
+                return item["answer"], list(item["citations"])
+
+            if query_vector is None or not index["entries"]:
+                if query_vector is not None:
+                    self.misses += 1
+                return None
+
+            if index["matrix"] is None:
+                index["ids"] = list(index["entries"])
+                index["matrix"] = np.stack([index["entries"][i]["vector"] for i in index["ids"]])
+            scores = index["matrix"] @ _unit(query_vector)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            item = index["entries"][index["ids"][best]]
+            self.similar_hits += 1
+
+        logger.info(f"Validated answer for {tenant_id} (similarity {scores[best]:.3f}): {item['question']!r}")
+        return item["answer"], list(item["citations"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "entries": {t: len(i["entries"]) for t, i in self._tenants.items()},
+            }
+
+
+def _lookup_question(entry: dict) -> str:
+    # Entries from older callers carry only the raw question
+    return entry.get("lookup_question") or entry["question"]
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+validated_answers = ValidatedAnswerStore() if VALIDATED_ANSWERS_ENABLED else None
@@ -0,0 +1,261 @@
+# src/sparse_index.py
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from src.config import VECTOR_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+SPARSE_INDEX_FILE = "sparse_index.jsonl"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keeps codes like "sku-1042", "v2.3" or "a_b" together as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or "
+    "that the this to was were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms; compound codes are indexed whole and by their parts."""
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(p for p in re.split(r"[-_./]", token) if p and p not in STOPWORDS)
+    return terms
+
+
+# ------------------------------------------------------------
+# ✔ Per-tenant BM25 inverted index
+# ------------------------------------------------------------
+class TenantSparseIndex:
+    """
+    BM25 inverted index over one tenant's chunks.
+
+    When `path` is set, changes are appended to a JSONL operation log
+    ({"add": {id: {term: tf}}} / {"remove": [ids]}) that is replayed on first
+    use and rewritten once it is mostly obsolete operations. A persisted
+    index can be unloaded and is replayed again when next used.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._doc_terms = {}
+        self._doc_length = {}
+        self._postings = {}
+        self._total_length = 0
+        self._log_lines = 0
+        self._loaded = not (self.path and os.path.exists(self.path))
+        self.synced = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._replay()
+            self._loaded = True
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._doc_terms)
+
+    def unload(self):
+        """Free the in-memory postings; only possible when persisted."""
+        if not self.path:
+            return
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "documents": len(self._doc_terms),
+                "terms": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+            }
+
+    # --------------------------------------------------------
+    # Updates
+    # --------------------------------------------------------
+    def add(self, ids, texts):
+        added = {}
+        with self._lock:
+            self._ensure_loaded()
+            for doc_id, text in zip(ids, texts):
+                term_counts = dict(Counter(tokenize(text)))
+                self._apply_add(doc_id, term_counts)
+                added[doc_id] = term_counts
+            self._append_log({"add": added})
+
+    def remove(self, ids):
+        with self._lock:
+            self._ensure_loaded()
+            removed = [doc_id for doc_id in ids if doc_id in self._doc_terms]
+            for doc_id in removed:
+                self._apply_remove(doc_id)
+            if removed:
+                self._append_log({"remove": removed})
+
+    def sync(self, points_fn):
+        """
+        Once per load, bring the index in line with the vector store:
+        `points_fn()` returns the stored (id, text) pairs. Ids the index
+        lacks (a crash between the vector commit and the postings append)
+        are indexed, ids no longer stored are dropped. Returns
+        (added, removed) counts.
+        """
+        with self._lock:
+            if self.synced:
+                return 0, 0
+            self._ensure_loaded()
+            # Read under the lock: writers sync before touching the store
+            stored = dict(points_fn())
+            missing = [doc_id for doc_id in stored if doc_id not in self._doc_terms]
+            stale = [doc_id for doc_id in self._doc_terms if doc_id not in stored]
+            if stale:
+                self.remove(stale)
+            if missing:
+                self.add(missing, [stored[doc_id] for doc_id in missing])
+            self.synced = True
+            return len(missing), len(stale)
+
+    def _apply_add(self, doc_id, term_counts):
+        if doc_id in self._doc_terms:
+            self._apply_remove(doc_id)
+        self._doc_terms[doc_id] = term_counts
+        self._doc_length[doc_id] = sum(term_counts.values())
+        self._total_length += self._doc_length[doc_id]
+        for term, tf in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _apply_remove(self, doc_id):
+        term_counts = self._doc_terms.pop(doc_id)
+        self._total_length -= self._doc_length.pop(doc_id)
+        for term in term_counts:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    # --------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------
+    def _replay(self):
+        good_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    op = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-append
+                    break
+                for doc_id, term_counts in op.get("add", {}).items():
+                    self._apply_add(doc_id, term_counts)
+                for doc_id in op.get("remove", []):
+                    if doc_id in self._doc_terms:
+                        self._apply_remove(doc_id)
+                self._log_lines += 1
+                good_bytes += len(line)
+
+        # Cut the torn tail, or the next append would land after it and be skipped too
+        if good_bytes < os.path.getsize(self.path):
+            logger.warning(f"Truncating torn tail of {self.path} at byte {good_bytes}")
+            os.truncate(self.path, good_bytes)
+
+    def _append_log(self, op):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(op) + "\n")
+        self._log_lines += 1
+        # Every add/remove is one line; rewrite once the log is mostly history
+        if self._log_lines > 2 * len(self._doc_terms) + 1000:
+            self._rewrite_log()
+
+    def _rewrite_log(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"add": self._doc_terms}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._log_lines = 1
+
+    # --------------------------------------------------------
+    # Search
+    # --------------------------------------------------------
+    def search(self, query: str, limit: int = 20) -> list:
+        """[(doc_id, bm25_score)] best first."""
+        with self._lock:
+            self._ensure_loaded()
+            n_docs = len(self._doc_terms)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+
+            scores = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self._doc_length[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60, limit: int = None) -> list:
+    """Fuse ranked id lists: score(id) = sum(1 / (k + rank)). Returns ids best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    return fused[:limit] if limit else fused
+
+
+# ------------------------------------------------------------
+# ✔ One index per tenant, opened lazily
+# ------------------------------------------------------------
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_sparse_index(tenant_id: str, persist: bool = True) -> TenantSparseIndex:
+    """
+    Return the tenant's index. With `persist`, it lives next to the tenant's
+    vector files so it survives restarts together with them.
+    """
+    with _indexes_lock:
+        index = _indexes.get(tenant_id)
+        if index is None:
+            path = os.path.join(VECTOR_STORE_DIR, tenant_id, SPARSE_INDEX_FILE) if persist else None
+            index = TenantSparseIndex(path)
+            _indexes[tenant_id] = index
+        return index
+
+
+def unload_sparse_index(tenant_id: str):
+    """Forget the tenant's index, e.g. before its files are deleted (the next use starts afresh)."""
+    with _indexes_lock:
+        _indexes.pop(tenant_id, None)
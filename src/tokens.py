@@ -0,0 +1,49 @@
+# src/tokens.py
+
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = None):
+    """
+    Return the tiktoken encoding for `model` (cl100k_base when unknown).
+    Returns None if tiktoken or its BPE files are unavailable (e.g. offline),
+    in which case callers fall back to a character estimate.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed; estimating tokens from characters")
+        return None
+
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding ({e}); estimating tokens from characters")
+        return None
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    encoding = get_encoding(model)
+    if encoding is None:
+        # ~4 characters per token for English text
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = None) -> str:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,608 @@
+# src/vector_store.py
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.embedding_providers import embedding_model_id
+from src.config import VECTOR_STORE_DIR, VECTOR_QUANTIZATION, VECTOR_QUANTIZATION_TENANTS
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+PAYLOADS_FILE = "payloads.jsonl"
+META_FILE = "meta.json"
+CODES_FILES = {"int8": "codes.i8", "binary": "codes.b1"}
+SCALES_FILE = "scales.f32"
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+# Candidates rescored with float vectors = limit x oversampling
+DEFAULT_OVERSAMPLING = {"int8": 4, "binary": 10}
+# Rows scored per step on the quantized path (bounds the temporaries)
+SEARCH_BLOCK_ROWS = 8192
+INT8_BLOCK_ROWS = 256
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _POPCOUNT_TABLE[values]
+
+# Collections written before the model was recorded were all built with it
+LEGACY_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Compact once this fraction of rows are deleted tombstones
+COMPACT_DELETED_FRACTION = 0.2
+COMPACT_BLOCK_ROWS = 4096
+
+
+class EmbeddingModelMismatch(ValueError):
+    """The collection was built with another embedding model than the configured one."""
+
+
+@dataclass
+class SearchHit:
+    """Same fields callers read from a Qdrant ScoredPoint."""
+    id: str
+    score: float
+    payload: dict = field(default_factory=dict)
+
+
+# ------------------------------------------------------------
+# ✔ One tenant = one directory of memory-mapped vectors
+# ------------------------------------------------------------
+class TenantVectorStore:
+    """
+    Disk-backed vector collection for a single tenant.
+
+      vectors.f32    -> raw float32 rows (L2-normalised), memory-mapped
+      payloads.jsonl -> one {"id", "payload"} record per row, same order
+      meta.json      -> dimension, embedding model, committed row count,
+                        payload size, deleted rows, file generation and
+                        quantization (written last)
+
+    With quantization "int8" (codes.i8 + per-row scales.f32) or "binary"
+    (codes.b1, one sign bit per dimension), search scans the compact codes
+    and only reads the float rows of the best limit x oversampling
+    candidates to rescore them, so the float file can stay on disk.
+
+    Deletes are tombstones until enough rows are dead, then the live rows are
+    copied into the next file generation and meta.json is switched over.
+    Nothing is read from disk until the first search/upsert for the tenant.
+
+    An empty collection takes its dimension from the first vectors written
+    and records `embedding_model`; once it holds vectors, searching or
+    writing with another model raises EmbeddingModelMismatch instead of
+    returning meaningless neighbours.
+    """
+
+    def __init__(self, tenant_id: str, root_dir: str = VECTOR_STORE_DIR, dimension: int = None,
+                 quantization: str = "none", oversampling: float = None, embedding_model: str = None):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATION_MODES}")
+        self.tenant_id = tenant_id
+        self.path = os.path.join(root_dir, tenant_id)
+        self.dimension = dimension
+        # Used when the collection is created; an existing collection keeps its own mode
+        self.quantization = quantization
+        self.oversampling = oversampling
+        # Model the caller embeds with vs. the model recorded in meta.json
+        self.embedding_model = embedding_model
+        self.collection_model = None
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._generation = 0
+        self._count = 0
+        self._payload_bytes = 0
+        self._deleted = set()
+        self._ids = []
+        self._payloads = []
+        self._row_by_id = {}
+        self._vectors = None
+        self._codes = None
+        self._scales = None
+
+    # --------------------------------------------------------
+    # Loading
+    # --------------------------------------------------------
+    def _file(self, name: str, generation: int = None) -> str:
+        generation = self._generation if generation is None else generation
+        if generation and name != META_FILE:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}.{generation}{ext}"
+        return os.path.join(self.path, name)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+
+            os.makedirs(self.path, exist_ok=True)
+            meta = self._read_meta()
+            self.dimension = meta.get("dimension", self.dimension)
+            self.collection_model = self._recorded_model(meta)
+            # Collections written before quantization existed have no codes
+            self.quantization = meta.get("quantization", "none" if meta else self.quantization)
+            self._generation = meta.get("generation", 0)
+            self._payload_bytes = meta.get("payload_bytes", 0)
+            count = meta.get("count", 0)
+
+            ids, payloads = [], []
+            if count and os.path.exists(self._file(PAYLOADS_FILE)):
+                with open(self._file(PAYLOADS_FILE), "r", encoding="utf-8") as f:
+                    for line in f:
+                        if len(ids) == count:
+                            break
+                        record = json.loads(line)
+                        ids.append(record["id"])
+                        payloads.append(record["payload"])
+
+            # A crash between writing rows and meta.json leaves trailing rows
+            # that were never committed; meta's count is the source of truth.
+            self._count = min(count, len(ids), self._rows_on_disk())
+            self._ids = ids[:self._count]
+            self._payloads = payloads[:self._count]
+            self._deleted = {row for row in meta.get("deleted", []) if row < self._count}
+            self._row_by_id = {
+                point_id: row for row, point_id in enumerate(self._ids) if row not in self._deleted
+            }
+            self._loaded = True
+            logger.info(f"Loaded {len(self._row_by_id)} vectors for {self.tenant_id} from {self.path}")
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._file(META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def _recorded_model(meta: dict):
+        if not meta:
+            return None
+        return meta.get("embedding_model", LEGACY_EMBEDDING_MODEL)
+
+    def _check_model(self):
+        if (self._count and self.embedding_model and self.collection_model
+                and self.embedding_model != self.collection_model):
+            raise EmbeddingModelMismatch(
+                f"{self.tenant_id} was indexed with {self.collection_model} but the configured "
+                f"embedding model is {self.embedding_model}; re-index the tenant "
+                f"(python reset_db.py {self.tenant_id}) or switch the embedding provider back"
+            )
+
+    def _write_meta(self):
+        tmp_path = self._file(META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "embedding_model": self.collection_model,
+                "generation": self._generation,
+                "count": self._count,
+                "payload_bytes": self._payload_bytes,
+                "deleted": sorted(self._deleted),
+                "quantization": self.quantization,
+            }, f)
+        os.replace(tmp_path, self._file(META_FILE))
+
+    def _row_files(self, quantization: str = None) -> list:
+        """(file name, bytes per row) of every per-row file in the given mode."""
+        quantization = self.quantization if quantization is None else quantization
+        dimension = self.dimension or 0  # unknown until the first upsert
+        files = [(VECTORS_FILE, dimension * 4)]
+        if quantization == "int8":
+            files += [(CODES_FILES["int8"], dimension), (SCALES_FILE, 4)]
+        elif quantization == "binary":
+            files.append((CODES_FILES["binary"], (dimension + 7) // 8))
+        return files
+
+    def _rows_on_disk(self) -> int:
+        if not self.dimension:
+            # No meta.json yet: rows written before a crash were never committed,
+            # and the first append truncates them
+            return 0
+        rows = []
+        for name, row_bytes in self._row_files():
+            try:
+                rows.append(os.path.getsize(self._file(name)) // row_bytes)
+            except FileNotFoundError:
+                return 0
+        return min(rows)
+
+    def _matrix(self):
+        """Read-only memmap over the committed rows (None when empty)."""
+        if self._count == 0:
+            return None
+        if self._vectors is None or self._vectors.shape[0] != self._count:
+            self._vectors = np.memmap(
+                self._file(VECTORS_FILE),
+                dtype=np.float32,
+                mode="r",
+                shape=(self._count, self.dimension),
+            )
+        return self._vectors
+
+    def _code_matrices(self):
+        """Read-only memmaps of the quantized codes (and int8 scales)."""
+        if self._codes is None or self._codes.shape[0] != self._count:
+            if self.quantization == "int8":
+                self._codes = np.memmap(self._file(CODES_FILES["int8"]), dtype=np.int8, mode="r",
+                                        shape=(self._count, self.dimension))
+                self._scales = np.memmap(self._file(SCALES_FILE), dtype=np.float32, mode="r",
+                                         shape=(self._count,))
+            else:
+                self._codes = np.memmap(self._file(CODES_FILES["binary"]), dtype=np.uint8, mode="r",
+                                        shape=(self._count, (self.dimension + 7) // 8))
+        return self._codes, self._scales
+
+    def _release_maps(self):
+        # Release the read mappings before the files change underneath them
+        self._vectors = self._codes = self._scales = None
+
+    def _encode(self, matrix) -> dict:
+        """{file name: per-row array} for the float rows and their codes."""
+        rows = {VECTORS_FILE: matrix}
+        if self.quantization == "int8":
+            rows.update(_int8_codes(matrix))
+        elif self.quantization == "binary":
+            rows[CODES_FILES["binary"]] = np.packbits(matrix > 0, axis=1)
+        return rows
+
+    # --------------------------------------------------------
+    # Writes
+    # --------------------------------------------------------
+    def upsert(self, ids, vectors, payloads) -> int:
+        """Insert or overwrite points. Returns the number of points written."""
+        if not ids:
+            return 0
+
+        matrix = _normalise(np.asarray(vectors, dtype=np.float32))
+
+        with self._lock:
+            self._ensure_loaded()
+            if self._count == 0:
+                # Empty collection: sized and labelled by whatever embeds into it now
+                self.dimension = matrix.shape[1]
+                self.collection_model = self.embedding_model or self.collection_model
+            self._check_model()
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Vector size {matrix.shape[1]} does not match collection size {self.dimension} "
+                    f"for {self.tenant_id}"
+                )
+            # Last write wins when the same id appears twice in one batch
+            latest = {point_id: i for i, point_id in enumerate(ids)}
+            updates, appends = [], []
+            for point_id, i in latest.items():
+                row = self._row_by_id.get(point_id)
+                (appends if row is None else updates).append((i, row))
+
+            self._release_maps()
+
+            encoded = self._encode(matrix)
+            for name, row_bytes in self._row_files():
+                rows = encoded[name]
+                if updates:
+                    with open(self._file(name), "r+b") as f:
+                        for i, row in updates:
+                            f.seek(row * row_bytes)
+                            f.write(rows[i].tobytes())
+                if appends:
+                    with open(self._file(name), "ab") as f:
+                        # Drop any uncommitted tail left behind by an earlier crash
+                        f.truncate(self._count * row_bytes)
+                        f.write(rows[[i for i, _ in appends]].tobytes())
+
+            for i, row in updates:
+                self._payloads[row] = payloads[i]
+            if appends:
+                for i, _ in appends:
+                    self._row_by_id[ids[i]] = len(self._ids)
+                    self._ids.append(ids[i])
+                    self._payloads.append(payloads[i])
+
+            if updates:
+                self._rewrite_payloads()
+            else:
+                self._append_payloads([i for i, _ in appends], ids, payloads)
+
+            self._count = len(self._ids)
+            self._write_meta()
+            return len(latest)
+
+    def delete(self, ids) -> int:
+        """Remove points by id. Returns how many existed."""
+        with self._lock:
+            self._ensure_loaded()
+            rows = [self._row_by_id.pop(point_id) for point_id in ids if point_id in self._row_by_id]
+            if not rows:
+                return 0
+            self._deleted.update(rows)
+            if len(self._deleted) >= COMPACT_DELETED_FRACTION * self._count:
+                self._compact()
+            else:
+                self._write_meta()
+            return len(rows)
+
+    def _compact(self):
+        """Copy live rows into the next file generation, then switch meta.json over."""
+        keep = [row for row in range(self._count) if row not in self._deleted]
+        old_generation, new_generation = self._generation, self._generation + 1
+
+        sources = {VECTORS_FILE: self._matrix()}
+        if self.quantization != "none":
+            codes, scales = self._code_matrices()
+            sources[CODES_FILES[self.quantization]] = codes
+            if scales is not None:
+                sources[SCALES_FILE] = scales
+        for name, source in sources.items():
+            with open(self._file(name, new_generation), "wb") as f:
+                for start in range(0, len(keep), COMPACT_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(source[keep[start:start + COMPACT_BLOCK_ROWS]]).tobytes())
+
+        payload_bytes = 0
+        with open(self._file(PAYLOADS_FILE, new_generation), "wb") as f:
+            for row in keep:
+                line = (json.dumps({"id": self._ids[row], "payload": self._payloads[row]}) + "\n").encode("utf-8")
+                f.write(line)
+                payload_bytes += len(line)
+
+        self._release_maps()
+        self._ids = [self._ids[row] for row in keep]
+        self._payloads = [self._payloads[row] for row in keep]
+        self._row_by_id = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._count = len(keep)
+        self._deleted = set()
+        self._payload_bytes = payload_bytes
+        self._generation = new_generation
+        self._write_meta()
+
+        for name in [PAYLOADS_FILE] + [name for name, _ in self._row_files()]:
+            try:
+                os.remove(self._file(name, old_generation))
+            except FileNotFoundError:
+                pass
+        logger.info(f"Compacted vectors for {self.tenant_id}: {self._count} live rows")
+
+    def _append_payloads(self, indexes, ids, payloads):
+        with open(self._file(PAYLOADS_FILE), "ab") as f:
+            # Drop any uncommitted tail left behind by an earlier crash
+            f.truncate(self._payload_bytes)
+            for i in indexes:
+                line = (json.dumps({"id": ids[i], "payload": payloads[i]}) + "\n").encode("utf-8")
+                f.write(line)
+                self._payload_bytes += len(line)
+
+    def _rewrite_payloads(self):
+        tmp_path = self._file(PAYLOADS_FILE) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for point_id, payload in zip(self._ids, self._payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+        os.replace(tmp_path, self._file(PAYLOADS_FILE))
+        self._payload_bytes = os.path.getsize(self._file(PAYLOADS_FILE))
+
+    def set_quantization(self, quantization: str):
+        """Re-encode the collection's codes for another mode ("none" drops them)."""
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATION_MODES}")
+        with self._lock:
+            self._ensure_loaded()
+            old = self.quantization
+            if quantization == old:
+                return
+            matrix = self._matrix()
+            self._release_maps()
+            self.quantization = quantization
+
+            # New codes first, then meta.json, then the old codes go
+            new_files = [name for name, _ in self._row_files() if name != VECTORS_FILE]
+            handles = {name: open(self._file(name), "wb") for name in new_files}
+            try:
+                for start in range(0, self._count, COMPACT_BLOCK_ROWS):
+                    block = np.asarray(matrix[start:start + COMPACT_BLOCK_ROWS])
+                    for name, rows in self._encode(block).items():
+                        if name in handles:
+                            handles[name].write(rows.tobytes())
+            finally:
+                for f in handles.values():
+                    f.close()
+            self._write_meta()
+
+            for name, _ in self._row_files(old):
+                if name not in new_files and name != VECTORS_FILE:
+                    try:
+                        os.remove(self._file(name))
+                    except FileNotFoundError:
+                        pass
+            logger.info(f"Re-encoded vectors for {self.tenant_id}: {old} -> {quantization}")
+
+    # --------------------------------------------------------
+    # Reads
+    # --------------------------------------------------------
+    def search(self, query_vector, limit: int = 5):
+        """Cosine similarity search (vectors are stored normalised)."""
+        with self._lock:
+            self._ensure_loaded()
+            matrix = self._matrix()
+            if matrix is None:
+                return []
+            self._check_model()
+
+            query = _normalise(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+            live = self._count - len(self._deleted)
+            limit = min(limit, live)
+            if limit <= 0:
+                return []
+
+            oversampling = self.oversampling or DEFAULT_OVERSAMPLING.get(self.quantization, 1)
+            candidates = int(limit * oversampling)
+            if self.quantization == "none" or candidates >= live:
+                rows, scores = _top_k(matrix @ query, self._deleted, limit)
+            else:
+                # Coarse pass over the codes, exact cosine for the shortlist only
+                shortlist, _ = _top_k(self._approximate_scores(query), self._deleted, candidates)
+                shortlist.sort()  # read the float rows in file order
+                exact = matrix[shortlist] @ query
+                order = np.argsort(-exact)[:limit]
+                rows, scores = shortlist[order], exact[order]
+
+            return [
+                SearchHit(id=self._ids[row], score=float(score), payload=self._payloads[row])
+                for row, score in zip(rows, scores)
+            ]
+
+    def _approximate_scores(self, query):
+        codes, scales = self._code_matrices()
+        scores = np.empty(self._count, dtype=np.float32)
+        if self.quantization == "int8":
+            # Small blocks cast into one reused buffer stay in CPU cache
+            buffer = np.empty((INT8_BLOCK_ROWS, self.dimension), dtype=np.float32)
+            for start in range(0, self._count, INT8_BLOCK_ROWS):
+                block = codes[start:start + INT8_BLOCK_ROWS]
+                rows = len(block)
+                np.copyto(buffer[:rows], block, casting="unsafe")
+                np.dot(buffer[:rows], query, out=scores[start:start + rows])
+            scores *= scales
+        else:
+            query_bits = np.packbits(query > 0)
+            for start in range(0, self._count, SEARCH_BLOCK_ROWS):
+                end = start + SEARCH_BLOCK_ROWS
+                # Fewer differing sign bits = smaller angle
+                hamming = _popcount(np.bitwise_xor(codes[start:end], query_bits)).sum(axis=1)
+                scores[start:end] = -hamming.astype(np.float32)
+        return scores
+
+    def retrieve(self, ids) -> list:
+        """SearchHits (score 0) for the ids that exist, in the given order."""
+        with self._lock:
+            self._ensure_loaded()
+            return [
+                SearchHit(id=point_id, score=0.0, payload=self._payloads[self._row_by_id[point_id]])
+                for point_id in ids if point_id in self._row_by_id
+            ]
+
+    def points(self):
+        """(id, payload) for every live point."""
+        with self._lock:
+            self._ensure_loaded()
+            return [(point_id, self._payloads[row]) for point_id, row in self._row_by_id.items()]
+
+    def count(self) -> int:
+        """Number of live (non-deleted) points."""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._row_by_id)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def memory_stats(self) -> dict:
+        """
+        Size of the collection without loading it: live vectors, bytes a
+        search scans (codes when quantized, else floats), payload bytes held
+        in memory once loaded, and total bytes on disk.
+        """
+        with self._lock:
+            if self._loaded:
+                vectors, count, payload_bytes = len(self._row_by_id), self._count, self._payload_bytes
+            else:
+                meta = self._read_meta()
+                self.dimension = meta.get("dimension", self.dimension)
+                self.collection_model = self._recorded_model(meta)
+                self.quantization = meta.get("quantization", "none" if meta else self.quantization)
+                self._generation = meta.get("generation", 0)
+                count = meta.get("count", 0)
+                vectors = count - len(meta.get("deleted", []))
+                payload_bytes = meta.get("payload_bytes", 0)
+
+            row_files = dict(self._row_files())
+            scanned = [name for name in row_files if name != VECTORS_FILE] or [VECTORS_FILE]
+            disk_bytes = 0
+            if os.path.isdir(self.path):
+                disk_bytes = sum(
+                    os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path)
+                )
+            return {
+                "loaded": self._loaded,
+                "vectors": vectors,
+                "quantization": self.quantization,
+                "embedding_model": self.collection_model,
+                "dimension": self.dimension,
+                "search_bytes": count * sum(row_files[name] for name in scanned),
+                "payload_bytes": payload_bytes if self._loaded else 0,
+                "disk_bytes": disk_bytes,
+            }
+
+    def unload(self):
+        """Drop the mapping and payloads from memory; the next call reloads lazily."""
+        with self._lock:
+            self._release_maps()
+            self._ids, self._payloads, self._row_by_id = [], [], {}
+            self._deleted = set()
+            self._count = 0
+            self._loaded = False
+
+
+def _normalise(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _int8_codes(matrix) -> dict:
+    """Symmetric per-row int8: row ~= codes * scale."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return {CODES_FILES["int8"]: codes, SCALES_FILE: scales.astype(np.float32)}
+
+
+def _top_k(scores, deleted, k: int):
+    """(rows, scores) of the k best live rows, best first."""
+    if deleted:
+        scores[list(deleted)] = -np.inf
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
+
+
+def quantization_for(tenant_id: str) -> str:
+    """Quantization used when the tenant's collection is created."""
+    return VECTOR_QUANTIZATION_TENANTS.get(tenant_id, VECTOR_QUANTIZATION)
+
+
+# ------------------------------------------------------------
+# ✔ Lazily opened stores, one per tenant
+# ------------------------------------------------------------
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_tenant_store(tenant_id: str) -> TenantVectorStore:
+    """Return the tenant's store; its files are only read on first use."""
+    with _stores_lock:
+        store = _stores.get(tenant_id)
+        if store is None:
+            store = TenantVectorStore(
+                tenant_id, quantization=quantization_for(tenant_id), embedding_model=embedding_model_id()
+            )
+            _stores[tenant_id] = store
+        return store
+
+
+def unload_tenant_store(tenant_id: str):
+    """Release a tenant's resident memory (files stay on disk)."""
+    with _stores_lock:
+        store = _stores.pop(tenant_id, None)
+    if store is not None:
+        store.unload()
@@ -1,9 +1,9 @@
 import streamlit as st
 import time
 import json
-from streamlit_ui.utils import initialize_backend_setup
-from src.rag.chat_service import get_rag_response
-from src.ingestion.storage import ingest_document
+from streamlit_ui.utils import initialize_backend_setup, show_ingestion_jobs, get_conversation_memory, show_sources
+from src.rag.chat_service import stream_rag_response
+from src.ingestion.job_queue import enqueue_upload
 
 TENANT_ID = "tenantA"
 initialize_backend_setup()
@@ -101,11 +101,10 @@ with st.expander("📁 Add Documents"):
     )
 
     if uploaded_files and st.button("Process Documents"):
-        progress = st.progress(0)
-        for i, file in enumerate(uploaded_files):
-            ingest_document(file, TENANT_ID)
-            progress.progress((i+1)/len(uploaded_files))
-        st.success("All documents processed!")
+        # Runs in the background; keep chatting while it ingests
+        st.session_state.ingest_jobs = [enqueue_upload(file, TENANT_ID) for file in uploaded_files]
+
+    show_ingestion_jobs()
 
 
 # ============================
@@ -117,10 +116,7 @@ for msg in st.session_state.messages:
     with st.chat_message(msg["role"], avatar=avatar):
         st.markdown(msg["content"])
 
-        if msg.get("citations") and msg["citations"] != "[]":
-            with st.expander("📚 Sources"):
-                for src in json.loads(msg["citations"]):
-                    st.caption(src)
+        show_sources(msg.get("citations"))
 
 
 # ============================
@@ -136,16 +132,21 @@ if prompt := st.chat_input("Ask a question..."):
     # assistant bubble
     with st.chat_message("assistant", avatar="🤖"):
         resp_box = st.empty()
-        with st.spinner("Thinking..."):
-            answer, citations = get_rag_response(prompt, TENANT_ID)
+        sources_box = st.empty()
+        resp_box.markdown("Thinking...")
+
+        # citations arrive first, then the answer token by token
+        answer, citations = "", []
+        for kind, value in stream_rag_response(prompt, TENANT_ID, memory=get_conversation_memory()):
+            if kind == "citations":
+                citations = value
+                show_sources(citations, sources_box)
+            else:
+                answer += value
+                resp_box.markdown(answer + "▌")
 
         resp_box.markdown(answer)
 
-        if citations:
-            with st.expander("📚 Sources"):
-                for src in citations:
-                    st.caption(src)
-
     # save to history
     st.session_state.messages.append({
         "role": "assistant",
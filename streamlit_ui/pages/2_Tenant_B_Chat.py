@@ -1,9 +1,9 @@
 import streamlit as st
 import time
 import json
-from streamlit_ui.utils import initialize_backend_setup
-from src.rag.chat_service import get_rag_response
-from src.ingestion.storage import ingest_document
+from streamlit_ui.utils import initialize_backend_setup, show_ingestion_jobs, get_conversation_memory, show_sources
+from src.rag.chat_service import stream_rag_response
+from src.ingestion.job_queue import enqueue_upload
 
 # --- TENANT CONFIGURATION ---
 TENANT_ID = "tenantB"  # <--- Unique to this page
@@ -99,13 +99,10 @@ with st.expander("📂 Add Documents to Knowledge Base", expanded=False):
         accept_multiple_files=True
     )
     if uploaded_files and st.button(f"Process {len(uploaded_files)} Documents"):
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        for i, file in enumerate(uploaded_files):
-            status_text.text(f"Ingesting file {i+1}/{len(uploaded_files)}: {file.name}...")
-            ingest_document(file, TENANT_ID)
-            progress_bar.progress((i + 1) / len(uploaded_files))
-        status_text.success("✅ Complete!")
+        # Files are parsed/embedded in the background, so chat stays available
+        st.session_state.ingest_jobs = [enqueue_upload(file, TENANT_ID) for file in uploaded_files]
+
+    show_ingestion_jobs()
 
 # --- 3. Chat Logic ---
 
@@ -117,11 +114,7 @@ for msg in st.session_state.messages:
         st.markdown(msg["content"])
         
         # Sources logic
-        if msg.get("citations") and msg["citations"] != "[]" and "Error" not in msg["citations"]:
-            with st.expander("📚 Sources"):
-                sources = json.loads(msg["citations"])
-                for source in sources:
-                    st.caption(source)
+        show_sources(msg.get("citations"))
 
 # User Input
 if prompt := st.chat_input("Ask a question..."):
@@ -133,17 +126,20 @@ if prompt := st.chat_input("Ask a question..."):
     # 2. Assistant Message
     with st.chat_message("assistant", avatar="🤖"):
         message_placeholder = st.empty()
-        
-        with st.spinner("Thinking..."):
-            time.sleep(0.3) 
-            answer, citations = get_rag_response(prompt, TENANT_ID)
-        
+        sources_placeholder = st.empty()
+        message_placeholder.markdown("Thinking...")
+
+        # Citations arrive first, then the answer streams in token by token
+        answer, citations = "", []
+        for kind, value in stream_rag_response(prompt, TENANT_ID, memory=get_conversation_memory()):
+            if kind == "citations":
+                citations = value
+                show_sources(citations, sources_placeholder)
+            else:
+                answer += value
+                message_placeholder.markdown(answer + "▌")
+
         message_placeholder.markdown(answer)
-        
-        if citations and "Error" not in citations:
-            with st.expander("📚 Sources"):
-                for source in citations:
-                    st.caption(source)
     
     # 3. Save Assistant Response
     st.session_state.messages.append({
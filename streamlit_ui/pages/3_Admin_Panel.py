@@ -1,9 +1,16 @@
 # streamlit_ui/pages/3_Admin_Panel.py
 
+from datetime import datetime, time, timedelta
+
 import streamlit as st
 import pandas as pd
-from streamlit_ui.utils import initialize_app_state, get_admin_logs
-from src.config import ADMIN_ID
+from streamlit_ui.utils import (
+    initialize_app_state, get_admin_logs, get_admin_log_stats, search_admin_logs,
+    set_answer_validated, get_collection_stats, get_backend_metrics,
+)
+from src.config import ADMIN_ID, TENANT_IDS
+
+PAGE_SIZE = 50
 
 initialize_app_state()
 
@@ -14,27 +21,111 @@ if st.session_state.tenant_id != ADMIN_ID:
 st.title("🛡️ Admin Panel - Q&A Logs")
 st.markdown("---")
 
-# --- 1. View Logs ---
-logs = get_admin_logs()
+# --- 1. Filters (applied in SQL) ---
+col_tenant, col_status, col_dates = st.columns([1, 1, 2])
+tenant_choice = col_tenant.selectbox("Tenant", ["All"] + TENANT_IDS)
+status_choice = col_status.selectbox("Status", ["All", "Validated", "Not validated"])
+date_range = col_dates.date_input("Date range", value=())
+text_query = st.text_input("Search questions and answers")
+
+filters = {
+    "tenant_id": None if tenant_choice == "All" else tenant_choice,
+    "validated": {"All": None, "Validated": True, "Not validated": False}[status_choice],
+    "text_query": text_query.strip() or None,
+}
+if len(date_range) == 2:
+    filters["start"] = datetime.combine(date_range[0], time.min)
+    filters["end"] = datetime.combine(date_range[1] + timedelta(days=1), time.min)
+
+# Cursor stack: entry i is the keyset cursor that starts page i
+if st.session_state.get("log_filters") != filters:
+    st.session_state.log_filters = filters
+    st.session_state.log_cursors = [None]
+cursors = st.session_state.log_cursors
+
+# --- 2. Summary ---
+stats = get_admin_log_stats(**filters)
+col_total, col_validated, col_tenants = st.columns(3)
+col_total.metric("Conversations", stats["total"])
+col_validated.metric("Validated", stats["validated"])
+col_tenants.metric("Tenants", len(stats["per_tenant"]))
+if stats["per_day"]:
+    st.bar_chart(pd.DataFrame(stats["per_day"]).set_index("day"))
+
+# --- 3. Best matches for the search (full-text ranked) ---
+if filters["text_query"]:
+    with st.expander("🔎 Best matches", expanded=True):
+        matches = search_admin_logs(filters["text_query"], tenant_id=filters["tenant_id"])
+        for match in matches:
+            st.markdown(
+                f"**{match['tenant_name']}** · {match['timestamp']:%Y-%m-%d %H:%M}"
+                f"{' · ✅ validated' if match['is_validated'] else ''}\n\n"
+                f"Q: {match['question']}\n\nA: {match['answer']}"
+            )
+            st.markdown("---")
+        if not matches:
+            st.caption("No matches.")
+
+# --- 4. View Logs (current page only) ---
+logs, next_cursor = get_admin_logs(page_size=PAGE_SIZE, cursor=cursors[-1], **filters)
 
 if logs:
-    st.subheader("All Conversation Logs")
-    
-    # Convert logs to DataFrame for easy display
+    st.subheader(f"Conversation Logs (page {len(cursors)})")
+
     df = pd.DataFrame(logs)
     df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
-    
-    # Display the logs
+
     st.dataframe(df, use_container_width=True)
-    
-    # NOTE: The "Correct an answer & save it as validated" feature would be implemented here
-    # by adding a form/button that updates the 'is_validated' and 'answer' fields 
-    # in the ConversationLog table via a new function in src/database.py.
+
+    col_prev, col_next = st.columns(2)
+    if col_prev.button("← Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if col_next.button("Older →", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
 else:
     st.info("No conversation logs found in the database.")
 
-# --- 2. Tenant Management (Placeholder) ---
+# --- 5. Validate / correct an answer ---
+# Validated answers are served to the tenant directly for the same (or a
+# very similar) question, skipping retrieval and the LLM.
+st.markdown("---")
+st.subheader("Validate or Correct an Answer")
+with st.form("validate_answer"):
+    log_id = st.number_input("Log ID", min_value=1, step=1)
+    corrected = st.text_area("Corrected answer (leave empty to approve the logged answer as is)")
+    col_save, col_remove = st.columns(2)
+    save = col_save.form_submit_button("✅ Save as validated")
+    remove = col_remove.form_submit_button("Remove validation")
+
+if save or remove:
+    entry = set_answer_validated(int(log_id), validated=save, corrected_answer=corrected.strip() or None)
+    if entry is None:
+        st.error(f"No conversation log with ID {int(log_id)}.")
+    elif save:
+        st.success(f"Answer {entry['id']} validated for {entry['tenant_id']}: {entry['lookup_question']}")
+    else:
+        st.success(f"Validation removed from answer {entry['id']}.")
+
+# --- 6. Tenant collections ---
+st.markdown("---")
+with st.expander("🗂️ Tenant Collections"):
+    collections = pd.DataFrame(get_collection_stats())
+    for column in ("search_bytes", "payload_bytes", "disk_bytes"):
+        if column in collections:
+            collections[column.replace("_bytes", "_mb")] = (collections.pop(column) / 2**20).round(2)
+    collections = collections.drop(columns=["keyword_index"], errors="ignore")
+    st.dataframe(collections, use_container_width=True)
+
+# --- 7. Backend Metrics ---
+st.markdown("---")
+with st.expander("⚙️ Backend Metrics"):
+    st.json(get_backend_metrics())
+
+# --- 8. Tenant Management (Placeholder) ---
 st.markdown("---")
 st.subheader("Tenant Management")
 st.warning("Tenant deletion logic (removing files, DB records, and Qdrant vectors) is complex and requires careful implementation.")
-st.button("Delete Tenant (Logic Placeholder)", disabled=True)
\ No newline at end of file
+st.button("Delete Tenant (Logic Placeholder)", disabled=True)
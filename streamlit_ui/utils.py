@@ -34,20 +34,124 @@ def show_login_form():
     if st.button("Access Application"):
         # Reset chat history when changing users
         st.session_state.messages = [] 
+        st.session_state.pop("conversation_memory", None)
         st.session_state.tenant_id = selected_tenant
         st.success(f"Logged in as {selected_tenant}. Please refresh the page.")
         # Streamlit will automatically refresh upon session state change
         
+def get_conversation_memory():
+    """This session's chat memory (recent turns + summary) passed to the chat service."""
+    from src.rag.conversation import ConversationMemory
+
+    if "conversation_memory" not in st.session_state:
+        st.session_state.conversation_memory = ConversationMemory()
+    return st.session_state.conversation_memory
+
+def visible_citations(citations):
+    """Citations worth showing (list or stored JSON string); the "Error" placeholder is dropped."""
+    if isinstance(citations, str):
+        citations = json.loads(citations) if citations else []
+    return [c for c in citations or [] if c != "Error"]
+
+def show_sources(citations, container=None):
+    """Sources expander for one answer, drawn in `container` (e.g. an st.empty() placeholder)."""
+    sources = visible_citations(citations)
+    if sources:
+        with (container or st).expander("📚 Sources"):
+            for source in sources:
+                st.caption(source)
+
 def display_chat_history():
     """Displays the conversation history from session state."""
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
-            if message["citations"]:
+            sources = visible_citations(message["citations"])
+            if sources:
                 # Ensure citations are strings before joining
-                st.caption("Sources: " + ", ".join(map(str, json.loads(message["citations"]))))
+                st.caption("Sources: " + ", ".join(map(str, sources)))
+
+def show_ingestion_jobs():
+    """
+    Per-file status of the background ingestion jobs started in this session.
+    Rendered as a fragment that refreshes itself while jobs are running, so
+    the rest of the page (chat) stays usable.
+    """
+    from src.ingestion.job_queue import get_ingestion_queue
+
+    job_ids = st.session_state.get("ingest_jobs", [])
+    if not job_ids:
+        return
+
+    running = any(not job.finished for job in get_ingestion_queue().get_jobs(job_ids))
+
+    @st.fragment(run_every="2s" if running else None)
+    def _job_status():
+        jobs = get_ingestion_queue().get_jobs(st.session_state.get("ingest_jobs", []))
+        for job in jobs:
+            label = f"{job.file_name}: {job.status}"
+            if job.message:
+                label += f" ({job.message})"
+            st.progress(job.progress, text=label)
+        if jobs and all(job.finished for job in jobs):
+            st.caption("All documents processed.")
+
+    _job_status()
+
+def get_admin_logs(page_size=50, cursor=None, **filters):
+    """Fetches one page of conversation logs for admin panel: (rows, next_cursor)."""
+    from src.database import get_logs_page # Import locally to avoid circular dependency
+    return get_logs_page(page_size=page_size, cursor=cursor, **filters)
+
+def search_admin_logs(query, tenant_id=None, limit=20):
+    """Ranked full-text matches with highlighted snippets."""
+    from src.database import search_logs
+    return search_logs(query, tenant_id=tenant_id, limit=limit)
+
+def set_answer_validated(log_id, validated=True, corrected_answer=None):
+    """Validate (optionally correcting) or un-validate a logged answer and update the served index."""
+    from src.database import validate_answer, unvalidate_answer
+    from src.rag.validated_answers import validated_answers
+
+    entry = validate_answer(log_id, corrected_answer) if validated else unvalidate_answer(log_id)
+    if entry is not None and validated_answers is not None:
+        if validated:
+            validated_answers.add(entry)
+        else:
+            validated_answers.remove(entry["tenant_id"], entry["id"])
+    return entry
+
+def get_admin_log_stats(**filters):
+    """SQL-side counts for the admin panel's current filters."""
+    from src.database import get_log_stats
+    return get_log_stats(**filters)
+
+def get_collection_stats():
+    """Per-tenant vector counts and memory footprint for the admin panel."""
+    from src.qdrant_client import collection_stats
+    from src.config import TENANT_IDS
+    return collection_stats(TENANT_IDS)
+
+def get_backend_metrics():
+    """Runtime counters for the admin panel (connection reuse, caches, log writer)."""
+    from src.clients import connection_stats
+    from src.database import log_writer_stats
+    from src.embedding_providers import get_embedding_provider
+    from src.ingestion.embedding_cache import get_embedding_cache, query_embedding_lru
+    from src.rag.answer_cache import answer_cache
+    from src.rag.reranker import reranker
+    from src.rag.chat_service import coalescer
+    from src.rag.validated_answers import validated_answers
 
-def get_admin_logs():
-    """Fetches conversation logs for admin panel."""
-    from src.database import get_all_logs # Import locally to avoid circular dependency
-    return get_all_logs()
\ No newline at end of file
+    embedding_cache = get_embedding_cache()
+    return {
+        "embedding_provider": get_embedding_provider().describe(),
+        "http_connections": connection_stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache else "disabled",
+        "query_embedding_lru": query_embedding_lru.stats() if query_embedding_lru else "disabled",
+        "answer_cache": answer_cache.stats() if answer_cache else "disabled",
+        "validated_answers": validated_answers.stats() if validated_answers else "disabled",
+        "reranker": reranker.stats() if reranker else "disabled",
+        "request_coalescing": coalescer.stats() if coalescer else "disabled",
+        "conversation_log_writer": log_writer_stats(),
+    }
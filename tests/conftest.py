@@ -0,0 +1,37 @@
+# tests/conftest.py
+"""
+Tests run offline against a throwaway data directory: settings are read from
+the environment when src.config is imported, so they are set here first, and
+OpenAI is replaced by the benchmark's deterministic fakes.
+"""
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_work_dir = tempfile.mkdtemp(prefix="rag-tests-")
+os.environ["VECTOR_STORE_DIR"] = os.path.join(_work_dir, "vector_store")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_work_dir, "embedding_cache.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'app.db')}"
+os.environ["OPENAI_API_KEY"] = "sk-offline-tests"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+
+from benchmark import FakeEmbeddings, FakeAsyncEmbeddings  # noqa: E402
+from src.clients import override_clients  # noqa: E402
+from src.database import init_db  # noqa: E402
+
+EMBEDDING_DIMENSION = 1536
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline_openai():
+    override_clients(
+        openai=SimpleNamespace(embeddings=FakeEmbeddings(EMBEDDING_DIMENSION, 0, 0)),
+        async_openai=SimpleNamespace(embeddings=FakeAsyncEmbeddings(EMBEDDING_DIMENSION, 0, 0)),
+    )
+    init_db()
@@ -0,0 +1,53 @@
+# tests/test_answer_cache.py
+from src.rag.answer_cache import SemanticAnswerCache
+
+WARRANTY = [1.0, 0.0, 0.0]
+WARRANTY_REPHRASED = [0.99, 0.1, 0.0]
+REFUNDS = [0.0, 1.0, 0.0]
+
+
+def _cache(**kwargs):
+    return SemanticAnswerCache(**{"threshold": 0.95, "ttl_seconds": 3600, "max_entries": 10, **kwargs})
+
+
+def test_similar_question_hits_and_other_tenants_do_not():
+    cache = _cache()
+    cache.store("tenantA", "How long is the warranty?", WARRANTY, "Two years.", ["manual.pdf (Page 2)"], 0)
+
+    assert cache.lookup("tenantA", WARRANTY_REPHRASED) == ("Two years.", ["manual.pdf (Page 2)"])
+    assert cache.lookup("tenantA", REFUNDS) is None
+    assert cache.lookup("tenantB", WARRANTY) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_new_documents_invalidate_cached_answers():
+    cache = _cache()
+    cache.store("tenantA", "How long is the warranty?", WARRANTY, "Two years.", [], cache.tenant_version("tenantA"))
+    cache.store("tenantB", "How long is the warranty?", WARRANTY, "One year.", [], cache.tenant_version("tenantB"))
+
+    cache.invalidate_tenant("tenantA")
+    assert cache.tenant_version("tenantA") == 1
+    assert cache.lookup("tenantA", WARRANTY) is None
+    # Only the re-ingested tenant loses its answers
+    assert cache.lookup("tenantB", WARRANTY) == ("One year.", [])
+
+
+def test_answer_generated_across_an_ingest_is_not_stored():
+    cache = _cache()
+    version = cache.tenant_version("tenantA")  # read before retrieval
+    cache.invalidate_tenant("tenantA")  # documents change meanwhile
+    cache.store("tenantA", "How long is the warranty?", WARRANTY, "Stale answer.", [], version)
+    assert cache.lookup("tenantA", WARRANTY) is None
+    assert cache.stats()["entries"] == {}
+
+
+def test_expired_and_evicted_entries_are_not_served():
+    expired = _cache(ttl_seconds=-1)
+    expired.store("tenantA", "q", WARRANTY, "Two years.", [], 0)
+    assert expired.lookup("tenantA", WARRANTY) is None
+
+    small = _cache(max_entries=1)
+    small.store("tenantA", "warranty", WARRANTY, "Two years.", [], 0)
+    small.store("tenantA", "refunds", REFUNDS, "Seven days.", [], 0)
+    assert small.lookup("tenantA", WARRANTY) is None
+    assert small.lookup("tenantA", REFUNDS) == ("Seven days.", [])
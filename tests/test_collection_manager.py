@@ -0,0 +1,42 @@
+# tests/test_collection_manager.py
+import asyncio
+import warnings
+
+import pytest
+
+import src.qdrant_client as qdrant
+from src.qdrant_client import collection_manager, get_tenant_sparse_index, query_documents
+from src.rag.retrieval import aget_tenant_docs
+
+
+@pytest.fixture
+def memory_mode(monkeypatch):
+    monkeypatch.setattr(qdrant, "VECTOR_STORE_MODE", "memory")
+    yield
+    for tenant_id in ("tenantY", "tenantZ"):
+        collection_manager.forget(tenant_id)
+
+
+def test_query_after_sparse_index_touch_creates_collection(memory_mode):
+    # Opening the keyword index registers the tenant before any collection exists
+    get_tenant_sparse_index("tenantY")
+    assert query_documents("tenantY", "hello world") == []
+
+
+def test_async_retrieval_for_tenant_without_documents(memory_mode):
+    assert asyncio.run(aget_tenant_docs("hello world", "tenantZ")) == []
+
+
+def test_search_uses_the_collections_quantization_without_leaking_the_warning_filter(memory_mode):
+    qdrant.ensure_collection("tenantQ", quantization="int8")
+    try:
+        params = qdrant._search_params("tenantQ")
+        assert params.quantization.rescore
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            assert query_documents("tenantQ", "hello world") == []
+        assert not [w for w in caught if "Local mode performs exact" in str(w.message)]
+        assert not [f for f in warnings.filters if f[1] and f[1].pattern.startswith("Local mode")]
+    finally:
+        collection_manager.forget("tenantQ")
@@ -0,0 +1,59 @@
+# tests/test_context_packer.py
+from langchain_core.documents import Document
+
+from src.rag.context_packer import pack_context, render_chunk
+from src.tokens import count_tokens
+
+SEPARATOR = "\n\n---\n\n"
+
+
+def _doc(text, source="manual.pdf", page=1):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def _tokens(doc):
+    return count_tokens(render_chunk(doc))
+
+
+def test_near_duplicate_of_a_better_chunk_is_dropped():
+    best = _doc("The warranty covers parts and labour for two years from the date of purchase.")
+    copy = _doc("the warranty covers parts and labour for two years from the date of purchase", "faq.md", 3)
+    other = _doc("Refunds are paid to the original card within seven working days.", "faq.md", 4)
+
+    packed, stats = pack_context([best, copy, other], token_budget=10_000)
+    assert [d.page_content for d in packed] == [best.page_content, other.page_content]
+    assert stats.duplicates_dropped == 1
+    assert stats.kept_chunks == 2
+
+
+def test_overlapping_chunks_of_one_page_are_merged():
+    first = _doc("Section one explains setup. The device must be charged fully before first use.")
+    second = _doc("The device must be charged fully before first use. Then hold the power button.")
+
+    packed, stats = pack_context([first, second], token_budget=10_000)
+    assert [d.page_content for d in packed] == [
+        "Section one explains setup. The device must be charged fully before first use. Then hold the power button."
+    ]
+    assert stats.merged == 1
+
+
+def test_budget_is_filled_in_relevance_order():
+    docs = [
+        _doc("alpha " * 40, page=1),
+        _doc("bravo " * 200, page=2),  # does not fit after the first
+        _doc("charlie " * 20, page=3),  # still fits: later, smaller chunks fill the rest
+    ]
+    budget = _tokens(docs[0]) + count_tokens(SEPARATOR) + _tokens(docs[2])
+
+    packed, stats = pack_context(docs, token_budget=budget)
+    assert [d.metadata["page"] for d in packed] == [1, 3]
+    assert stats.packed_tokens <= budget
+    assert stats.tokens_saved > 0
+
+
+def test_best_chunk_larger_than_the_budget_keeps_its_head():
+    doc = _doc("delta " * 500)
+    packed, stats = pack_context([doc], token_budget=50)
+    assert len(packed) == 1
+    assert doc.page_content.startswith(packed[0].page_content)
+    assert stats.packed_tokens <= 50
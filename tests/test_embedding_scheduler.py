@@ -0,0 +1,75 @@
+# tests/test_embedding_scheduler.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ingestion.embedding_scheduler import EmbeddingScheduler, _in_input_order
+
+
+def _scheduler(embed_batch_fn=None, **limits):
+    return EmbeddingScheduler(embed_batch_fn or (lambda texts: [[float(len(t))] for t in texts]), **limits)
+
+
+def test_pack_respects_token_and_item_limits_in_order():
+    scheduler = _scheduler(max_tokens_per_batch=10, max_items_per_batch=3)
+    batches = scheduler.pack([4, 4, 4, 1, 1, 1, 1, 9, 2])
+    assert batches == [[0, 1], [2, 3, 4], [5, 6], [7], [8]]
+    assert [i for batch in batches for i in batch] == list(range(9))
+
+
+def test_oversized_single_input_gets_its_own_batch():
+    assert _scheduler(max_tokens_per_batch=10).pack([3, 50, 3]) == [[0], [1], [2]]
+
+
+def test_in_input_order_reassembles_batches_completed_out_of_order():
+    completed = [([2, 3], ["c", "d"]), ([0, 1], ["a", "b"]), ([4], ["e"])]
+    assert _in_input_order(5, completed) == ["a", "b", "c", "d", "e"]
+
+
+def test_embed_keeps_input_order_across_batches():
+    texts = [f"text number {i} " * (i % 4 + 1) for i in range(40)]
+    scheduler = _scheduler(max_items_per_batch=3, max_workers=4)
+    assert scheduler.embed(texts) == [[float(len(t))] for t in texts]
+
+
+def test_concurrency_bound_is_shared_across_calls():
+    active, peak, lock = 0, 0, threading.Lock()
+
+    def slow_batch(texts):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return [[0.0] for _ in texts]
+
+    scheduler = _scheduler(slow_batch, max_items_per_batch=1, max_workers=3)
+    with ThreadPoolExecutor(max_workers=6) as callers:
+        # Six documents at once, single-batch and multi-batch calls mixed
+        list(callers.map(scheduler.embed, [["x"] * n for n in (1, 5, 1, 5, 1, 5)]))
+    assert peak == 3
+
+
+def test_aembed_bound_and_order():
+    active, peak = 0, 0
+
+    async def slow_batch(texts):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return [[float(len(t))] for t in texts]
+
+    scheduler = EmbeddingScheduler(lambda texts: [], aembed_batch_fn=slow_batch, max_items_per_batch=1, max_workers=2)
+    texts = [["a"], ["bb", "ccc"], ["dddd"] * 3]
+
+    async def main():
+        return await asyncio.gather(*(scheduler.aembed(t) for t in texts))
+
+    results = asyncio.run(main())
+    assert results == [[[float(len(t))] for t in batch] for batch in texts]
+    assert peak == 2
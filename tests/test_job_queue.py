@@ -0,0 +1,43 @@
+# tests/test_job_queue.py
+import time
+
+import pytest
+
+from src.ingestion.doc_loader import iter_document_chunks
+from src.ingestion.job_queue import IngestionQueue, DONE, FAILED
+
+
+@pytest.fixture
+def ingestion_queue():
+    queue = IngestionQueue(parse_workers=1, index_workers=2)
+    yield queue
+    queue.shutdown()
+
+
+def _wait(queue, job_ids, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        jobs = queue.get_jobs(job_ids)
+        if all(job.finished for job in jobs):
+            return jobs
+        time.sleep(0.05)
+    raise AssertionError("ingestion did not finish")
+
+
+def test_every_file_is_streamed_from_the_parse_process(tmp_path, ingestion_queue):
+    # Several parse batches (INGEST_STREAM_BATCH_SIZE chunks each) for a small file
+    text = tmp_path / "handbook.txt"
+    text.write_text("\n\n".join(f"Section {i}: " + "policy details " * 60 for i in range(600)), encoding="utf-8")
+    broken = tmp_path / "broken.pdf"
+    broken.write_text("not a pdf")
+    expected = len(list(iter_document_chunks(str(text), "handbook.txt", "tenantQueue")))
+
+    jobs = _wait(ingestion_queue, [
+        ingestion_queue.submit("tenantQueue", str(text), "handbook.txt"),
+        ingestion_queue.submit("tenantQueue", str(broken), "broken.pdf"),
+    ])
+
+    assert jobs[0].status == DONE, jobs[0].message
+    assert jobs[0].chunks == expected > 256
+    assert jobs[1].status == FAILED
+    assert "broken.pdf" in jobs[1].message
@@ -0,0 +1,78 @@
+# tests/test_log_queries.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.database as database
+from src.database import SessionLocal, Tenant, ConversationLog, get_logs_page, search_logs
+
+START = datetime(2026, 3, 1, 9, 0)
+
+
+def _add_tenant_logs(tenant_id, rows):
+    """rows: (minutes after START, question, answer); returns the new ids."""
+    db = SessionLocal()
+    try:
+        if db.get(Tenant, tenant_id) is None:
+            db.add(Tenant(id=tenant_id, name=tenant_id))
+        logs = [
+            ConversationLog(tenant_id=tenant_id, timestamp=START + timedelta(minutes=m), question=q, answer=a)
+            for m, q, a in rows
+        ]
+        db.add_all(logs)
+        db.commit()
+        return [log.id for log in logs]
+    finally:
+        db.close()
+
+
+def test_keyset_pages_cover_every_log_once_newest_first():
+    # Several logs share a timestamp: the id breaks the tie across page boundaries
+    minutes = [0, 1, 1, 1, 2, 3, 3, 4]
+    ids = _add_tenant_logs("tenantPages", [(m, f"question {i}", "answer") for i, m in enumerate(minutes)])
+    expected = [log_id for _, log_id in sorted(zip(minutes, ids), reverse=True)]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = get_logs_page(page_size=3, cursor=cursor, tenant_id="tenantPages")
+        seen += [log["id"] for log in page]
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == expected
+    assert pages == 3
+
+    # A log written after the first page was read does not shift later pages
+    first, cursor = get_logs_page(page_size=3, tenant_id="tenantPages")
+    _add_tenant_logs("tenantPages", [(10, "newest question", "answer")])
+    second, _ = get_logs_page(page_size=3, cursor=cursor, tenant_id="tenantPages")
+    assert [log["id"] for log in first + second] == expected[:6]
+
+
+@pytest.fixture(scope="module")
+def search_tenant():
+    _add_tenant_logs("tenantSearch", [
+        (0, "How do refunds work?", "Refunds are paid within seven days."),
+        (1, "What is the warranty?", "Two years; refunded repairs are excluded."),
+        (2, "Where is the office?", "In Oslo."),
+    ])
+    return "tenantSearch"
+
+
+def test_full_text_search_ranks_question_matches_and_highlights(search_tenant):
+    assert database.logs_fts_enabled()
+    results = search_logs("refund", tenant_id=search_tenant)
+    # Prefix match on the last word; the log asking about it ranks first
+    assert [r["question"] for r in results][0] == "How do **refunds** work?"
+    assert len(results) == 2
+    assert results[0]["score"] >= results[1]["score"]
+    assert search_logs("   ", tenant_id=search_tenant) == []
+
+
+def test_search_falls_back_to_like_without_fts(search_tenant, monkeypatch):
+    monkeypatch.setattr(database, "_logs_fts_enabled", False)
+    results = search_logs("Oslo", tenant_id=search_tenant)
+    assert [(r["question"], r["score"]) for r in results] == [("Where is the office?", 0.0)]
+
+    page, _ = get_logs_page(tenant_id=search_tenant, text_query="refund")
+    assert len(page) == 2
@@ -0,0 +1,58 @@
+# tests/test_reranker.py
+from langchain_core.documents import Document
+
+from src.rag.reranker import LexicalScorer, Reranker
+from src.sparse_index import reciprocal_rank_fusion
+
+
+class FixedScorer:
+    name = "fixed"
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.calls = 0
+
+    def score(self, query, texts, query_vector=None):
+        self.calls += 1
+        if isinstance(self.scores, Exception):
+            raise self.scores
+        return [self.scores[t] for t in texts]
+
+
+def _docs(*texts):
+    return [Document(page_content=t) for t in texts]
+
+
+def test_rrf_favours_ids_ranked_well_in_both_lists():
+    dense = ["a", "b", "c"]
+    sparse = ["b", "d", "a"]
+    # b: 1/62 + 1/61 > a: 1/61 + 1/63 > d: 1/62 > c: 1/63
+    assert reciprocal_rank_fusion([dense, sparse]) == ["b", "a", "d", "c"]
+    assert reciprocal_rank_fusion([dense, sparse], limit=2) == ["b", "a"]
+    assert reciprocal_rank_fusion([["x"], []]) == ["x"]
+
+
+def test_rerank_orders_by_score_and_keeps_top_n():
+    reranker = Reranker(FixedScorer({"a": 0.1, "b": 0.9, "c": 0.5, "d": 0.5}), top_n=3, budget_ms=1000)
+    ranked = reranker.rerank("q", _docs("a", "b", "c", "d"), "tenantA")
+    # c and d tie: retrieval order kept
+    assert [d.page_content for d in ranked] == ["b", "c", "d"]
+    assert reranker.stats()["reranked"] == 1
+
+
+def test_rerank_keeps_retrieval_order_on_error_or_without_budget():
+    failing = Reranker(FixedScorer(RuntimeError("model unavailable")), top_n=2, budget_ms=1000)
+    assert [d.page_content for d in failing.rerank("q", _docs("a", "b", "c"), "tenantA")] == ["a", "b"]
+    assert failing.stats()["failed"] == 1
+
+    scorer = FixedScorer({"a": 0.0, "b": 1.0})
+    no_budget = Reranker(scorer, top_n=2, budget_ms=1000, tenant_budgets={"tenantB": 0})
+    assert [d.page_content for d in no_budget.rerank("q", _docs("a", "b"), "tenantB")] == ["a", "b"]
+    assert scorer.calls == 0
+    assert no_budget.stats()["skipped_over_budget"] == 1
+
+
+def test_lexical_scorer_lifts_keyword_matches():
+    texts = ["shipping takes three days", "the warranty lasts two years", "contact support by email"]
+    scores = LexicalScorer().score("how long is the warranty", texts)
+    assert max(range(len(texts)), key=scores.__getitem__) == 1
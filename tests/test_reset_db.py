@@ -0,0 +1,15 @@
+# tests/test_reset_db.py
+from langchain_core.documents import Document as Chunk
+
+from reset_db import reset_tenant
+from src.qdrant_client import collection_count, keyword_search, upsert_documents
+
+
+def test_reset_tenant_clears_vectors_and_keyword_index():
+    tenant_id = "tenantReset"
+    upsert_documents(tenant_id, [Chunk(page_content="warranty lasts two years", metadata={"source": "a.txt"})])
+    assert keyword_search(tenant_id, "warranty")
+
+    reset_tenant(tenant_id)
+    assert collection_count(tenant_id) == 0
+    assert keyword_search(tenant_id, "warranty") == []
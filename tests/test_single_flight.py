@@ -0,0 +1,129 @@
+# tests/test_single_flight.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.rag.single_flight import SingleFlight
+
+CALLERS = 5
+
+
+def _wait_for_followers(flight, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while flight.stats()["coalesced"] < count:
+        assert time.monotonic() < deadline, "callers never joined"
+        time.sleep(0.005)
+
+
+def _run_concurrently(flight, fn):
+    """Outcomes of CALLERS identical do() calls made while the first is still running."""
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return fn()
+
+    def caller():
+        try:
+            return flight.do("question", work)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(caller) for _ in range(CALLERS)]
+        _wait_for_followers(flight, CALLERS - 1)
+        release.set()
+        return [f.result() for f in futures], len(calls)
+
+
+def test_concurrent_identical_calls_share_one_result():
+    flight = SingleFlight()
+    result = ("answer", ["manual.pdf (Page 1)"])
+    outcomes, calls = _run_concurrently(flight, lambda: result)
+    assert calls == 1
+    assert all(outcome is result for outcome in outcomes)
+    assert flight.stats() == {"in_flight": 0, "computed": 1, "coalesced": CALLERS - 1}
+
+    # Finished work is not cached: the next call runs again
+    assert flight.do("question", lambda: "fresh") == "fresh"
+
+
+def test_error_reaches_every_waiting_caller():
+    flight = SingleFlight()
+    error = RuntimeError("LLM unavailable")
+
+    def fail():
+        raise error
+
+    outcomes, calls = _run_concurrently(flight, fail)
+    assert calls == 1
+    assert all(outcome is error for outcome in outcomes)
+    # The key is free again after a failure
+    assert flight.do("question", lambda: "recovered") == "recovered"
+
+
+def test_async_callers_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("question", work) for _ in range(CALLERS)))
+
+    assert asyncio.run(main()) == ["answer"] * CALLERS
+    assert len(calls) == 1
+
+
+def test_async_error_propagates_to_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("bad question")
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("question", fail) for _ in range(3)), return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    assert [type(o) for o in outcomes] == [ValueError] * 3
+
+
+def test_late_stream_joiner_replays_earlier_events():
+    flight = SingleFlight()
+    halfway, finish = threading.Event(), threading.Event()
+
+    def events():
+        yield "citations", ["a.pdf"]
+        halfway.set()
+        finish.wait(5)
+        yield "delta", "done"
+
+    first = flight.stream("question", events)
+    assert next(first) == ("citations", ["a.pdf"])
+    halfway.wait(5)
+    late = flight.stream("question", events)
+    finish.set()
+    assert list(late) == [("citations", ["a.pdf"]), ("delta", "done")]
+    assert list(first) == [("delta", "done")]
+
+
+def test_stream_error_is_raised_after_the_events_produced():
+    flight = SingleFlight()
+
+    def events():
+        yield "delta", "partial"
+        raise RuntimeError("stream broke")
+
+    stream = flight.stream("question", events)
+    assert next(stream) == ("delta", "partial")
+    with pytest.raises(RuntimeError, match="stream broke"):
+        next(stream)
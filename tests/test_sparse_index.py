@@ -0,0 +1,47 @@
+# tests/test_sparse_index.py
+from langchain_core.documents import Document as Chunk
+
+from src.qdrant_client import (
+    collection_manager, upsert_documents, embed_texts, get_tenant_sparse_index, keyword_search,
+)
+from src.sparse_index import TenantSparseIndex
+
+
+def test_append_after_torn_tail_is_replayed(tmp_path):
+    path = str(tmp_path / "sparse_index.jsonl")
+    index = TenantSparseIndex(path)
+    index.add(["d1"], ["alpha beta"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"add": {"d2": {"be')  # crash mid-append
+
+    reopened = TenantSparseIndex(path)
+    reopened.add(["d3"], ["gamma delta"])
+
+    replayed = TenantSparseIndex(path)
+    assert len(replayed) == 2
+    assert [doc_id for doc_id, _ in replayed.search("gamma")] == ["d3"]
+    assert [doc_id for doc_id, _ in replayed.search("alpha")] == ["d1"]
+
+
+def test_sync_indexes_missing_ids_and_drops_deleted_ones(tmp_path):
+    index = TenantSparseIndex(str(tmp_path / "sparse_index.jsonl"))
+    index.add(["d1", "gone"], ["alpha beta", "obsolete words"])
+
+    stored = [("d1", "alpha beta"), ("d2", "gamma delta")]
+    assert index.sync(lambda: stored) == (1, 1)
+    assert [doc_id for doc_id, _ in index.search("gamma")] == ["d2"]
+    assert index.search("obsolete") == []
+    # Once per load
+    assert index.sync(lambda: []) == (0, 0)
+
+
+def test_vectors_committed_before_postings_are_indexed_on_reopen():
+    tenant_id = "tenantTornUpsert"
+    upsert_documents(tenant_id, [Chunk(page_content="warranty lasts two years", metadata={"source": "a.txt"})])
+    # A crash after the vector commit, before the postings were appended
+    vector = embed_texts(["refunds take a week"])[0]
+    collection_manager.store(tenant_id).upsert(["late-id"], [vector], [{"page_content": "refunds take a week"}])
+
+    get_tenant_sparse_index(tenant_id).unload()
+    assert [doc_id for doc_id, _ in keyword_search(tenant_id, "refunds")] == ["late-id"]
+    assert len(keyword_search(tenant_id, "warranty")) == 1
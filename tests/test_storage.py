@@ -0,0 +1,32 @@
+# tests/test_storage.py
+import json
+
+from langchain_core.documents import Document as Chunk
+
+from src.database import SessionLocal, Document
+from src.ingestion.storage import index_chunk_stream
+from src.qdrant_client import collection_count, get_tenant_sparse_index
+
+
+def _chunks(tenant_id, texts):
+    return [Chunk(page_content=t, metadata={"tenant_id": tenant_id, "source": "notes.txt"}) for t in texts]
+
+
+def test_reupload_without_text_removes_previous_chunks():
+    tenant_id = "tenantEmpty"
+    result = index_chunk_stream(tenant_id, "notes.txt", _chunks(tenant_id, ["warranty lasts two years", "refunds take a week"]))
+    assert result.startswith("Success")
+    assert collection_count(tenant_id) == 2
+
+    result = index_chunk_stream(tenant_id, "notes.txt", [])
+    assert result.startswith("Warning: No extractable text")
+    assert collection_count(tenant_id) == 0
+    assert get_tenant_sparse_index(tenant_id).search("warranty") == []
+
+    db = SessionLocal()
+    try:
+        doc = db.query(Document).filter(Document.tenant_id == tenant_id, Document.file_name == "notes.txt").one()
+        assert json.loads(doc.chunk_manifest) == []
+        assert doc.vector_count == 0
+    finally:
+        db.close()
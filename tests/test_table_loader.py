@@ -0,0 +1,45 @@
+# tests/test_table_loader.py
+import pandas as pd
+
+from src.ingestion.table_loader import TableChunker, render_rows, iter_csv_pages
+
+
+def test_render_rows_joins_cells_and_drops_empty_rows():
+    frame = pd.DataFrame({"name": ["Ann", "", "Bo\tb"], "city": ["Oslo", " ", "Rome\nItaly"]}, index=[5, 6, 7])
+    lines = render_rows(frame)
+    assert lines.to_dict() == {5: "Ann\tOslo", 7: "Bo b\tRome Italy"}
+
+
+def test_chunks_repeat_the_header_and_name_their_row_range():
+    lines = pd.Series([f"row {i:02d}\tvalue" for i in range(10)])
+    chunker = TableChunker("name\tvalue", "prices.csv", chunk_chars=40)
+    # Two blocks: the partly filled chunk carries across the block boundary
+    docs = list(chunker.add(lines[:5])) + list(chunker.add(lines[5:])) + list(chunker.close())
+
+    assert [d.metadata["page"] for d in docs] == ["rows 1-2", "rows 3-4", "rows 5-6", "rows 7-8", "rows 9-10"]
+    for doc in docs:
+        assert doc.page_content.split("\n")[0] == "name\tvalue"
+        assert len(doc.page_content) <= 40
+        assert doc.metadata["source"] == "prices.csv"
+
+
+def test_sheet_label_and_header_only_table():
+    chunker = TableChunker("a\tb", "book.xlsx", label="Q1")
+    docs = list(chunker.add(pd.Series(["1\t2"], index=[0]))) + list(chunker.close())
+    assert [(d.page_content, d.metadata["page"]) for d in docs] == [("a\tb\n1\t2", "Q1, rows 1-1")]
+
+    assert [d.page_content for d in TableChunker("a\tb", "empty.csv").close()] == ["a\tb"]
+
+
+def test_row_with_extra_cells_keeps_them_in_the_last_column(tmp_path):
+    path = tmp_path / "ragged.csv"
+    path.write_text("a,b\n1,2\n3,4,5\n")
+    docs = list(iter_csv_pages(str(path)))
+    assert [d.page_content for d in docs] == ["a\tb\n1\t2\n3\t4,5"]
+    assert docs[0].metadata["page"] == "rows 1-2"
+
+
+def test_empty_csv_has_no_pages(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("")
+    assert list(iter_csv_pages(str(path))) == []
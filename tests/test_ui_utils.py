@@ -0,0 +1,17 @@
+# tests/test_ui_utils.py
+import json
+
+from streamlit_ui.utils import visible_citations
+
+
+def test_error_placeholder_is_not_a_source():
+    assert visible_citations(["Error"]) == []
+    assert visible_citations(json.dumps(["Error"])) == []
+    assert visible_citations("[]") == []
+    assert visible_citations(None) == []
+
+
+def test_sources_are_kept_as_given():
+    citations = ["ErrorCodes.pdf (Page 3)", "manual.pdf (Page 1)"]
+    assert visible_citations(citations) == citations
+    assert visible_citations(json.dumps(citations)) == citations
@@ -0,0 +1,51 @@
+# tests/test_validated_answers.py
+import json
+
+from src.database import (
+    SessionLocal, Tenant, ConversationLog, log_conversation, log_writer, validate_answer, get_validated_answers,
+)
+from src.rag.validated_answers import ValidatedAnswerStore
+
+
+def _embed(texts):
+    # Orthogonal per distinct text: only exact matches are "similar"
+    return [[float(hash(t) % 7 == i) for i in range(7)] for t in texts]
+
+
+def _log_follow_up(tenant_id):
+    db = SessionLocal()
+    try:
+        if db.get(Tenant, tenant_id) is None:
+            db.add(Tenant(id=tenant_id, name=tenant_id))
+            db.commit()
+    finally:
+        db.close()
+    log_conversation(
+        tenant_id, "and for the Pro model?", "Three years.", json.dumps(["manual.pdf (Page 4)"]),
+        standalone_question="How long is the warranty for the Pro model?",
+    )
+    log_writer.flush()
+    db = SessionLocal()
+    try:
+        return db.query(ConversationLog.id).filter(ConversationLog.tenant_id == tenant_id).one()[0]
+    finally:
+        db.close()
+
+
+def test_follow_up_is_validated_under_its_standalone_question():
+    tenant_id = "tenantFollowUp"
+    log_id = _log_follow_up(tenant_id)
+    entry = validate_answer(log_id)
+    assert entry["question"] == "and for the Pro model?"
+    assert entry["lookup_question"] == "How long is the warranty for the Pro model?"
+
+    store = ValidatedAnswerStore(threshold=0.99, load_fn=get_validated_answers, embed_fn=_embed)
+    assert store.lookup(tenant_id, "how long is the warranty for the pro model") == ("Three years.", ["manual.pdf (Page 4)"])
+    # The raw follow-up means nothing without the chat it came from
+    assert store.lookup(tenant_id, "and for the Pro model?") is None
+
+
+def test_unrewritten_question_is_its_own_lookup_question():
+    store = ValidatedAnswerStore(threshold=0.99, load_fn=lambda tenant_id: [], embed_fn=_embed)
+    store.add({"id": 1, "tenant_id": "t", "question": "Refund window?", "answer": "30 days", "citations": "[]"})
+    assert store.lookup("t", "refund window") == ("30 days", [])
@@ -0,0 +1,28 @@
+# tests/test_vector_store.py
+import os
+
+import numpy as np
+
+from src.vector_store import TenantVectorStore, META_FILE, VECTORS_FILE
+
+
+def _vectors(n, dimension=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dimension)).astype(np.float32)
+
+
+def test_reopens_after_crash_before_first_meta_write(tmp_path):
+    store = TenantVectorStore("tenantA", root_dir=str(tmp_path))
+    store.upsert(["p1", "p2"], _vectors(2), [{"n": 1}, {"n": 2}])
+    # Crash after the row files were written but before meta.json
+    os.remove(os.path.join(store.path, META_FILE))
+
+    reopened = TenantVectorStore("tenantA", root_dir=str(tmp_path))
+    assert reopened.count() == 0
+
+    vectors = _vectors(1, seed=1)
+    reopened.upsert(["p3"], vectors, [{"n": 3}])
+    assert os.path.getsize(os.path.join(reopened.path, VECTORS_FILE)) == vectors.nbytes
+
+    recovered = TenantVectorStore("tenantA", root_dir=str(tmp_path))
+    assert recovered.count() == 1
+    assert [point.id for point in recovered.search(vectors[0], limit=5)] == ["p3"]